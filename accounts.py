@@ -0,0 +1,420 @@
+"""
+Çoklu hesap yürütmesi: kline / indikatör / sinyal turda bir kez (TradingBot) hesaplanır, pozisyon
+yönetimi ve emirler her hesabın kendi oturumu + PositionManager'ı ile eşzamanlı yapılır.
+
+- Ana hesap ('main'): BYBIT_API_KEY / BYBIT_API_SECRET, risk tablosu SYMBOL_SETTINGS
+- Alt hesaplar: config.ACCOUNT_SETTINGS ({hesap: {'settings': SYMBOL_SETTINGS biçiminde, 'symbols': [...]}}),
+  anahtarlar ortamdan: BYBIT_API_KEY_<HESAP> / BYBIT_API_SECRET_<HESAP>
+- Her hesabın ayrı durum deposu (positions.json -> positions.<hesap>.json), devre kesicisi, koşullu girişleri
+  ve işlem defteri (<LEDGER_DIR>/<hesap>/) var
+- Bir hesabın hatası (yetki, bakiye, açık devre) diğer hesapları ve turun kendisini etkilemez
+"""
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from config import (BYBIT_API_KEY, BYBIT_API_SECRET, LEVERAGE, SYMBOL_SETTINGS, RESILIENCE_ENABLED,
+                    PREARM_ENTRIES, LEDGER_DIR)
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_ACCOUNT = 'main'
+ACCOUNT_NAME = re.compile(r'^[A-Za-z0-9_]+$')  # depo dosya adı ve ortam değişkeni soneki olarak kullanılır
+
+
+def fan_out(accounts: List['Account'], fn: Callable[['Account'], Any]) -> Dict[str, Any]:
+    """
+    fn(account) her hesap için; birden fazla hesapta thread havuzunda eşzamanlı.
+    Dönüş {hesap: sonuç}; hata veren hesabın değeri yakalanan istisnadır (diğer hesaplar devam eder)
+    """
+    def call(account: 'Account') -> Any:
+        try:
+            return fn(account)
+        except Exception as e:
+            logger.error(f"❌ [{account.name}] hesap hatası: {str(e)}", exc_info=True)
+            return e
+
+    if len(accounts) == 1:
+        return {accounts[0].name: call(accounts[0])}
+    with ThreadPoolExecutor(max_workers=len(accounts), thread_name_prefix='account') as pool:
+        futures = {account.name: pool.submit(call, account) for account in accounts}
+        return {name: future.result() for name, future in futures.items()}
+
+
+class Account:
+    def __init__(self, name: str, session, symbols: List[str], symbol_settings: Optional[Dict] = None,
+                 state_store=None, api_key: Optional[str] = BYBIT_API_KEY, api_secret: Optional[str] = BYBIT_API_SECRET,
+                 async_session=None, resilience=None):
+        """
+        session: hesabın (dayanıklılık katmanı sarılmış) senkron oturumu; async_session: AsyncBybitHTTP
+        yerine geçen istemci (örn. simulator); resilience: async oturumun paylaşacağı ResilienceState
+        """
+        from position_manager import PositionManager
+        from state_store import create_state_store
+
+        self.name = name
+        self.session = session
+        self.symbols = list(symbols)
+        self.symbol_settings = SYMBOL_SETTINGS if symbol_settings is None else symbol_settings
+        self.state_store = state_store or create_state_store()
+        self.state_version = 0
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.async_session = async_session
+        self.resilience = resilience
+        self.init_api_calls = 0
+        self.log_prefix = '' if name == PRIMARY_ACCOUNT else f"[{name}] "
+        self.position_manager = PositionManager(session, self.symbol_settings)
+
+        self.armer = None
+        if PREARM_ENTRIES:
+            from entry_arming import EntryArmer
+            self.armer = EntryArmer(session, self.position_manager)
+
+        self.ledger = None
+        if LEDGER_DIR:
+            from ledger import ExecutionLedger
+            self.ledger = ExecutionLedger(session, name, LEDGER_DIR)
+            self.position_manager.ledger = self.ledger
+
+    def open_async_client(self, testnet: bool = False):
+        """Hesabın anahtarlarıyla AsyncBybitHTTP (dayanıklılık açıksa hesabın durumuyla sarılı)"""
+        from async_exchange import AsyncBybitHTTP
+        client = self.async_session or AsyncBybitHTTP(api_key=self.api_key, api_secret=self.api_secret, testnet=testnet)
+        if self.resilience is not None:
+            from resilience import AsyncResilientSession
+            client = AsyncResilientSession(client, self.resilience)
+        return client
+
+    # --- Başlangıç ve durum ---
+    def initialize(self):
+        """ByBit için hesap ayarlarını yapılandır (kaldıraç: hesabın risk tablosu, yoksa LEVERAGE)"""
+        for symbol in self.symbols:
+            leverage = self.symbol_settings.get(symbol, {}).get('leverage', LEVERAGE)
+            try:
+                self.init_api_calls += 1
+                self.session.set_leverage(
+                    category="linear",
+                    symbol=symbol,
+                    buyLeverage=str(leverage),
+                    sellLeverage=str(leverage)
+                )
+                logger.info(f"{self.log_prefix}{symbol} kaldıraç ayarlandı: {leverage}x")
+            except Exception as e:
+                if "leverage not modified" in str(e):
+                    logger.debug(f"{self.log_prefix}{symbol} kaldıraç zaten {leverage}x olarak ayarlı")
+                else:
+                    logger.warning(f"{self.log_prefix}{symbol} kaldıraç ayarlama uyarısı: {str(e)}")
+
+    def sync_positions(self):
+        """Sıcak instance'da yeniden kullanılan bot için pozisyonları borsadan tazeler"""
+        self.position_manager.active_positions.clear()
+        self.load_positions()
+
+    def load_positions(self):
+        """
+        Kayıtlı durumu depodan yükler ve borsadaki pozisyonlarla karşılaştırır (diff):
+        - depoda ve borsada eşleşen pozisyon -> kayıt aynen kullanılır (order_id, current_pct_atr, oco_pair);
+          kaydın TP/SL emirleri tek toplu açık emir sorgusunda yoksa (bot kapalıyken dolmuş / iptal edilmiş)
+          kayıt kullanılmaz ve emirler borsadan aranır
+        - sadece borsada olan pozisyon -> TP/SL emirleri borsadan aranır (eski yeniden keşif yolu)
+        - sadece depoda olan pozisyon -> bot kapalıyken kapanmış, kayıt düşülür
+        """
+        try:
+            stored, self.state_version = self.state_store.load()
+        except Exception as e:
+            logger.error(f"{self.log_prefix}Durum deposu okunamadı, borsadan yeniden keşif yapılacak: {e}")
+            stored = {}
+
+        try:
+            open_order_ids = self._open_order_ids() if stored else None
+            self.init_api_calls += 1
+            positions = self.session.get_positions(category='linear', settleCoin='USDT')
+            if positions['retCode'] == 0:
+                for pos in positions['result']['list']:
+                    if float(pos.get('size', 0)) > 0:
+                        symbol = pos['symbol']
+                        direction = 'LONG' if pos['side'] == 'Buy' else 'SHORT'
+                        quantity = float(pos['size'])
+
+                        saved = stored.pop(symbol, None)
+                        if (saved and saved['direction'] == direction
+                                and abs(float(saved['quantity']) - quantity) <= quantity * 0.01):
+                            if self._oco_pair_open(saved, open_order_ids):
+                                self.position_manager.active_positions[symbol] = saved
+                                logger.info(f"{self.log_prefix}{symbol} pozisyon durum deposundan yüklendi: {direction}")
+                                continue
+                            logger.warning(f"{self.log_prefix}{symbol} kayıtlı TP/SL emirleri borsada açık değil - emirler yeniden aranıyor")
+
+                        oco_pair = self._find_tp_sl_orders(symbol, direction, quantity)
+
+                        position_data = {
+                            'symbol': symbol,
+                            'direction': direction,
+                            'entry_price': float(pos['avgPrice']),
+                            'quantity': quantity,
+                            'take_profit': float(pos['takeProfit']) if pos['takeProfit'] else None,
+                            'stop_loss': float(pos['stopLoss']) if pos['stopLoss'] else None,
+                            'order_id': None
+                        }
+
+                        if oco_pair:
+                            position_data['oco_pair'] = oco_pair
+                            logger.info(f"{self.log_prefix}{symbol} pozisyon + TP/SL emirleri yüklendi: {direction}")
+                        else:
+                            logger.warning(f"{self.log_prefix}{symbol} pozisyon yüklendi ama TP/SL emirleri bulunamadı")
+
+                        self.position_manager.active_positions[symbol] = position_data
+
+                for symbol in stored:
+                    logger.info(f"{self.log_prefix}{symbol} kayıtlı pozisyon borsada yok (bot kapalıyken kapanmış) - kayıt silindi")
+
+        except Exception as e:
+            logger.error(f"{self.log_prefix}Mevcut pozisyonlar yüklenirken hata: {e}")
+
+    def persist(self):
+        """active_positions'ı durum deposuna yazar (versiyon çakışmasında güncel versiyon üzerine yazar)"""
+        positions = self.position_manager.active_positions
+        try:
+            self.state_version = self.state_store.save(positions, self.state_version)
+        except Exception as e:
+            from state_store import StateConflictError
+            if not isinstance(e, StateConflictError):
+                logger.error(f"{self.log_prefix}Pozisyon durumu kaydedilemedi: {e}")
+                return
+            # Borsa doğrulamasından geçmiş bu turun durumu en güncelidir
+            logger.warning(f"{self.log_prefix}Durum deposu versiyon çakışması, yeniden yazılıyor: {e}")
+            try:
+                _, self.state_version = self.state_store.load()
+                self.state_version = self.state_store.save(positions, self.state_version)
+            except Exception as retry_error:
+                logger.error(f"{self.log_prefix}Pozisyon durumu kaydedilemedi: {retry_error}")
+
+    def _open_order_ids(self) -> Optional[Set[str]]:
+        """Tüm USDT linear açık emirlerin id'leri (tek toplu sorgu, sayfa sayfa); hata olursa None"""
+        try:
+            order_ids, cursor = set(), None
+            while True:
+                self.init_api_calls += 1
+                orders = self.session.get_open_orders(category='linear', settleCoin='USDT', limit=50,
+                                                      **({'cursor': cursor} if cursor else {}))
+                if orders['retCode'] != 0:
+                    raise Exception(orders['retMsg'])
+                order_ids.update(order['orderId'] for order in orders['result']['list'])
+                cursor = orders['result'].get('nextPageCursor')
+                if not cursor:
+                    return order_ids
+        except Exception as e:
+            logger.warning(f"{self.log_prefix}Açık emirler alınamadı, kayıtlı TP/SL emirleri doğrulanamıyor: {e}")
+            return None
+
+    @staticmethod
+    def _oco_pair_open(saved: Dict, open_order_ids: Optional[Set[str]]) -> bool:
+        """Kayıtlı pozisyonun aktif OCO pair'inin iki bacağı da borsada açık mı (doğrulanamıyorsa False)"""
+        oco_pair = saved.get('oco_pair')
+        if open_order_ids is None or not oco_pair or not oco_pair.get('active'):
+            return False
+        return oco_pair['tp_order_id'] in open_order_ids and oco_pair['sl_order_id'] in open_order_ids
+
+    def _find_tp_sl_orders(self, symbol: str, direction: str, quantity: float) -> Optional[Dict]:
+        """Belirli bir pozisyon için açık TP/SL emirlerini bulur"""
+        try:
+            self.init_api_calls += 1
+            orders = self.session.get_open_orders(category='linear', symbol=symbol)
+
+            if orders['retCode'] != 0:
+                return None
+
+            tp_order_id = None
+            sl_order_id = None
+            expected_side = "Sell" if direction == "LONG" else "Buy"
+
+            for order in orders['result']['list']:
+                if order['side'] != expected_side:
+                    continue
+
+                order_qty = float(order['qty'])
+                if abs(order_qty - quantity) > quantity * 0.01:
+                    continue
+
+                if order['orderType'] == 'Limit' and order.get('reduceOnly'):
+                    tp_order_id = order['orderId']
+                elif order['orderType'] == 'Market' and order.get('triggerPrice'):
+                    sl_order_id = order['orderId']
+
+            if tp_order_id and sl_order_id:
+                return {
+                    'symbol': symbol,
+                    'tp_order_id': tp_order_id,
+                    'sl_order_id': sl_order_id,
+                    'active': True
+                }
+            else:
+                logger.warning(f"{self.log_prefix}{symbol} TP/SL emirleri eksik - TP: {tp_order_id}, SL: {sl_order_id}")
+                return None
+
+        except Exception as e:
+            logger.error(f"{self.log_prefix}{symbol} TP/SL emirleri aranırken hata: {e}")
+            return None
+
+    def supervise(self) -> Dict:
+        """OCO tetiklenmeleri ve dolan koşullu girişler; pozisyon durumu değiştiyse depoya yazılır"""
+        from state_store import dumps
+        before = dumps(self.position_manager.active_positions)
+        self.position_manager.monitor_oco_orders()
+        if self.armer is not None:
+            self.armer.reconcile(self.symbols)
+        changed = dumps(self.position_manager.active_positions) != before
+        if changed:
+            self.persist()
+        return {
+            'changed': changed,
+            'positions': len(self.position_manager.active_positions),
+            'armed_entries': len(self.armer.armed) if self.armer else 0
+        }
+
+    # --- İşlem turu ---
+    def _own(self, signals: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        """Sinyallerin hesabın sembollerine düşen kısmı"""
+        return {symbol: signal for symbol, signal in signals.items() if symbol in self.symbols}
+
+    def _summary(self, phases: Dict[str, float], error: Optional[str] = None) -> Dict:
+        summary = {
+            'success': error is None,
+            'phases': phases,
+            'positions': len(self.position_manager.active_positions),
+        }
+        if self.ledger is not None:
+            summary['ledger'] = self.ledger.last_sync
+        if error is not None:
+            summary['error'] = error
+        return summary
+
+    def sync_ledger(self, phases: Dict[str, float]) -> None:
+        """Yeni dolumlar ve kapanan PnL kayıtları işlem defterine; defter hatası turu etkilemez"""
+        if self.ledger is None:
+            return
+        t0 = time.perf_counter()
+        try:
+            self.ledger.sync(self.position_manager.active_positions)
+        except Exception as e:
+            logger.warning(f"{self.log_prefix}İşlem defteri senkronize edilemedi: {str(e)}")
+        phases['ledger'] = round(time.perf_counter() - t0, 4)
+
+    def trade(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]]) -> Dict:
+        """Pozisyon yönetimi + sinyallere göre yeni işlemler; hata hesabın özetinde döner"""
+        phases = {}
+        signals = self._own(signals)
+        try:
+            t0 = time.perf_counter()
+            self.position_manager.manage_positions(signals, all_data)
+            phases['manage_positions'] = round(time.perf_counter() - t0, 4)
+            t0 = time.perf_counter()
+            self._execute_trades(signals, all_data)
+            phases['execute_trades'] = round(time.perf_counter() - t0, 4)
+            self.sync_ledger(phases)
+            return self._summary(phases)
+        except Exception as e:
+            logger.error(f"❌ {self.log_prefix}İşlem hatası: {str(e)}", exc_info=True)
+            return self._summary(phases, str(e))
+
+    async def trade_async(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]],
+                          testnet: bool = False) -> Dict:
+        """trade'in asyncio karşılığı; async oturum bağlı değilse (alt hesap) tur için kendi oturumunu açar"""
+        phases = {}
+        signals = self._own(signals)
+        try:
+            if self.position_manager.async_client is not None:
+                await self._trade_async(signals, all_data, phases)
+            else:
+                async with self.open_async_client(testnet) as client:
+                    self.position_manager.bind_async_client(client)
+                    try:
+                        await self._trade_async(signals, all_data, phases)
+                    finally:
+                        self.position_manager.bind_async_client(None)
+            return self._summary(phases)
+        except Exception as e:
+            logger.error(f"❌ {self.log_prefix}İşlem hatası: {str(e)}", exc_info=True)
+            return self._summary(phases, str(e))
+
+    async def _trade_async(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]],
+                           phases: Dict[str, float]):
+        import asyncio
+        t0 = time.perf_counter()
+        await self.position_manager.manage_positions_async(signals, all_data)
+        phases['manage_positions'] = round(time.perf_counter() - t0, 4)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            self.position_manager.open_position_async(
+                symbol=symbol,
+                direction=signal,
+                entry_price=all_data[symbol].get('entry_price', all_data[symbol]['close']),
+                atr_value=all_data[symbol]['atr'],
+                pct_atr=all_data[symbol]['pct_atr']
+            )
+            for symbol, signal in signals.items()
+            if signal and all_data.get(symbol)
+        ))
+        phases['execute_trades'] = round(time.perf_counter() - t0, 4)
+        if self.ledger is not None:  # defter senkron oturumla (tur başına iki okuma)
+            await asyncio.to_thread(self.sync_ledger, phases)
+
+    def _execute_trades(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]]):
+        """Sinyallere göre işlem aç"""
+        for symbol, signal in signals.items():
+            if not signal or not all_data.get(symbol):
+                continue
+
+            data = all_data[symbol]
+
+            self.position_manager.open_position(
+                symbol=symbol,
+                direction=signal,
+                entry_price=data.get('entry_price', data['close']),
+                atr_value=data['atr'],
+                pct_atr=data['pct_atr']
+            )
+
+
+def create_account(name: str, entry: Dict[str, Any], symbols: List[str], testnet: bool = False) -> Account:
+    """
+    ACCOUNT_SETTINGS kaydından alt hesap. entry: {'settings', 'symbols'} ve opsiyonel olarak
+    'session' / 'async_session' / 'state_store' (simulator); semboller botun sembollerine kırpılır
+    """
+    from exchange import BybitFuturesAPI
+    from state_store import create_state_store
+
+    if not ACCOUNT_NAME.match(name) or name == PRIMARY_ACCOUNT:
+        raise ValueError(f"Geçersiz hesap adı: {name!r} (harf/rakam/_; '{PRIMARY_ACCOUNT}' ana hesaba ayrılmış)")
+    api_key = os.getenv(f"BYBIT_API_KEY_{name.upper()}")
+    api_secret = os.getenv(f"BYBIT_API_SECRET_{name.upper()}")
+    if entry.get('session') is None and not (api_key and api_secret):
+        raise ValueError(f"{name} hesabı için BYBIT_API_KEY_{name.upper()} / BYBIT_API_SECRET_{name.upper()} tanımlı değil")
+
+    session = BybitFuturesAPI(testnet=testnet, session=entry.get('session'), api_key=api_key, api_secret=api_secret).session
+    resilience = None
+    if RESILIENCE_ENABLED:
+        from resilience import ResilienceState, ResilientSession
+        resilience = ResilienceState()
+        session = ResilientSession(session, resilience)
+
+    wanted = entry.get('symbols') or symbols
+    ignored = [symbol for symbol in wanted if symbol not in symbols]
+    if ignored:
+        logger.warning(f"[{name}] botun izlemediği semboller atlandı: {', '.join(ignored)}")
+
+    return Account(
+        name,
+        session,
+        [symbol for symbol in wanted if symbol in symbols],
+        symbol_settings=entry.get('settings', {}),
+        state_store=entry.get('state_store') or create_state_store(account=name),
+        api_key=api_key,
+        api_secret=api_secret,
+        async_session=entry.get('async_session'),
+        resilience=resilience
+    )
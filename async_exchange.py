@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import aiohttp
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from config import BYBIT_API_KEY, BYBIT_API_SECRET
+from exchange import KLINE_LIMIT, klines_to_arrays, klines_to_dataframe, parse_tickers
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAINNET_URL = "https://api.bybit.com"
+TESTNET_URL = "https://api-testnet.bybit.com"
+
+# pybit ile aynı tip dönüşümleri (POST gövdesinde string beklenen alanlar)
+STRING_PARAMS = ['qty', 'price', 'triggerPrice', 'takeProfit', 'stopLoss']
+
+
+class AsyncBybitHTTP:
+    """
+    pybit HTTP oturumunun bot tarafından kullanılan metotlarının asyncio karşılığı.
+    Tüm istekler tek bir aiohttp oturumu (ortak bağlantı havuzu) üzerinden gider,
+    imzalama pybit ile aynıdır (HMAC-SHA256, X-BAPI-* başlıkları).
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = BYBIT_API_KEY,
+        api_secret: Optional[str] = BYBIT_API_SECRET,
+        testnet: bool = False,
+        recv_window: int = 5000,
+        timeout: float = 10.0,
+        max_connections: int = 20
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.endpoint = TESTNET_URL if testnet else MAINNET_URL
+        self.recv_window = recv_window
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Bağlantı havuzu ilk istekte (çalışan event loop içinde) oluşturulur"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Content-Type': 'application/json', 'Accept': 'application/json'}
+            )
+        return self._session
+
+    @staticmethod
+    def _prepare_payload(method: str, params: Dict[str, Any]) -> str:
+        params = {k: v for k, v in params.items() if v is not None}
+        for key, value in params.items():
+            if isinstance(value, float) and value == int(value):
+                params[key] = int(value)
+
+        if method == "GET":
+            return "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+        for key in STRING_PARAMS:
+            if key in params and not isinstance(params[key], str):
+                params[key] = str(params[key])
+        return json.dumps(params)
+
+    def _auth_headers(self, payload: str) -> Dict[str, str]:
+        if self.api_key is None or self.api_secret is None:
+            raise PermissionError("Authenticated endpoints require keys.")
+
+        timestamp = str(int(time.time() * 1000))
+        param_str = timestamp + self.api_key + str(self.recv_window) + payload
+        signature = hmac.new(
+            self.api_secret.encode('utf-8'), param_str.encode('utf-8'), hashlib.sha256
+        ).hexdigest()
+
+        return {
+            'X-BAPI-API-KEY': self.api_key,
+            'X-BAPI-SIGN': signature,
+            'X-BAPI-SIGN-TYPE': '2',
+            'X-BAPI-TIMESTAMP': timestamp,
+            'X-BAPI-RECV-WINDOW': str(self.recv_window),
+        }
+
+    async def _request(self, method: str, path: str, params: Dict[str, Any], auth: bool = True) -> Dict:
+        payload = self._prepare_payload(method, params)
+        headers = self._auth_headers(payload) if auth else {}
+        session = self._get_session()
+        url = f"{self.endpoint}{path}"
+
+        try:
+            if method == "GET":
+                request = session.get(f"{url}?{payload}" if payload else url, headers=headers)
+            else:
+                request = session.post(url, data=payload, headers=headers)
+
+            async with request as response:
+                if response.status != 200:
+                    raise FailedRequestError(
+                        request=f"{method} {path}: {payload}",
+                        message=await response.text(),
+                        status_code=response.status,
+                        time=datetime.now(timezone.utc).strftime("%H:%M:%S"),
+                        resp_headers=dict(response.headers)
+                    )
+                data = await response.json(content_type=None)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise FailedRequestError(
+                request=f"{method} {path}: {payload}",
+                message=str(e) or type(e).__name__,
+                status_code=0,
+                time=datetime.now(timezone.utc).strftime("%H:%M:%S"),
+                resp_headers=None
+            )
+
+        # pybit ile aynı davranış: retCode != 0 ise InvalidRequestError
+        if data.get('retCode'):
+            raise InvalidRequestError(
+                request=f"{method} {path}: {payload}",
+                message=data.get('retMsg', ''),
+                status_code=data['retCode'],
+                time=datetime.now(timezone.utc).strftime("%H:%M:%S"),
+                resp_headers=None
+            )
+        return data
+
+    # --- Market ---
+    async def get_kline(self, **kwargs) -> Dict:
+        return await self._request("GET", "/v5/market/kline", kwargs, auth=False)
+
+    async def get_tickers(self, **kwargs) -> Dict:
+        return await self._request("GET", "/v5/market/tickers", kwargs, auth=False)
+
+    # --- Position ---
+    async def set_leverage(self, **kwargs) -> Dict:
+        return await self._request("POST", "/v5/position/set-leverage", kwargs)
+
+    async def get_positions(self, **kwargs) -> Dict:
+        return await self._request("GET", "/v5/position/list", kwargs)
+
+    # --- Trade ---
+    async def place_order(self, **kwargs) -> Dict:
+        return await self._request("POST", "/v5/order/create", kwargs)
+
+    async def cancel_order(self, **kwargs) -> Dict:
+        return await self._request("POST", "/v5/order/cancel", kwargs)
+
+    async def get_open_orders(self, **kwargs) -> Dict:
+        return await self._request("GET", "/v5/order/realtime", kwargs)
+
+    async def get_order_history(self, **kwargs) -> Dict:
+        return await self._request("GET", "/v5/order/history", kwargs)
+
+
+class AsyncBybitFuturesAPI:
+    """BybitFuturesAPI'nin asyncio karşılığı (semboller arası eşzamanlı kline çekimi)"""
+
+    def __init__(self, session: AsyncBybitHTTP):
+        self.session = session
+
+    async def get_ohlcv(
+        self,
+        symbol: str = 'SOLUSDT',
+        interval: str = '15',
+        limit: int = 300,
+        convert_to_float: bool = True,
+        as_arrays: bool = False
+    ) -> Optional['pd.DataFrame']:
+        try:
+            response = await self.session.get_kline(
+                category="linear",
+                symbol=symbol,
+                interval=interval,
+                limit=limit
+            )
+            if as_arrays:
+                return klines_to_arrays(response['result']['list'])
+            return klines_to_dataframe(response['result']['list'], convert_to_float)
+
+        except Exception as e:
+            logger.error("Veri çekme hatası (Sembol: %s): %s", symbol, str(e))
+            return None
+
+    async def get_tickers(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """BybitFuturesAPI.get_tickers ile aynı (tek istek, tüm semboller)"""
+        try:
+            response = await self.session.get_tickers(category="linear")
+            return parse_tickers(response['result']['list'], symbols)
+        except Exception as e:
+            logger.error("Ticker çekme hatası: %s", str(e))
+            return {}
+
+    async def get_multiple_ohlcv(
+        self,
+        symbols: List[str],
+        interval: str = '15',
+        limit: int = KLINE_LIMIT,
+        as_arrays: bool = False
+    ) -> Dict[str, Optional['pd.DataFrame']]:
+        """Tüm semboller eşzamanlı çekilir; toplam süre en yavaş isteğe yakındır"""
+        frames = await asyncio.gather(*(self.get_ohlcv(sym, interval, limit, as_arrays=as_arrays) for sym in symbols))
+        return dict(zip(symbols, frames))
@@ -0,0 +1,15 @@
+"""
+Bar kapanış zamanlaması (epoch s). main (commit turu, karar gecikmesi) ve daemon (tur planlaması)
+ortak kullanır; bağımlılığı yoktur, cold start'a maliyet eklemez.
+"""
+
+
+def next_bar_close(now: float, bar_seconds: float, delay: float = 0.0) -> float:
+    """now'dan sonraki ilk (bar kapanışı + delay) anı"""
+    boundary = (int((now - delay) // bar_seconds) + 1) * bar_seconds
+    return boundary + delay
+
+
+def since_bar_close(now: float, bar_seconds: float) -> float:
+    """Son bar kapanışından bu yana geçen süre (ms hassasiyetinde)"""
+    return round(now - (now // bar_seconds) * bar_seconds, 3)
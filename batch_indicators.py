@@ -0,0 +1,68 @@
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from np_indicators import (OHLCV, _shift, _ffill, rolling_mean, rolling_max, rolling_min, ewm_mean,
+                           calculate_atr as batch_atr, calculate_rsi as batch_rsi, calculate_z as batch_z,
+                           atr_zigzag as batch_zigzag, calculate_nw_envelope, compute_columns,
+                           DONCHIAN_COLUMNS, SIGNAL_COLUMNS, COLUMN_ORDER)
+
+# Toplu (symbols x bars) indikatör motoru: calculate_indicators'ın DataFrame girişli 2-D karşılığı.
+# Kernel'ler np_indicators'tadır (pandas'sız çekirdek); buradaki adaptörler DataFrame alır/döndürür.
+# Sonuçlar calculate_indicators ile birebir aynıdır; tek istisna nw/nw_upper/nw_lower
+# (tek matris çarpımı; BLAS toplama sırası nedeniyle son basamakta yuvarlama farkı olabilir).
+
+
+def batch_nw_envelope(source, bandwidth=8.0, multiplier=3.0, window_size=50):
+    """Tek matris çarpımlı NW (np_indicators.calculate_nw_envelope, exact=False)"""
+    return calculate_nw_envelope(source, bandwidth, multiplier, window_size, exact=False)
+
+
+def _compute_stacked(o, h, l, c, symbols: List[str], columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """(S x N) OHLC dizilerinden calculate_indicators kolonları (NW hızlı matris çarpımıyla)"""
+    return compute_columns(o, h, l, c, symbols, columns, exact=False)
+
+
+def _aligned_groups(frames: Dict[str, pd.DataFrame]) -> List[List[str]]:
+    """Aynı zaman indeksine sahip sembolleri gruplar (her grup tek 2-D blok olarak hesaplanır)"""
+    groups: List[List[str]] = []
+    for symbol, df in frames.items():
+        for group in groups:
+            if frames[group[0]].index.equals(df.index):
+                group.append(symbol)
+                break
+        else:
+            groups.append([symbol])
+    return groups
+
+
+def _iter_batches(frames: Dict[str, pd.DataFrame], columns: Optional[List[str]] = None):
+    for symbols in _aligned_groups(frames):
+        stacked = {col: np.vstack([frames[s][col].to_numpy(dtype=float) for s in symbols]) for col in OHLCV}
+        cols = _compute_stacked(stacked['open'], stacked['high'], stacked['low'], stacked['close'], symbols, columns)
+        yield symbols, stacked, cols
+
+
+def calculate_indicators_batch(frames: Dict[str, pd.DataFrame], columns: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    """Her sembol için calculate_indicators(df, symbol, columns) ile aynı DataFrame'i döndürür"""
+    results = {}
+    for symbols, _, cols in _iter_batches(frames, columns):
+        for row, symbol in enumerate(symbols):
+            df = frames[symbol].copy()
+            for name, arr in cols.items():
+                df[name] = arr[row]
+            results[symbol] = df
+    return results
+
+
+def latest_rows_batch(frames: Dict[str, pd.DataFrame], columns: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Her sembol için calculate_indicators(df, symbol, columns).iloc[-1].to_dict() karşılığı (DataFrame kurmadan)"""
+    results = {}
+    for symbols, stacked, cols in _iter_batches(frames, columns):
+        for row, symbol in enumerate(symbols):
+            record = {col: frames[symbol][col].iloc[-1].item() for col in frames[symbol].columns}
+            for name, arr in cols.items():
+                value = arr[row, -1]
+                record[name] = value.item() if hasattr(value, 'item') else value
+            results[symbol] = record
+    return results
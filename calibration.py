@@ -0,0 +1,377 @@
+"""
+Akış kantil kalibrasyonu (opsiyonel, CALIBRATION_DIR): sembol başına pct_atr kantilleri P² taslaklarıyla
+(Jain & Chlamtac) her turda sadece yeni kapanmış barlardan güncellenir; atr_ranges / Z_RANGES çevrimdışı
+tam geçmiş taraması olmadan güncel tutulur.
+
+- pct_atr = ATR(14) / close * 100 (np_indicators.calculate_atr; hizalı semboller tek 2-D blok); her sembolün
+  son beslenen bar zamanı tutulur, tur başına sadece bundan yeni ve kapanmış barlar taslağa girer. İlk görülen
+  sembolde pencerenin ATR ısınma barları (ATR_WARMUP) atlanır, kalanlar tohum olarak beslenir
+- Taslak başına 5 işaretçi x kantil, tüm semboller tek dizi (S, Q, 5) üzerinde vektörel güncellenir
+- Güncellik için iki kuşak: biri CALIBRATION_WINDOW_BARS / 2 bar geriden başlar; bir kuşak pencere dolunca
+  sıfırlanır, yayın her zaman daha çok bar görmüş kuşaktan (son ~1/2-1 pencere)
+- Taslak durumu <CALIBRATION_DIR>/sketch.npz (yeniden başlatmada kalınan yerden devam, tarama yok)
+- Parametre deposu: <CALIBRATION_DIR>/params.json (güncel versiyon) + params-v<n>.json (değişmez arşiv);
+  versiyon kontrollü atomik yazma (JsonStateStore gibi), çakışmada StateConflictError
+- Yeni versiyon config.atr_ranges / config.Z_RANGES üzerine yerinde uygulanır: indicators, np_indicators,
+  indikatör önbelleği (parametre parmak izi) ve indikatör havuzu aynı dict nesnelerini okur.
+  CALIBRATION_APPLY=false ise yayınlanır ama uygulanmaz (gölge mod)
+- Yayın: CALIBRATION_PUBLISH_BARS yeni barda bir; CALIBRATION_MIN_BARS görmüş ve aralık uçlarından biri
+  CALIBRATION_MIN_CHANGE göreli değişmiş semboller (değişen yoksa yeni versiyon yok)
+"""
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (atr_ranges, Z_RANGES, CALIBRATION_DIR, CALIBRATION_APPLY, CALIBRATION_ATR_QUANTILES,
+                    CALIBRATION_Z_QUANTILES, CALIBRATION_WINDOW_BARS, CALIBRATION_MIN_BARS,
+                    CALIBRATION_PUBLISH_BARS, CALIBRATION_MIN_CHANGE)
+from np_indicators import bar_times_ms, calculate_atr, n_bars
+from state_store import StateConflictError
+
+logger = logging.getLogger(__name__)
+
+ATR_WINDOW = 14
+ATR_WARMUP = 5 * ATR_WINDOW  # ewm(alpha=1/14) başlangıç etkisi bu kadar bardan sonra < %1
+MARKERS = 5
+
+
+class QuantileSketch:
+    """
+    Satır (sembol) başına Q kantil için P² işaretçileri. İlk 5 gözlem tamponda tutulur, sonra işaretçiler
+    sıralı tampondan kurulur; her gözlemde işaretçi konumları kaydırılır ve orta işaretçiler parabolik
+    (olmazsa doğrusal) formülle ayarlanır. quantiles() orta işaretçinin yüksekliği
+    """
+
+    def __init__(self, quantiles: Tuple[float, ...], rows: int = 0):
+        p = np.asarray(quantiles, dtype=float)[:, None]
+        self.increments = np.hstack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])  # (Q, 5)
+        self.heights = np.zeros((0, len(quantiles), MARKERS))
+        self.positions = np.zeros((0, len(quantiles), MARKERS))
+        self.desired = np.zeros((0, len(quantiles), MARKERS))
+        self.buffer = np.zeros((0, MARKERS))
+        self.count = np.zeros(0, dtype=np.int64)
+        self.grow(rows)
+
+    def grow(self, rows: int) -> None:
+        extra = rows - len(self.count)
+        if extra <= 0:
+            return
+        q = self.increments.shape[0]
+        self.heights = np.concatenate([self.heights, np.zeros((extra, q, MARKERS))])
+        self.positions = np.concatenate([self.positions, np.zeros((extra, q, MARKERS))])
+        self.desired = np.concatenate([self.desired, np.zeros((extra, q, MARKERS))])
+        self.buffer = np.concatenate([self.buffer, np.zeros((extra, MARKERS))])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+
+    def reset(self, rows: np.ndarray) -> None:
+        self.count[rows] = 0
+
+    def update(self, x: np.ndarray, active: np.ndarray) -> None:
+        """Satır başına en fazla bir gözlem: x (S,), active (S,) bool"""
+        filling = active & (self.count < MARKERS)
+        if filling.any():
+            rows = np.flatnonzero(filling)
+            self.buffer[rows, self.count[rows]] = x[rows]
+            ready = rows[self.count[rows] == MARKERS - 1]
+            if len(ready):
+                values = np.sort(self.buffer[ready], axis=1)
+                self.heights[ready] = values[:, None, :]
+                self.positions[ready] = np.arange(1, MARKERS + 1, dtype=float)
+                self.desired[ready] = 1 + (MARKERS - 1) * self.increments
+        tracking = active & (self.count >= MARKERS)
+        self.count[active] += 1
+        if not tracking.any():
+            return
+
+        rows = np.flatnonzero(tracking)
+        v = x[rows][:, None]  # (R, 1)
+        q = self.heights[rows]
+        n = self.positions[rows]
+        q[..., 0] = np.minimum(q[..., 0], v)
+        q[..., 4] = np.maximum(q[..., 4], v)
+        cell = np.sum(v[..., None] >= q[..., 1:4], axis=-1)  # gözlemin düştüğü hücre 0..3
+        n += np.arange(MARKERS) > cell[..., None]
+        desired = self.desired[rows] + self.increments
+
+        for i in (1, 2, 3):
+            d = desired[..., i] - n[..., i]
+            up = n[..., i + 1] - n[..., i]
+            down = n[..., i - 1] - n[..., i]
+            move = ((d >= 1) & (up > 1)) | ((d <= -1) & (down < -1))
+            if not move.any():
+                continue
+            s = np.sign(d)
+            qi, qlo, qhi = q[..., i], q[..., i - 1], q[..., i + 1]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                parabolic = qi + s / (n[..., i + 1] - n[..., i - 1]) * (
+                    (n[..., i] - n[..., i - 1] + s) * (qhi - qi) / up
+                    + (n[..., i + 1] - n[..., i] - s) * (qi - qlo) / -down
+                )
+                neighbour = np.where(s > 0, qhi, qlo)
+                linear = qi + s * (neighbour - qi) / np.where(s > 0, up, down)
+            adjusted = np.where((qlo < parabolic) & (parabolic < qhi), parabolic, linear)
+            q[..., i] = np.where(move, adjusted, qi)
+            n[..., i] = np.where(move, n[..., i] + s, n[..., i])
+
+        self.heights[rows] = q
+        self.positions[rows] = n
+        self.desired[rows] = desired
+
+    def quantiles(self) -> np.ndarray:
+        """(S, Q) tahminler; 5 gözlemden az satırlarda NaN"""
+        out = self.heights[..., 2].copy()
+        out[self.count < MARKERS] = np.nan
+        return out
+
+    def arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {f'{prefix}_heights': self.heights, f'{prefix}_positions': self.positions,
+                f'{prefix}_desired': self.desired, f'{prefix}_buffer': self.buffer, f'{prefix}_count': self.count}
+
+    def restore(self, data, prefix: str) -> None:
+        self.heights = data[f'{prefix}_heights']
+        self.positions = data[f'{prefix}_positions']
+        self.desired = data[f'{prefix}_desired']
+        self.buffer = data[f'{prefix}_buffer']
+        self.count = data[f'{prefix}_count']
+
+
+class ParamStore:
+    """Versiyonlu atr_ranges / Z_RANGES deposu: params.json + params-v<n>.json arşivi"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, 'params.json')
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'version': 0, 'atr_ranges': {}, 'z_ranges': {}}
+
+    def publish(self, atr: Dict[str, List[float]], z: Dict[str, List[float]], bars: Dict[str, int],
+                expected_version: int) -> Dict[str, Any]:
+        """Önceki versiyonun üzerine değişen semboller yazılır; yeni doküman döner"""
+        current = self.load()
+        if int(current.get('version', 0)) != expected_version:
+            raise StateConflictError(f"{self.path}: beklenen v{expected_version}, mevcut v{current.get('version')}")
+
+        doc = {
+            'version': expected_version + 1,
+            'updated_at': round(time.time(), 3),
+            'atr_ranges': {**current.get('atr_ranges', {}), **atr},
+            'z_ranges': {**current.get('z_ranges', {}), **z},
+            'bars': {**current.get('bars', {}), **bars},
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        archive = os.path.join(self.directory, f"params-v{doc['version']}.json")
+        for target in (archive, self.path):
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(doc, f, sort_keys=True)
+            os.replace(tmp_path, target)
+        return doc
+
+
+def _pct_atr(raw_data: Dict[str, Any], symbols: List[str]) -> Dict[str, np.ndarray]:
+    """Sembol başına pct_atr dizisi; aynı bar zamanlarına sahip semboller tek blokta hesaplanır"""
+    groups: List[Tuple[np.ndarray, List[str]]] = []
+    for symbol in symbols:
+        times = bar_times_ms(raw_data[symbol])
+        for group_times, group in groups:
+            if np.array_equal(group_times, times):
+                group.append(symbol)
+                break
+        else:
+            groups.append((times, [symbol]))
+
+    out = {}
+    for _, group in groups:
+        h, l, c = (np.vstack([np.asarray(raw_data[symbol][col], dtype=float) for symbol in group])
+                   for col in ('high', 'low', 'close'))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pct = calculate_atr(h, l, c, ATR_WINDOW) / c * 100
+        out.update(zip(group, pct))
+    return out
+
+
+class Calibrator:
+    def __init__(self, directory: str = CALIBRATION_DIR, interval: str = '15', apply: bool = CALIBRATION_APPLY,
+                 window_bars: int = CALIBRATION_WINDOW_BARS, min_bars: int = CALIBRATION_MIN_BARS,
+                 publish_bars: int = CALIBRATION_PUBLISH_BARS, min_change: float = CALIBRATION_MIN_CHANGE):
+        """Depodaki güncel versiyon açılışta uygulanır, taslak durumu diskten yüklenir"""
+        self.directory = directory
+        self.interval_ms = int(interval) * 60_000
+        self.apply = apply
+        self.window_bars = window_bars
+        self.min_bars = min_bars
+        self.publish_bars = publish_bars
+        self.min_change = min_change
+        self.quantiles = tuple(CALIBRATION_ATR_QUANTILES) + tuple(CALIBRATION_Z_QUANTILES)
+        self.sketch_path = os.path.join(directory, 'sketch.npz')
+        self.store = ParamStore(directory)
+
+        self.symbols: Dict[str, int] = {}
+        self.last_fed = np.zeros(0, dtype=np.int64)
+        self.generations = (QuantileSketch(self.quantiles), QuantileSketch(self.quantiles))
+        self.since_publish = 0
+        self.version = 0
+        self.last_update: Dict[str, Any] = {}
+        self._load_sketch()
+        self._apply(self.store.load())
+
+    # --- taslak durumu ---
+    def _load_sketch(self) -> None:
+        try:
+            with np.load(self.sketch_path, allow_pickle=False) as data:
+                if tuple(data['quantiles'].tolist()) != self.quantiles:
+                    logger.warning("Kalibrasyon kantilleri değişmiş, taslaklar sıfırdan başlıyor")
+                    return
+                for k, sketch in enumerate(self.generations):
+                    sketch.restore(data, f'g{k}')
+                self.symbols = {str(symbol): row for row, symbol in enumerate(data['symbols'].tolist())}
+                self.last_fed = data['last_fed']
+                self.since_publish = int(data['since_publish'])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Kalibrasyon taslağı okunamadı, sıfırdan başlanıyor: {str(e)}")
+            self.symbols = {}
+            self.last_fed = np.zeros(0, dtype=np.int64)
+            self.generations = (QuantileSketch(self.quantiles), QuantileSketch(self.quantiles))
+            return
+        logger.info(f"📐 Kalibrasyon taslağı yüklendi | Sembol: {len(self.symbols)}")
+
+    def _save_sketch(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.sketch_path}.{os.getpid()}.tmp.npz"
+        arrays = {'quantiles': np.asarray(self.quantiles), 'symbols': np.asarray(list(self.symbols), dtype=str),
+                  'last_fed': self.last_fed, 'since_publish': np.asarray(self.since_publish)}
+        for k, sketch in enumerate(self.generations):
+            arrays.update(sketch.arrays(f'g{k}'))
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self.sketch_path)
+
+    def _rows(self, symbols: List[str]) -> np.ndarray:
+        for symbol in symbols:
+            if symbol not in self.symbols:
+                self.symbols[symbol] = len(self.symbols)
+        size = len(self.symbols)
+        if len(self.last_fed) < size:
+            self.last_fed = np.concatenate([self.last_fed, np.full(size - len(self.last_fed), -1, dtype=np.int64)])
+            for sketch in self.generations:
+                sketch.grow(size)
+        return np.array([self.symbols[symbol] for symbol in symbols], dtype=np.int64)
+
+    # --- besleme ---
+    def _feed(self, raw_data: Dict[str, Any], now_ms: int) -> int:
+        """Yeni kapanmış barların pct_atr'si iki kuşağa; beslenen en fazla bar sayısı (sembol başına) döner"""
+        symbols = [symbol for symbol, data in raw_data.items() if n_bars(data) > ATR_WARMUP]
+        if not symbols:
+            return 0
+        rows = self._rows(symbols)
+        pct = _pct_atr(raw_data, symbols)
+
+        columns = []
+        for symbol, row in zip(symbols, rows):
+            times = bar_times_ms(raw_data[symbol])
+            new = (times + self.interval_ms <= now_ms) & (times > self.last_fed[row])
+            new[:ATR_WARMUP] = False
+            values = pct[symbol][new]
+            values = values[np.isfinite(values)]
+            if new.any():
+                self.last_fed[row] = times[new][-1]
+            columns.append(values)
+        fed = max(len(values) for values in columns)
+        if fed == 0:
+            return 0
+
+        matrix = np.full((len(rows), fed), np.nan)
+        for k, values in enumerate(columns):
+            matrix[k, :len(values)] = values
+        x = np.full(len(self.symbols), np.nan)
+        first, second = self.generations
+        half = self.window_bars // 2
+        for step in range(fed):
+            x[rows] = matrix[:, step]
+            observed = np.isfinite(x)
+            first.update(x, observed & ((first.count > 0) | (second.count >= half) | (second.count == 0)))
+            second.update(x, observed & ((second.count > 0) | (first.count >= half)))
+            for sketch in self.generations:
+                full = np.flatnonzero(sketch.count >= self.window_bars)
+                if len(full):
+                    sketch.reset(full)
+            x[rows] = np.nan
+        self.since_publish += fed
+        return fed
+
+    # --- yayın / uygulama ---
+    def _estimates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Satır başına daha çok bar görmüş kuşağın kantilleri (S, Q) ve bar sayısı (S,)"""
+        first, second = self.generations
+        older = first.count >= second.count
+        estimates = np.where(older[:, None], first.quantiles(), second.quantiles())
+        return estimates, np.where(older, first.count, second.count)
+
+    def _changed(self, current: Optional[Tuple[float, float]], new: Tuple[float, float]) -> bool:
+        if current is None:
+            return True
+        return any(abs(b - a) >= self.min_change * abs(a) for a, b in zip(current, new))
+
+    def _publish(self) -> bool:
+        estimates, counts = self._estimates()
+        atr, z, bars = {}, {}, {}
+        k = len(CALIBRATION_ATR_QUANTILES)
+        for symbol, row in self.symbols.items():
+            if counts[row] < self.min_bars or not np.isfinite(estimates[row]).all():
+                continue
+            atr_range = tuple(round(float(v), 3) for v in estimates[row, :k])
+            z_range = tuple(round(float(v), 3) for v in estimates[row, k:])
+            if self._changed(atr_ranges.get(symbol), atr_range) or self._changed(Z_RANGES.get(symbol), z_range):
+                atr[symbol], z[symbol], bars[symbol] = list(atr_range), list(z_range), int(counts[row])
+        self.since_publish = 0
+        if not atr:
+            return False
+        try:
+            doc = self.store.publish(atr, z, bars, self.version)
+        except StateConflictError as e:
+            logger.warning(f"Kalibrasyon yayını atlandı (başka instance yayınlamış): {str(e)}")
+            self._apply(self.store.load())
+            return False
+        logger.info(f"📐 Kalibrasyon v{doc['version']} yayınlandı | Değişen: {len(atr)} sembol")
+        self._apply(doc)
+        return True
+
+    def _apply(self, doc: Dict[str, Any]) -> None:
+        version = int(doc.get('version', 0))
+        if version == self.version:
+            return
+        self.version = version
+        if not self.apply:
+            return
+        atr_ranges.update({symbol: tuple(rng) for symbol, rng in doc.get('atr_ranges', {}).items()})
+        Z_RANGES.update({symbol: tuple(rng) for symbol, rng in doc.get('z_ranges', {}).items()})
+        logger.info(f"📐 Kalibrasyon v{version} uygulandı | atr: {len(doc.get('atr_ranges', {}))} "
+                    f"z: {len(doc.get('z_ranges', {}))} sembol")
+
+    def update(self, raw_data: Dict[str, Any], now_ms: int) -> Dict[str, Any]:
+        """
+        Tur sonu: başka instance'ın yayınladığı versiyon uygulanır, yeni kapanmış barlar beslenir,
+        zamanı geldiyse yayınlanır. Taslak durumu besleme olduysa diske yazılır
+        """
+        self._apply(self.store.load())
+        fed = self._feed({symbol: data for symbol, data in raw_data.items() if data is not None}, now_ms)
+        published = self.since_publish >= self.publish_bars and self._publish()
+        if fed:
+            self._save_sketch()
+        self.last_update = {'version': self.version, 'fed_bars': fed, 'published': published}
+        return self.last_update
+
+    def snapshot(self) -> Dict[str, Any]:
+        _, counts = self._estimates()
+        return {**self.last_update, 'version': self.version, 'symbols': len(self.symbols),
+                'min_bars_seen': int(counts.min()) if len(counts) else 0}
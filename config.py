@@ -73,5 +73,104 @@ SYMBOL_SETTINGS = {
     'DOGEUSDT': {'risk': 20.0, 'leverage': 25}, # '1000PEPEUSDT': {'risk': 40.0, 'leverage': 20}
 }
 
+# Çoklu hesap: piyasa verisi / indikatör / sinyal turda bir kez hesaplanır, her alt hesapta ayrıca işlem yapılır
+# {hesap: {'settings': SYMBOL_SETTINGS biçiminde risk/kaldıraç, 'symbols': [...] (ops., varsayılan SYMBOLS)}}
+# API anahtarları ortamdan: BYBIT_API_KEY_<HESAP> / BYBIT_API_SECRET_<HESAP>; boş: sadece ana hesap
+ACCOUNT_SETTINGS = {
+    # 'sub1': {'settings': {'BTCUSDT': {'risk': 10.0, 'leverage': 10}}, 'symbols': ['BTCUSDT', 'ETHUSDT']},
+}
+
 # Trading Mode
 POSITION_MODE = "Hedge"  # default : OneWay (Hedge mode long/short)
+
+# Execution Mode
+ASYNC_EXECUTION = os.getenv("ASYNC_EXECUTION", "false").lower() == "true"  # run_once_async (aiohttp)
+BATCH_INDICATORS = os.getenv("BATCH_INDICATORS", "true").lower() == "true"  # tüm semboller tek 2-D blokta
+PRUNE_INDICATORS = os.getenv("PRUNE_INDICATORS", "true").lower() == "true"  # sadece stratejilerin istediği kolonlar
+NUMPY_CORE = os.getenv("NUMPY_CORE", "true").lower() == "true"  # canlı yol KlineArrays + np_indicators (pandas yüklenmez)
+
+# Position State Store (json | sqlite | gcs | firestore | none); varsayılan kapalı (her turda borsadan keşif)
+# json/sqlite instance'ın yerel diskindedir (/tmp): Cloud Functions'ta her instance ayrı dosya görür ve
+# soğuk başlangıçta kaybolur, sadece tek süreçli kurulumlar (daemon, yerel) içindir. Production: gcs / firestore
+STATE_STORE = os.getenv("STATE_STORE", "none")
+STATE_STORE_PATH = os.getenv("STATE_STORE_PATH", "/tmp/algobot/positions.json")  # json/sqlite
+STATE_BUCKET = os.getenv("STATE_BUCKET", "")  # gcs
+STATE_BLOB = os.getenv("STATE_BLOB", "algobot/positions.json")
+STATE_FIRESTORE_COLLECTION = os.getenv("STATE_FIRESTORE_COLLECTION", "algobot")  # firestore
+STATE_FIRESTORE_DOCUMENT = os.getenv("STATE_FIRESTORE_DOCUMENT", "positions")
+
+# Shared Kline Store (memory-mapped ring buffer; boş = kapalı)
+KLINE_STORE_DIR = os.getenv("KLINE_STORE_DIR", "")  # örn. /tmp/algobot/klines
+KLINE_STORE_CAPACITY = int(os.getenv("KLINE_STORE_CAPACITY", "2000"))  # sembol başına bar (okunan pencerenin birkaç katı)
+
+# Closed-Bar Mode: oluşan mum atılır, son kapanmış bar değişmediyse indikatör/sinyal atlanır
+CLOSED_BAR_MODE = os.getenv("CLOSED_BAR_MODE", "false").lower() == "true"
+
+# Indicator Cache (aynı bar + parametre için son satır tekrar hesaplanmaz)
+INDICATOR_CACHE_SIZE = int(os.getenv("INDICATOR_CACHE_SIZE", "0"))  # süreç içi LRU kayıt sayısı (0 = kapalı; ne zaman isabet eder: indicator_cache.py)
+INDICATOR_CACHE_DIR = os.getenv("INDICATOR_CACHE_DIR", "")  # disk katmanı (boş = kapalı)
+INDICATOR_CACHE_MAX_MB = float(os.getenv("INDICATOR_CACHE_MAX_MB", "256"))
+
+# Çok çekirdekli indikatör hesaplama (NUMPY_CORE): semboller parçalar halinde süreç havuzunda hesaplanır
+INDICATOR_WORKERS = int(os.getenv("INDICATOR_WORKERS", "0"))  # işçi süreç sayısı (0 = kapalı, seri)
+INDICATOR_POOL_MIN_SYMBOLS = int(os.getenv("INDICATOR_POOL_MIN_SYMBOLS", "64"))  # altında seri hesaplanır
+INDICATOR_POOL_CHUNK = int(os.getenv("INDICATOR_POOL_CHUNK", "0"))  # görev başına sembol (0 = sembol / işçi)
+
+# Profiling: trading_bot_trigger '?profile=cpu,alloc&top=20' sadece bu açıkken çalışır
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+# Ticker Pricing: sinyal olan turda tek get_tickers çağrısı; giriş/TP/SL kline close yerine bid/ask'tan
+TICKER_PRICING = os.getenv("TICKER_PRICING", "true").lower() == "true"
+
+# Resilience: borsa çağrılarında deadline / yeniden deneme / hedge / devre kesici (resilience.py)
+RESILIENCE_ENABLED = os.getenv("RESILIENCE_ENABLED", "true").lower() == "true"
+READ_DEADLINE_S = float(os.getenv("READ_DEADLINE_S", "5"))    # okuma başına toplam süre (denemeler dahil)
+WRITE_DEADLINE_S = float(os.getenv("WRITE_DEADLINE_S", "8"))  # emir / iptal / kaldıraç
+ATTEMPT_TIMEOUT_S = float(os.getenv("ATTEMPT_TIMEOUT_S", "2"))  # tek deneme; aşılırsa deadline içinde tekrar
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))        # ilk deneme dahil
+RETRY_BACKOFF_S = float(os.getenv("RETRY_BACKOFF_S", "0.2"))  # üstel backoff tabanı (full jitter)
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"  # yavaş kline/ticker için ikinci istek
+HEDGE_MIN_DELAY_S = float(os.getenv("HEDGE_MIN_DELAY_S", "0.25"))     # hedge eşiği: max(bu, son p95)
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))            # devreyi açan art arda geçici hata
+BREAKER_COOLDOWN_S = float(os.getenv("BREAKER_COOLDOWN_S", "30"))
+
+# Cycle Journal: tur başına feature/sinyal/pozisyon/süre kaydı, bölümlenmiş parquet (journal.py; boş = kapalı)
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "")  # örn. /tmp/algobot/journal veya gcsfuse bağlama noktası
+JOURNAL_FLUSH_CYCLES = int(os.getenv("JOURNAL_FLUSH_CYCLES", "1"))  # kaç turda bir diske yazılır
+JOURNAL_COMPACT_MIN_FILES = int(os.getenv("JOURNAL_COMPACT_MIN_FILES", "8"))  # saat bölümündeki dosya eşiği
+JOURNAL_COMPACT_EVERY = int(os.getenv("JOURNAL_COMPACT_EVERY", "60"))  # kaç flush'ta bir sıkıştırma taraması (0 = kapalı)
+
+# Execution Ledger: dolum + kapanan PnL kayıtlarının artımlı senkronu, işlem başına parquet (ledger.py; boş = kapalı)
+LEDGER_DIR = os.getenv("LEDGER_DIR", "")  # hesap başına alt dizin: <LEDGER_DIR>/<hesap>/
+LEDGER_LOOKBACK_DAYS = float(os.getenv("LEDGER_LOOKBACK_DAYS", "7"))  # imleç yokken (ilk senkron) geriye çekilen süre
+LEDGER_OVERLAP_S = int(os.getenv("LEDGER_OVERLAP_S", "300"))  # geç yayınlanan kayıtlar için taranan aralığın örtüşmesi
+LEDGER_COMPACT_FILES = int(os.getenv("LEDGER_COMPACT_FILES", "32"))  # bu kadar part dosyası birikince tek dosyada birleştirilir
+
+# Kalibrasyon: pct_atr akış kantilleri (P²) ile atr_ranges / Z_RANGES güncellemesi (calibration.py; boş = kapalı)
+CALIBRATION_DIR = os.getenv("CALIBRATION_DIR", "")  # taslak durumu + versiyonlu parametre deposu
+CALIBRATION_APPLY = os.getenv("CALIBRATION_APPLY", "true").lower() == "true"  # false: yayınlanır ama uygulanmaz (gölge)
+CALIBRATION_ATR_QUANTILES = tuple(float(q) for q in os.getenv("CALIBRATION_ATR_QUANTILES", "0.20,0.95").split(','))
+CALIBRATION_Z_QUANTILES = tuple(float(q) for q in os.getenv("CALIBRATION_Z_QUANTILES", "0.25,0.75").split(','))
+CALIBRATION_WINDOW_BARS = int(os.getenv("CALIBRATION_WINDOW_BARS", "2880"))  # kantiller son ~1/2-1 pencere barından (2880 = 30 gün, 15m)
+CALIBRATION_MIN_BARS = int(os.getenv("CALIBRATION_MIN_BARS", "960"))  # taslak bu kadar bar görmeden sembol yayınlanmaz
+CALIBRATION_PUBLISH_BARS = int(os.getenv("CALIBRATION_PUBLISH_BARS", "96"))  # kaç yeni barda bir yayın denemesi
+CALIBRATION_MIN_CHANGE = float(os.getenv("CALIBRATION_MIN_CHANGE", "0.02"))  # aralık uçlarında bu göreli değişimin altı yayınlanmaz
+
+# Pre-arm: kırılım seviyesine önceden koşullu (stop) market giriş emri (entry_arming.py)
+PREARM_ENTRIES = os.getenv("PREARM_ENTRIES", "false").lower() == "true"
+PREARM_MAX_DISTANCE_ATR = float(os.getenv("PREARM_MAX_DISTANCE_ATR", "2.0"))  # fiyattan en fazla bu kadar ATR uzaktaki seviye
+PREARM_GRID = int(os.getenv("PREARM_GRID", "32"))      # yön başına aday kapanış sayısı (tek 2-D blokta)
+PREARM_REFINE = int(os.getenv("PREARM_REFINE", "5"))  # aday aralığını daraltma turu (tur başına 8 ara nokta)
+
+# Daemon: tek TradingBot'u bellekte tutan sürekli worker (daemon.py)
+DAEMON_BAR_DELAY_S = float(os.getenv("DAEMON_BAR_DELAY_S", "2"))      # bar kapanışından sonra tura başlama gecikmesi
+DAEMON_SUPERVISE_S = float(os.getenv("DAEMON_SUPERVISE_S", "5"))      # OCO / koşullu giriş denetim aralığı
+DAEMON_CHECKPOINT_S = float(os.getenv("DAEMON_CHECKPOINT_S", "300"))  # pozisyon durumu + günlük flush aralığı
+
+# İki aşamalı tetikleme: ?mode=prewarm bar kapanışından önce, normal tetik (commit) kapanışta
+PREWARM_COMMIT_BARS = int(os.getenv("PREWARM_COMMIT_BARS", "3"))      # commit turunda çekilen son bar sayısı
+PREWARM_COMMIT_DELAY_S = float(os.getenv("PREWARM_COMMIT_DELAY_S", "0.3"))  # kapanıştan sonra commit'e başlama
+PREWARM_MAX_WAIT_S = float(os.getenv("PREWARM_MAX_WAIT_S", "20"))     # kapanıştan bu kadar önce gelen tetik "erken commit"
+PREWARM_MAX_SLEEP_S = float(os.getenv("PREWARM_MAX_SLEEP_S", "2"))    # erken commit en fazla bu kadar bekler; daha erkeni 425
+FUNCTION_TIMEOUT_S = float(os.getenv("FUNCTION_TIMEOUT_S", "540"))    # deploy.yml --timeout ile aynı olmalı
+CYCLE_BUDGET_S = float(os.getenv("CYCLE_BUDGET_S", "120"))            # tek işlem turunun üst süre bütçesi
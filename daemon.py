@@ -0,0 +1,149 @@
+"""
+Sürekli çalışan worker: Cloud Function'a alternatif dağıtım (VM / Cloud Run job / systemd).
+Tek TradingBot bellekte kalır; iş mantığı trading_bot_trigger ile aynıdır (main.get_bot + main.run_cycle).
+
+- İşlem turu: her bar kapanışından DAEMON_BAR_DELAY_S sonra (borsanın kapanmış barı yayınlaması için)
+  run_cycle() (run_once / run_once_async). Pozisyonlar (order_id, current_pct_atr, oco_pair) bellekte
+  kalır; borsadan yeniden senkron sadece başlangıçta ve hatalı turdan sonra (get_bot(sync=True))
+- Durum deposu: checkpoint'ler STATE_STORE'a yazılır; STATE_STORE=none ise yeniden başlatmada bellekteki
+  durum kaybolur ve pozisyonlar borsadan tahminle yeniden kurulur (başlangıçta uyarı loglanır)
+- Denetim: turlar arasında DAEMON_SUPERVISE_S'de bir TradingBot.supervise(): TP/SL tetiklenmeleri ve dolan
+  koşullu girişler 15 dk beklemeden işlenir
+- Checkpoint: DAEMON_CHECKPOINT_S'de bir ve kapanışta pozisyon durumu + tur günlüğü diske
+- Kapanış: SIGTERM / SIGINT sürmekte olan adımı yarıda kesmez; adım bitince checkpoint alınır ve çıkılır
+Tur bar süresinden uzun sürerse kaçan kapanışlar atlanır (birikmiş turlar arka arkaya çalıştırılmaz).
+
+Kullanım:
+    python daemon.py              # ilk tur bir sonraki bar kapanışında
+    python daemon.py --run-now    # başlangıçta hemen bir tur
+"""
+import argparse
+import logging
+import signal
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from bar_clock import next_bar_close
+from config import INTERVAL, DAEMON_BAR_DELAY_S, DAEMON_SUPERVISE_S, DAEMON_CHECKPOINT_S, STATE_STORE
+
+logger = logging.getLogger(__name__)
+
+
+class TradingDaemon:
+    def __init__(
+        self,
+        get_bot: Optional[Callable] = None,
+        run_cycle: Optional[Callable] = None,
+        bar_seconds: float = int(INTERVAL) * 60,
+        bar_delay: float = DAEMON_BAR_DELAY_S,
+        supervise_interval: float = DAEMON_SUPERVISE_S,
+        checkpoint_interval: float = DAEMON_CHECKPOINT_S,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        get_bot(sync=...) / run_cycle: verilmezse main'deki Cloud Function yolları (simülatörde değiştirilebilir).
+        get_bot sync=False ile çağrıldığında pozisyonları borsadan tazelememelidir
+        """
+        if get_bot is None or run_cycle is None:
+            import main
+            get_bot = get_bot or main.get_bot
+            run_cycle = run_cycle or main.run_cycle
+        self.get_bot = get_bot
+        self.run_cycle = run_cycle
+        self.bar_seconds = bar_seconds
+        self.bar_delay = bar_delay
+        self.supervise_interval = supervise_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.clock = clock
+        self.bot = None
+        self.stats: Counter = Counter()
+        self.last_result: Optional[Dict] = None
+        self._resync = False  # hatalı turdan sonra bir sonraki tur pozisyonları borsadan tazeler
+        self._stop = threading.Event()
+
+    # --- Yaşam döngüsü ---
+    def request_stop(self, *_) -> None:
+        """Sinyal işleyicisi: döngü sürmekte olan adımı bitirip çıkar"""
+        if not self._stop.is_set():
+            logger.info("🛑 Kapanış istendi, sürmekte olan adım bitince çıkılacak")
+        self._stop.set()
+
+    def install_signal_handlers(self) -> None:
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+    def run(self, run_now: bool = False) -> Counter:
+        """Kapanış istenene kadar tur / denetim / checkpoint zamanlaması; sonunda istatistikleri döndürür"""
+        if STATE_STORE.lower() == 'none':
+            logger.warning("⚠️ STATE_STORE=none: checkpoint'ler kalıcı değil, yeniden başlatmada order_id / "
+                           "current_pct_atr / oco_pair kaybolur (json, sqlite, gcs veya firestore ayarlayın)")
+        self.bot = self.get_bot()
+        now = self.clock()
+        next_cycle = now if run_now else next_bar_close(now, self.bar_seconds, self.bar_delay)
+        next_supervise = now + self.supervise_interval
+        next_checkpoint = now + self.checkpoint_interval
+        logger.info(f"🔁 Daemon başladı | Bar: {self.bar_seconds:.0f}s | Denetim: {self.supervise_interval}s | "
+                    f"İlk tur: {max(0.0, next_cycle - now):.1f}s sonra")
+
+        try:
+            while not self._stop.is_set():
+                now = self.clock()
+                if now >= next_cycle:
+                    self._cycle()
+                    after = self.clock()
+                    next_cycle = next_bar_close(after, self.bar_seconds, self.bar_delay)
+                    skipped = int((after - now) // self.bar_seconds)
+                    if skipped:
+                        self.stats['skipped_bars'] += skipped
+                        logger.warning(f"Tur {after - now:.1f}s sürdü, {skipped} bar kapanışı atlandı")
+                    next_supervise = after + self.supervise_interval
+                elif now >= next_supervise:
+                    self._supervise()
+                    next_supervise = self.clock() + self.supervise_interval
+                if now >= next_checkpoint:
+                    self.bot.checkpoint()
+                    self.stats['checkpoints'] += 1
+                    next_checkpoint = self.clock() + self.checkpoint_interval
+                self._stop.wait(max(0.0, min(next_cycle, next_supervise, next_checkpoint) - self.clock()))
+        finally:
+            self.bot.checkpoint()
+            logger.info(f"✅ Daemon durdu | {dict(self.stats)}")
+        return self.stats
+
+    # --- Adımlar ---
+    def _cycle(self) -> None:
+        try:
+            self.bot = self.get_bot(sync=self._resync)
+            result = self.run_cycle(self.bot)
+        except Exception as e:
+            logger.error(f"❌ Daemon tur hatası: {str(e)}", exc_info=True)
+            result = {'success': False, 'error': str(e)}
+        self._resync = not result.get('success')
+        self.last_result = result
+        self.stats['cycles'] += 1
+        self.stats['failed_cycles'] += not result.get('success')
+
+    def _supervise(self) -> None:
+        try:
+            result = self.bot.supervise()
+            self.stats['supervisions'] += 1
+            self.stats['supervise_changes'] += result['changed']
+        except Exception as e:
+            self.stats['supervise_errors'] += 1
+            logger.warning(f"Denetim hatası: {str(e)}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--run-now', action='store_true', help='Başlangıçta bar kapanışını beklemeden bir tur')
+    args = parser.parse_args()
+
+    daemon = TradingDaemon()
+    daemon.install_signal_handlers()
+    daemon.run(run_now=args.run_now)
+
+
+if __name__ == '__main__':
+    main_cli()
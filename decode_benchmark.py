@@ -0,0 +1,74 @@
+"""
+Kline çözümleme benchmark'ı: exchange.klines_to_dataframe (NumPy, tek geçiş) vs
+klines_to_dataframe_pandas (önceki yol: DataFrame + .copy + astype + iloc[::-1]).
+
+Sayfalar Bybit formatında (yeniden eskiye, string, borsa hassasiyetinde yuvarlanmış) üretilir;
+her boyut için sayfa başına süre, tepe bellek (tracemalloc) ve sonuç eşitliği raporlanır.
+
+Kullanım:
+    python decode_benchmark.py
+    python decode_benchmark.py --pages 200 1000 5000 --repeat 200
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, List
+
+import numpy as np
+
+from exchange import klines_to_dataframe, klines_to_dataframe_pandas
+
+
+def make_page(bars: int, seed: int = 0, price: float = 60000.0, decimals: int = 1) -> List[List[str]]:
+    """Bybit get_kline 'list' alanı gibi: [startTime, open, high, low, close, volume, turnover], yeniden eskiye"""
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.003, bars)))
+    open_ = np.concatenate([[price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.002, bars)) * close
+    high, low = np.maximum(open_, close) + spread, np.minimum(open_, close) - spread
+    volume = rng.uniform(10, 5000, bars)
+    start = 1_700_000_000_000
+    page = [
+        [str(start + i * 900_000), f"{o:.{decimals}f}", f"{h:.{decimals}f}", f"{l:.{decimals}f}",
+         f"{c:.{decimals}f}", f"{v:.3f}", f"{v * c:.4f}"]
+        for i, (o, h, l, c, v) in enumerate(zip(open_, high, low, close, volume))
+    ]
+    return page[::-1]
+
+
+def time_per_call(fn: Callable, page: List[List[str]], repeat: int) -> float:
+    fn(page)  # ısınma
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(page)
+    return (time.perf_counter() - t0) / repeat
+
+
+def peak_memory(fn: Callable, page: List[List[str]]) -> int:
+    tracemalloc.start()
+    fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[200, 1000, 5000], help='Sayfa başına bar sayısı')
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'bar':>6} {'pandas ms':>10} {'numpy ms':>10} {'hız':>6} {'pandas KB':>10} {'numpy KB':>10} {'eşit':>5}")
+    for bars in args.pages:
+        page = make_page(bars)
+        equal = klines_to_dataframe(page).equals(klines_to_dataframe_pandas(page))
+        old = time_per_call(klines_to_dataframe_pandas, page, args.repeat)
+        new = time_per_call(klines_to_dataframe, page, args.repeat)
+        old_mem = peak_memory(klines_to_dataframe_pandas, page)
+        new_mem = peak_memory(klines_to_dataframe, page)
+        print(f"{bars:>6} {old * 1e3:>10.3f} {new * 1e3:>10.3f} {old / new:>5.1f}x "
+              f"{old_mem / 1024:>10.1f} {new_mem / 1024:>10.1f} {str(equal):>5}")
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,318 @@
+"""
+Pre-arm modu: kırılım girişleri (pivot_go_breakout_2x / pivot_go_breakdown_2x) bir sonraki 15 dk'lık
+poll'u beklemeden, sinyali tetikleyecek fiyata önceden konmuş koşullu (stop) market emirle alınır.
+
+Seviye hesabı (trigger_levels):
+- Mevcut zigzag / yapı durumundan, oluşmakta olan bar hangi kapanışla biterse sinyalin true olacağı
+  aranır. Zigzag dönüşü geçmiş pivotları da değiştirebildiği için formül yerine gerçek kernel kullanılır:
+  aday kapanışlar (fiyattan PREARM_MAX_DISTANCE_ATR ATR'a kadar ızgara + pivot seviyesinin bir tick
+  ötesi) tüm semboller için tek (adaylar x barlar) blokta hesaplanır, ilk true aday ile önceki false
+  aday arası ara noktalarla daraltılır, sonuç tick'e yuvarlanıp tekrar doğrulanır.
+- Hipotetik bar: oluşan barın open / high / low değerleri + aday kapanış (ATR ve ATR aralığı filtresi
+  bu bar üzerinden hesaplanır; filtre tutmuyorsa seviye üretilmez).
+- Sembol başına sadece fiyata yakın olan yön kurulur (iki yönlü emrin aynı barda ikisinin de dolması önlenir).
+
+Emir yönetimi (EntryArmer):
+- Her tur: kurulu emirlerin durumu sorgulanır, dolanlar open_position'daki gibi TP/SL ile pozisyona
+  dönüştürülür; seviyesi değişen emirler iptal edilip yeniden konur, seviyesi kalmayanlar iptal edilir.
+- Koşullu emre borsa tarafı stopLoss eklenir: dolum ile sonraki tur arasında pozisyon korumasız kalmaz;
+  OCO emirleri kurulunca kaldırılır (adopt_filled_entry), pozisyonda tek SL kalır.
+- Kurulu emirler durum deposuna yazılmaz; süreç ilk turda önceki instance'tan kalan 'arm-' emirlerini iptal eder.
+Tetik, barın kapanışında değil fiyat seviyeye değdiğinde çalışır: bar içinde geri dönen kırılımlar da girilir.
+"""
+import logging
+import math
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import TP_ROUND_NUMBERS, PREARM_MAX_DISTANCE_ATR, PREARM_GRID, PREARM_REFINE
+from np_indicators import KlineArrays, bar_times_ms, calculate_atr, compute_columns
+
+if TYPE_CHECKING:
+    from position_manager import PositionManager
+
+logger = logging.getLogger(__name__)
+
+ARM_LINK_PREFIX = 'arm-'
+SIGNAL_COLUMN = {'LONG': 'pivot_go_breakout_2x', 'SHORT': 'pivot_go_breakdown_2x'}
+OPEN_STATUSES = ('New', 'PartiallyFilled', 'Untriggered', 'Triggered')
+CLOSED_STATUSES = ('Cancelled', 'Deactivated', 'Rejected', 'NotFound')
+REFINE_POINTS = 8  # daraltma turu başına aralık içi aday (aralık her turda 9'da birine iner)
+
+
+def _to_arrays(data) -> KlineArrays:
+    """KlineArrays veya exchange.get_ohlcv DataFrame'i -> KlineArrays"""
+    if isinstance(data, dict):
+        return data
+    arrays = {col: data[col].to_numpy(dtype=float) for col in ('open', 'high', 'low', 'close', 'volume')}
+    arrays['time'] = bar_times_ms(data)
+    return arrays
+
+
+def _tick(symbol: str) -> float:
+    return 10.0 ** -TP_ROUND_NUMBERS.get(symbol, 3)
+
+
+# --- Seviye hesabı ---
+class _Case:
+    """Bir sembol + yön için hipotetik bar girdileri"""
+
+    def __init__(self, symbol: str, direction: str, data: KlineArrays, forming: bool):
+        self.symbol = symbol
+        self.direction = direction
+        self.sign = 1 if direction == 'LONG' else -1
+        close = np.asarray(data['close'], dtype=float)
+        high = np.asarray(data['high'], dtype=float)
+        low = np.asarray(data['low'], dtype=float)
+        open_ = np.asarray(data['open'], dtype=float)
+        self.price = float(close[-1])
+        if forming:  # oluşan bar hipotetik kapanışla biter
+            self.base = (open_[:-1], high[:-1], low[:-1], close[:-1])
+            self.bar = (float(open_[-1]), float(high[-1]), float(low[-1]))
+        else:  # son bar kapanmış; yeni bar son kapanıştan açılır
+            self.base = (open_, high, low, close)
+            self.bar = (self.price, self.price, self.price)
+        self.atr = float(calculate_atr(high[None, :], low[None, :], close[None, :])[0, -1])
+
+    def rows(self, prices: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """(len(prices) x bar) OHLC: taban + aday kapanışlı hipotetik bar"""
+        bar_open, bar_high, bar_low = self.bar
+        k = len(prices)
+        columns = (np.full(k, bar_open), np.maximum(bar_high, prices), np.minimum(bar_low, prices), prices)
+        return tuple(np.hstack([np.broadcast_to(base, (k, len(base))), col[:, None]])
+                     for base, col in zip(self.base, columns))
+
+
+def _signal_at(cases: List[_Case], prices: List[np.ndarray]) -> List[np.ndarray]:
+    """cases[i] için prices[i] kapanışlarında sinyal (aynı uzunluktaki vakalar tek blokta)"""
+    result: List[Optional[np.ndarray]] = [None] * len(cases)
+    by_length: Dict[int, List[int]] = {}
+    for i, case in enumerate(cases):
+        if len(prices[i]):
+            by_length.setdefault(len(case.base[0]), []).append(i)
+        else:
+            result[i] = np.zeros(0, dtype=bool)
+
+    for indices in by_length.values():
+        blocks = [cases[i].rows(prices[i]) for i in indices]
+        o, h, l, c = (np.vstack([block[j] for block in blocks]) for j in range(4))
+        symbols = [cases[i].symbol for i in indices for _ in prices[i]]
+        directions = [cases[i].direction for i in indices for _ in prices[i]]
+        cols = compute_columns(o, h, l, c, symbols, list(SIGNAL_COLUMN.values()))
+        flags = np.where(np.array(directions) == 'LONG',
+                         cols[SIGNAL_COLUMN['LONG']][:, -1], cols[SIGNAL_COLUMN['SHORT']][:, -1]).astype(bool)
+        start = 0
+        for i in indices:
+            result[i] = flags[start:start + len(prices[i])]
+            start += len(prices[i])
+    return result
+
+
+def trigger_levels(data: Dict[str, Any], directions: Dict[str, List[str]], forming: Dict[str, bool],
+                   pivots: Dict[str, Dict[str, float]], max_distance_atr: float = PREARM_MAX_DISTANCE_ATR,
+                   grid: int = PREARM_GRID, refine: int = PREARM_REFINE) -> Dict[str, Tuple[str, float]]:
+    """
+    {sembol: (yön, tetik fiyatı)}: oluşan bar bu fiyatta (veya ötesinde) kapanırsa yön sinyali true olur.
+    directions: sembol başına denenecek yönler; pivots: {sembol: {'LONG': high_pivot_filled_2x, 'SHORT': low_pivot_filled_2x}}
+    Fiyat şu an sinyal veriyorsa (poll zaten giriyor) veya menzilde seviye yoksa sembol dönmez.
+    """
+    cases = [_Case(symbol, direction, _to_arrays(data[symbol]), forming[symbol])
+             for symbol, sides in directions.items() for direction in sides]
+    cases = [case for case in cases if np.isfinite(case.atr) and case.atr > 0]
+    if not cases:
+        return {}
+
+    # 1. Izgara + pivot seviyesinin bir tick ötesi (fiyattan uzaklaşan sırada); ilk eleman şimdiki fiyat
+    candidates = []
+    for case in cases:
+        steps = case.price + case.sign * max_distance_atr * case.atr * np.arange(0, grid + 1) / grid
+        pivot = pivots.get(case.symbol, {}).get(case.direction)
+        if pivot is not None and np.isfinite(pivot):
+            tick = _tick(case.symbol)
+            edge = (math.floor(pivot / tick) + 1) * tick if case.sign > 0 else (math.ceil(pivot / tick) - 1) * tick
+            if 0 < case.sign * (edge - case.price) <= max_distance_atr * case.atr:
+                steps = np.sort(np.append(steps, edge))[::case.sign]
+        candidates.append(steps)
+    flags = _signal_at(cases, candidates)
+
+    brackets = {}  # case index -> (false fiyat, true fiyat)
+    for i, (steps, hit) in enumerate(zip(candidates, flags)):
+        if hit[0] or not hit.any():
+            continue
+        first = int(np.argmax(hit))
+        brackets[i] = [steps[first - 1], steps[first]]
+
+    # 2. Daraltma: her turda aralığa REFINE_POINTS ara nokta (tüm açık aralıklar tek blokta);
+    #    aralık tick'ten dar olunca durur
+    for _ in range(refine):
+        active = [i for i, (lo, hi) in brackets.items() if abs(hi - lo) > _tick(cases[i].symbol)]
+        if not active:
+            break
+        points = [np.linspace(brackets[i][0], brackets[i][1], REFINE_POINTS + 2)[1:-1] for i in active]
+        for i, inner, hit in zip(active, points, _signal_at([cases[i] for i in active], points)):
+            if hit.any():
+                first = int(np.argmax(hit))
+                brackets[i] = [float(inner[first - 1]) if first else brackets[i][0], float(inner[first])]
+            else:
+                brackets[i][0] = float(inner[-1])
+
+    # 3. Tick'e (fiyattan uzağa) yuvarla ve doğrula
+    rounded = {}
+    for i, (_, hi) in brackets.items():
+        tick = _tick(cases[i].symbol)
+        level = math.ceil(hi / tick - 1e-9) * tick if cases[i].sign > 0 else math.floor(hi / tick + 1e-9) * tick
+        rounded[i] = round(level, TP_ROUND_NUMBERS.get(cases[i].symbol, 3))
+    indices = list(rounded)
+    checks = _signal_at([cases[i] for i in indices], [np.array([rounded[i]]) for i in indices])
+
+    levels: Dict[str, Tuple[str, float]] = {}
+    for i, hit in zip(indices, checks):
+        if not hit[0]:
+            continue
+        case = cases[i]
+        current = levels.get(case.symbol)
+        if current is None or abs(rounded[i] - case.price) < abs(current[1] - case.price):
+            levels[case.symbol] = (case.direction, rounded[i])
+    return levels
+
+
+# --- Emir yönetimi ---
+class EntryArmer:
+    def __init__(self, client, position_manager: 'PositionManager'):
+        self.client = client
+        self.position_manager = position_manager
+        self.armed: Dict[str, Dict[str, Any]] = {}  # {symbol: kurulu koşullu giriş emri}
+        self._recovered = False
+
+    def _order(self, symbol: str, order_id: str) -> Optional[Dict]:
+        """Emir kaydı (önce açık emirler, sonra geçmiş); bulunamazsa None"""
+        for method in (self.client.get_open_orders, self.client.get_order_history):
+            orders = method(category="linear", symbol=symbol, orderId=order_id)['result']['list']
+            if orders:
+                return orders[0]
+        return None
+
+    def _cancel_strays(self, symbols: List[str]) -> None:
+        """Önceki instance'tan kalan 'arm-' emirlerini iptal eder (kurulu emirler depoya yazılmaz)"""
+        for symbol in symbols:
+            try:
+                orders = self.client.get_open_orders(category="linear", symbol=symbol)['result']['list']
+                for order in orders:
+                    if str(order.get('orderLinkId', '')).startswith(ARM_LINK_PREFIX):
+                        self.client.cancel_order(category="linear", symbol=symbol, orderId=order['orderId'])
+                        logger.info(f"{symbol} sahipsiz koşullu giriş emri iptal edildi: {order['orderId']}")
+            except Exception as e:
+                logger.warning(f"{symbol} sahipsiz koşullu emir kontrolü hatası: {str(e)}")
+        self._recovered = True
+
+    def _adopt(self, symbol: str, armed: Dict, order: Dict) -> None:
+        entry_price = float(order.get('avgPrice') or armed['trigger'])
+        self.position_manager.adopt_filled_entry(
+            symbol=symbol,
+            direction=armed['direction'],
+            entry_price=entry_price,
+            quantity=armed['quantity'],
+            atr_value=armed['atr'],
+            pct_atr=armed['pct_atr'],
+            order_id=armed['order_id']
+        )
+
+    def reconcile(self, symbols: List[str]) -> Counter:
+        """Kurulu emirlerin durumu: dolanlar pozisyona dönüştürülür, kapananlar düşülür"""
+        stats = Counter()
+        if not self._recovered:
+            self._cancel_strays(symbols)
+        for symbol, armed in list(self.armed.items()):
+            try:
+                order = self._order(symbol, armed['order_id'])
+            except Exception as e:
+                logger.warning(f"{symbol} koşullu giriş emri sorgulanamadı: {str(e)}")
+                continue
+            status = order['orderStatus'] if order else 'NotFound'
+            if status == 'Filled':
+                del self.armed[symbol]
+                self._adopt(symbol, armed, order)
+                stats['filled'] += 1
+            elif status in CLOSED_STATUSES:
+                logger.info(f"{symbol} koşullu giriş emri kapanmış ({status}), kayıt düşüldü")
+                del self.armed[symbol]
+                stats['dropped'] += 1
+        return stats
+
+    def _disarm(self, symbol: str) -> bool:
+        """Emri iptal eder; iptal edilemezse durum tekrar sorgulanır (dolduysa pozisyon kaydedilir)"""
+        armed = self.armed.pop(symbol)
+        try:
+            self.client.cancel_order(category="linear", symbol=symbol, orderId=armed['order_id'])
+            return True
+        except Exception as e:
+            order = None
+            try:
+                order = self._order(symbol, armed['order_id'])
+            except Exception:
+                pass
+            if order and order['orderStatus'] == 'Filled':
+                logger.info(f"{symbol} iptal edilecek koşullu giriş emri dolmuş, pozisyon kaydediliyor")
+                self._adopt(symbol, armed, order)
+            elif order and order['orderStatus'] in OPEN_STATUSES:
+                self.armed[symbol] = armed  # sonraki turda tekrar denenir
+                logger.warning(f"{symbol} koşullu giriş emri iptal edilemedi: {str(e)}")
+            return False
+
+    def _arm(self, symbol: str, direction: str, trigger: float, row: Dict) -> None:
+        quantity = self.position_manager._calculate_position_size(symbol, row['atr'], trigger)
+        _, sl_price = self.position_manager.exit_strategy.calculate_levels(trigger, row['atr'], direction, symbol)
+        link_id = f"{ARM_LINK_PREFIX}{symbol}-{int(time.time() * 1000)}"
+        order = self.client.place_order(
+            category="linear",
+            symbol=symbol,
+            side="Buy" if direction == "LONG" else "Sell",
+            orderType="Market",
+            qty=quantity,
+            triggerPrice=str(trigger),
+            triggerDirection=1 if direction == "LONG" else 2,
+            triggerBy="LastPrice",
+            stopLoss=str(sl_price),
+            reduceOnly=False,
+            orderLinkId=link_id
+        )
+        if order['retCode'] != 0:
+            raise Exception(f"Koşullu giriş emri hatası: {order['retMsg']}")
+        self.armed[symbol] = {
+            'direction': direction,
+            'trigger': trigger,
+            'quantity': quantity,
+            'atr': row['atr'],
+            'pct_atr': row['pct_atr'],
+            'order_id': order['result']['orderId'],
+            'order_link_id': link_id,
+        }
+        logger.info(f"{symbol} {direction} koşullu giriş kuruldu | Tetik: {trigger} | Miktar: {quantity} | SL: {sl_price}")
+
+    def sync(self, levels: Dict[str, Tuple[str, float]], rows: Dict[str, Optional[Dict]]) -> Counter:
+        """Kurulu emirleri levels'a getirir: aynı seviye korunur, değişen yeniden konur, olmayan iptal edilir"""
+        stats = Counter()
+        for symbol in list(self.armed):
+            target = levels.get(symbol)
+            armed = self.armed[symbol]
+            if target and target[0] == armed['direction'] and abs(target[1] - armed['trigger']) < _tick(symbol) / 2:
+                continue
+            if self._disarm(symbol):
+                stats['cancelled'] += 1
+
+        for symbol, (direction, trigger) in levels.items():
+            if symbol in self.armed or symbol in self.position_manager.active_positions or not rows.get(symbol):
+                continue
+            try:
+                self._arm(symbol, direction, trigger, rows[symbol])
+                stats['armed'] += 1
+            except Exception as e:
+                logger.warning(f"{symbol} koşullu giriş kurulamadı: {str(e)}")
+                stats['failed'] += 1
+        return stats
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {symbol: {'direction': a['direction'], 'trigger': a['trigger']} for symbol, a in self.armed.items()}
@@ -3,6 +3,9 @@ from typing import Dict, Any, Tuple
 LONG_PAIRS_2X = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT','XRPUSDT','DOGEUSDT']
 SHORT_PAIRS_2X = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT','XRPUSDT','DOGEUSDT']
 
+# Giriş kurallarının okuduğu kolonlar; calculate_indicators sadece bunları ve bağımlılıklarını hesaplar
+REQUIRED_COLUMNS = ['pivot_go_breakout_2x', 'pivot_go_breakdown_2x', 'pivot_go_down_3x']
+
 def check_long_entry(row: Dict[str, Any], symbol: str) -> bool:
     if symbol in LONG_PAIRS_2X:
         return row['pivot_go_breakout_2x'] == True
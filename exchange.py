@@ -1,23 +1,101 @@
-import os
-import pandas as pd
+import numpy as np
 from pybit.unified_trading import HTTP  # Değişti
-from dotenv import load_dotenv
-from typing import List, Optional, Dict
+from typing import TYPE_CHECKING, List, Optional, Dict, Tuple
 import logging
+from config import BYBIT_API_KEY, BYBIT_API_SECRET, RESILIENCE_ENABLED, ATTEMPT_TIMEOUT_S  # .env config.py içinde bir kez yüklenir
 
-# Log ayarı
-logging.basicConfig(level=logging.INFO)
+# Log ayarı main.py'de yapılır (import sırasında tekrar yapılandırma yok)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+if TYPE_CHECKING:  # pandas sadece DataFrame adaptörlerinde (NUMPY_CORE canlı yolu pandas yüklemez)
+    import pandas as pd
+
+
+KLINE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+KLINE_LIMIT = 250  # tur başına çekilen bar (indikatör penceresi)
+
+
+def decode_klines(klines: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bybit kline listesini (yeniden eskiye, string) tek geçişte kronolojik dizilere çözer:
+    (time int64[n] ms, ohlcv float64[5, n]); her kolon önceden ayrılmış bloğun bir satırına yazılır
+    """
+    n = len(klines)
+    rows = klines[::-1]
+    times = np.fromiter((int(row[0]) for row in rows), dtype=np.int64, count=n)
+    ohlcv = np.empty((len(KLINE_COLUMNS), n), dtype=np.float64)
+    for j in range(len(KLINE_COLUMNS)):
+        ohlcv[j] = [row[j + 1] for row in rows]  # string -> float64 numpy içinde
+    return times, ohlcv
+
+
+def klines_to_arrays(klines: List[List[str]]) -> Dict[str, np.ndarray]:
+    """KlineArrays {'time', 'open', ..., 'volume'}: decode_klines bloğunun satır görünümleri (pandas'sız)"""
+    times, ohlcv = decode_klines(klines)
+    arrays = {'time': times}
+    arrays.update(zip(KLINE_COLUMNS, ohlcv))
+    return arrays
+
+
+def frame_from_arrays(times: np.ndarray, ohlcv: np.ndarray) -> 'pd.DataFrame':
+    """decode_klines çıktısından kopyasız DataFrame (tek float64 blok + ms DatetimeIndex)"""
+    import pandas as pd
+    index = pd.DatetimeIndex(times.view('datetime64[ms]'), copy=False, name='time')
+    return pd.DataFrame(ohlcv.T, columns=KLINE_COLUMNS, index=index, copy=False)
+
+
+def klines_to_dataframe(klines: List[List[str]], convert_to_float: bool = True) -> 'pd.DataFrame':
+    """Bybit kline listesini (yeniden eskiye) kronolojik OHLCV DataFrame'e çevirir."""
+    if not convert_to_float:
+        return klines_to_dataframe_pandas(klines, convert_to_float)
+    return frame_from_arrays(*decode_klines(klines))
+
+
+def klines_to_dataframe_pandas(klines: List[List[str]], convert_to_float: bool = True) -> 'pd.DataFrame':
+    """Önceki pandas tabanlı çözümleme (string kolonlar ve karşılaştırma/benchmark için)"""
+    import pandas as pd
+    df = pd.DataFrame(klines, columns=[
+        'time', 'open', 'high', 'low', 'close', 'volume', 'turnover'
+    ])
+
+    df = df[['time', 'open', 'high', 'low', 'close', 'volume']].copy()
+    df['time'] = pd.to_datetime(df['time'].astype(int), unit='ms')
+    
+    if convert_to_float:
+        df[['open', 'high', 'low', 'close', 'volume']] = df[
+            ['open', 'high', 'low', 'close', 'volume']
+        ].astype(float)
+
+    df.set_index('time', inplace=True)
+    return df.iloc[::-1]  # Bybit verileri ters gelir
+
+
+def parse_tickers(tickers: List[Dict[str, str]], symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """Bybit ticker listesini {symbol: {'last', 'mark', 'bid', 'ask'}} float sözlüğüne çevirir (boş alan -> None)"""
+    wanted = set(symbols) if symbols is not None else None
+    fields = {'last': 'lastPrice', 'mark': 'markPrice', 'bid': 'bid1Price', 'ask': 'ask1Price'}
+    return {
+        item['symbol']: {name: float(item[key]) if item.get(key) else None for name, key in fields.items()}
+        for item in tickers
+        if wanted is None or item['symbol'] in wanted
+    }
+
 
 class BybitFuturesAPI:  # Sınıf adı değişti
-    def __init__(self, testnet: bool = False):
-        """Bybit Futures API bağlantısını başlatır."""
+    def __init__(self, testnet: bool = False, session=None,
+                 api_key: Optional[str] = BYBIT_API_KEY, api_secret: Optional[str] = BYBIT_API_SECRET):
+        """Bybit Futures API bağlantısını başlatır (session verilirse o kullanılır, örn. simulator; anahtarlar: alt hesap)."""
+        if session is not None:
+            self.session = session
+            logger.info("Bybit Futures API harici oturumla başlatıldı (%s)", type(session).__name__)
+            return
+        # Dayanıklılık katmanı açıksa yeniden deneme onda: pybit tek deneme yapar (iç retry 3s bekler)
+        retry_options = dict(timeout=ATTEMPT_TIMEOUT_S, max_retries=1) if RESILIENCE_ENABLED else {}
         self.session = HTTP(  # client -> session
-            api_key=os.getenv('BYBIT_API_KEY'),  # BINANCE -> BYBIT
-            api_secret=os.getenv('BYBIT_API_SECRET'),
-            testnet=testnet
+            api_key=api_key,  # BINANCE -> BYBIT
+            api_secret=api_secret,
+            testnet=testnet,
+            **retry_options
         )
         logger.info("Bybit Futures API bağlantısı başarılı (Testnet: %s)", testnet)
 
@@ -26,10 +104,11 @@ class BybitFuturesAPI:  # Sınıf adı değişti
         symbol: str = 'SOLUSDT',
         interval: str = '15',  # Bybit formatı (15m için '15')
         limit: int = 300,  # Bybit max limit 300
-        convert_to_float: bool = True
-    ) -> Optional[pd.DataFrame]:
+        convert_to_float: bool = True,
+        as_arrays: bool = False
+    ) -> Optional['pd.DataFrame']:
         """
-        Bybit Futures'tan OHLCV verisi çeker.
+        Bybit Futures'tan OHLCV verisi çeker (as_arrays: DataFrame yerine KlineArrays sözlüğü).
         """
         try:
             response = self.session.get_kline(
@@ -42,32 +121,34 @@ class BybitFuturesAPI:  # Sınıf adı değişti
             if response['retCode'] != 0:
                 raise Exception(response['retMsg'])
 
-            klines = response['result']['list']
-            
-            df = pd.DataFrame(klines, columns=[
-                'time', 'open', 'high', 'low', 'close', 'volume', 'turnover'
-            ])
-
-            df = df[['time', 'open', 'high', 'low', 'close', 'volume']].copy()
-            df['time'] = pd.to_datetime(df['time'].astype(int), unit='ms')
-            
-            if convert_to_float:
-                df[['open', 'high', 'low', 'close', 'volume']] = df[
-                    ['open', 'high', 'low', 'close', 'volume']
-                ].astype(float)
-
-            df.set_index('time', inplace=True)
-            return df.iloc[::-1]  # Bybit verileri ters gelir
+            if as_arrays:
+                return klines_to_arrays(response['result']['list'])
+            return klines_to_dataframe(response['result']['list'], convert_to_float)
 
         except Exception as e:
             logger.error("Veri çekme hatası (Sembol: %s): %s", symbol, str(e))
             return None
 
+    def get_tickers(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Tek get_tickers(category="linear") çağrısıyla tüm sembollerin anlık fiyatları:
+        {symbol: {'last', 'mark', 'bid', 'ask'}}; hata olursa boş sözlük
+        """
+        try:
+            response = self.session.get_tickers(category="linear")
+            if response['retCode'] != 0:
+                raise Exception(response['retMsg'])
+            return parse_tickers(response['result']['list'], symbols)
+        except Exception as e:
+            logger.error("Ticker çekme hatası: %s", str(e))
+            return {}
+
     def get_multiple_ohlcv(
         self,
         symbols: List[str],
         interval: str = '15',
-        limit: int = 250
-    ) -> Dict[str, pd.DataFrame]:
+        limit: int = KLINE_LIMIT,
+        as_arrays: bool = False
+    ) -> Dict[str, 'pd.DataFrame']:
         """Birden fazla sembol için veri çeker"""
-        return {sym: self.get_ohlcv(sym, interval, limit) for sym in symbols}
+        return {sym: self.get_ohlcv(sym, interval, limit, as_arrays=as_arrays) for sym in symbols}
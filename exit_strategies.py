@@ -1,12 +1,20 @@
-
-from pybit.unified_trading import HTTP
-from typing import Dict, Any, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
+import asyncio
 import logging
 from config import TP_ROUND_NUMBERS
 
+if TYPE_CHECKING:  # sadece tip ipucu; pybit import maliyeti cold start'a eklenmez
+    from pybit.unified_trading import HTTP
+
 class ExitStrategy:
-    def __init__(self, bybit_client: HTTP):
+    """
+    Limit TP + stop-market SL (OCO). Emir parametreleri, yanıtların yorumlanması ve OCO kararı ortak
+    yardımcılardadır; senkron ve async metotlar sadece borsa çağrılarını yapar
+    """
+
+    def __init__(self, bybit_client: 'HTTP', async_client=None):
         self.client = bybit_client
+        self.async_client = async_client  # AsyncBybitHTTP (run_once_async için)
         self.logger = logging.getLogger(__name__)
 
     def calculate_levels(self, entry_price: float, atr_value: float, direction: str, symbol: str) -> Tuple[float, float]:
@@ -17,143 +25,195 @@ class ExitStrategy:
         else:
             take_profit = entry_price - (3 * atr_value)
             stop_loss = entry_price + (3 * atr_value)
-                
+
         round_to = TP_ROUND_NUMBERS.get(symbol, 3)
-        
+
         return (round(take_profit, round_to), round(stop_loss, round_to))
 
+    # --- Ortak yardımcılar (I/O yok) ---
+
+    @staticmethod
+    def _tp_sl_orders(symbol, direction, tp_price, sl_price, quantity) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """TP için LIMIT, SL için STOP-MARKET emir parametreleri"""
+        tp_side = "Sell" if direction == "LONG" else "Buy"
+        tp_order = dict(
+            category="linear",
+            symbol=symbol,
+            side=tp_side,
+            orderType="Limit",
+            qty=str(quantity),
+            price=str(tp_price),
+            reduceOnly=True,
+            timeInForce="GTC"
+        )
+        sl_order = dict(
+            category="linear",
+            symbol=symbol,
+            side=tp_side,
+            orderType="Market",
+            qty=str(quantity),
+            triggerPrice=str(sl_price),
+            triggerDirection=2 if direction == "LONG" else 1,
+            triggerBy="LastPrice",
+            reduceOnly=True
+        )
+        return tp_order, sl_order
+
+    def _tp_sl_placed(self, symbol, tp_price, sl_price, tp_order, sl_order) -> Dict[str, Any]:
+        """Gönderilen TP/SL emirlerinden OCO kaydı"""
+        tp_order_id = tp_order['result']['orderId']
+        sl_order_id = sl_order['result']['orderId']
+        self.logger.info(f"✓ {symbol} TP Limit: {tp_price} (ID: {tp_order_id}) | SL Stop: {sl_price} (ID: {sl_order_id})")
+
+        # OCO mantığı için emirleri kaydet
+        oco_pair = {
+            'symbol': symbol,
+            'tp_order_id': tp_order_id,
+            'sl_order_id': sl_order_id,
+            'active': True
+        }
+        return {
+            'tp_order_id': tp_order_id,
+            'sl_order_id': sl_order_id,
+            'oco_pair': oco_pair,
+            'success': True
+        }
+
+    def _oco_decision(self, oco_pair, tp_status, sl_status) -> Optional[Dict[str, Any]]:
+        """
+        Bir bacak tetiklendiyse sonuç (iptal edilecek diğer bacak 'cancel_id'), değilse None.
+        TP: Filled; SL: Filled veya Triggered
+        """
+        if tp_status == 'Filled':
+            self.logger.info(f"✓ {oco_pair['symbol']} TP tetiklendi! SL iptal ediliyor...")
+            return {'triggered': 'TP', 'cancelled': 'SL', 'cancel_id': oco_pair['sl_order_id']}
+        if sl_status in ['Filled', 'Triggered']:
+            self.logger.info(f"✓ {oco_pair['symbol']} SL tetiklendi! TP iptal ediliyor...")
+            return {'triggered': 'SL', 'cancelled': 'TP', 'cancel_id': oco_pair['tp_order_id']}
+        return None
+
+    @staticmethod
+    def _first_status(result) -> Optional[str]:
+        orders = result['result']['list']
+        return orders[0]['orderStatus'] if orders else None
+
+    @staticmethod
+    def _order_query(symbol, order_id) -> Dict[str, Any]:
+        return dict(category="linear", symbol=symbol, orderId=order_id)
+
+    # --- Senkron ---
+
     def set_limit_tp_sl(self, symbol, direction, tp_price, sl_price, quantity):
         """Limit TP ve Stop-Market SL emirleri oluştur (OCO mantığı ile)"""
         try:
-            tp_side = "Sell" if direction == "LONG" else "Buy"
-            trigger_direction = 2 if direction == "LONG" else 1
-            
-            # TP için LIMIT emri
-            tp_order = self.client.place_order(
-                category="linear",
-                symbol=symbol,
-                side=tp_side,
-                orderType="Limit",
-                qty=str(quantity),
-                price=str(tp_price),
-                reduceOnly=True,
-                timeInForce="GTC"
-            )
-            
-            # SL için STOP-MARKET emri
-            sl_order = self.client.place_order(
-                category="linear", 
-                symbol=symbol,
-                side=tp_side,
-                orderType="Market",
-                qty=str(quantity),
-                triggerPrice=str(sl_price),
-                triggerDirection=trigger_direction,
-                triggerBy="LastPrice",
-                reduceOnly=True
-            )
-            
-            tp_order_id = tp_order['result']['orderId']
-            sl_order_id = sl_order['result']['orderId']
-            
-            print(f"✓ TP Limit: {tp_price} (ID: {tp_order_id})")
-            print(f"✓ SL Stop: {sl_price} (ID: {sl_order_id})")
-            
-            # OCO mantığı için emirleri kaydet
-            oco_pair = {
-                'symbol': symbol,
-                'tp_order_id': tp_order_id,
-                'sl_order_id': sl_order_id,
-                'active': True
-            }
-            
-            return {
-                'tp_order_id': tp_order_id,
-                'sl_order_id': sl_order_id,
-                'oco_pair': oco_pair,
-                'success': True
-            }
-            
+            tp_order, sl_order = self._tp_sl_orders(symbol, direction, tp_price, sl_price, quantity)
+            return self._tp_sl_placed(symbol, tp_price, sl_price,
+                                      self.client.place_order(**tp_order), self.client.place_order(**sl_order))
         except Exception as e:
-            print(f"❌ Limit TP/SL hatası: {e}")
-            import traceback
-            traceback.print_exc()
+            self.logger.error(f"❌ {symbol} Limit TP/SL hatası: {e}", exc_info=True)
             return {'success': False, 'error': str(e)}
-    
-    
+
+
     def check_and_cancel_oco(self, oco_pair):
         """Bir emir tetiklenirse diğerini iptal et (OCO mantığı)"""
         if not oco_pair.get('active'):
             return {'already_handled': True}
-        
+
         try:
             symbol = oco_pair['symbol']
-            tp_id = oco_pair['tp_order_id']
-            sl_id = oco_pair['sl_order_id']
-            
-            # Her iki emrin durumunu kontrol et
-            tp_status = self.get_order_status(symbol, tp_id)
-            sl_status = self.get_order_status(symbol, sl_id)
-            
-            # TP tetiklendi mi? (Filled)
-            if tp_status == 'Filled':
-                print(f"✓ TP tetiklendi! SL iptal ediliyor...")
-                self.cancel_order(symbol, sl_id)
-                oco_pair['active'] = False
-                return {'triggered': 'TP', 'cancelled': 'SL'}
-            
-            # SL tetiklendi mi? (Filled veya Triggered)
-            if sl_status in ['Filled', 'Triggered']:
-                print(f"✓ SL tetiklendi! TP iptal ediliyor...")
-                self.cancel_order(symbol, tp_id)
-                oco_pair['active'] = False
-                return {'triggered': 'SL', 'cancelled': 'TP'}
-            
-            return {'status': 'both_active'}
-            
+            decision = self._oco_decision(oco_pair, self.get_order_status(symbol, oco_pair['tp_order_id']),
+                                          self.get_order_status(symbol, oco_pair['sl_order_id']))
+            if decision is None:
+                return {'status': 'both_active'}
+            self.cancel_order(symbol, decision.pop('cancel_id'))
+            oco_pair['active'] = False
+            return decision
+
         except Exception as e:
-            print(f"❌ OCO kontrol hatası: {e}")
+            self.logger.error(f"❌ OCO kontrol hatası: {e}")
             return {'error': str(e)}
-    
-    
+
+
     def get_order_status(self, symbol, order_id):
-        """Emir durumunu sorgula"""
+        """Emir durumunu sorgula (açık emirlerde yoksa geçmiş emirler)"""
         try:
-            result = self.client.get_open_orders(
-                category="linear",
-                symbol=symbol,
-                orderId=order_id
-            )
-            
-            orders = result['result']['list']
-            if not orders:
-                # Açık emirlerde yoksa, geçmiş emirleri kontrol et
-                history = self.client.get_order_history(
-                    category="linear",
-                    symbol=symbol,
-                    orderId=order_id
-                )
-                if history['result']['list']:
-                    return history['result']['list'][0]['orderStatus']
-                return 'NotFound'
-            
-            return orders[0]['orderStatus']
-            
+            query = self._order_query(symbol, order_id)
+            status = self._first_status(self.client.get_open_orders(**query))
+            if status is None:
+                status = self._first_status(self.client.get_order_history(**query)) or 'NotFound'
+            return status
+
         except Exception as e:
-            print(f"❌ Emir durum sorgu hatası: {e}")
+            self.logger.error(f"❌ {symbol} emir durum sorgu hatası: {e}")
             return 'Error'
-    
-    
+
+
     def cancel_order(self, symbol, order_id):
         """Emri iptal et"""
         try:
-            result = self.client.cancel_order(
-                category="linear",
-                symbol=symbol,
-                orderId=order_id
-            )
-            print(f"✓ Emir iptal edildi: {order_id}")
+            result = self.client.cancel_order(**self._order_query(symbol, order_id))
+            self.logger.info(f"✓ {symbol} emir iptal edildi: {order_id}")
+            return result
+        except Exception as e:
+            self.logger.warning(f"❌ {symbol} iptal hatası: {e}")
+            return None
+
+
+    # --- Asyncio karşılıkları (run_once_async): aynı yardımcılar, çağrılar eşzamanlı ---
+
+    async def set_limit_tp_sl_async(self, symbol, direction, tp_price, sl_price, quantity):
+        """set_limit_tp_sl ile aynı; TP ve SL emirleri eşzamanlı gönderilir"""
+        try:
+            tp_order, sl_order = self._tp_sl_orders(symbol, direction, tp_price, sl_price, quantity)
+            placed = await asyncio.gather(self.async_client.place_order(**tp_order),
+                                          self.async_client.place_order(**sl_order))
+            return self._tp_sl_placed(symbol, tp_price, sl_price, *placed)
+        except Exception as e:
+            self.logger.error(f"❌ {symbol} Limit TP/SL hatası: {e}")
+            return {'success': False, 'error': str(e)}
+
+
+    async def check_and_cancel_oco_async(self, oco_pair):
+        """check_and_cancel_oco ile aynı; TP ve SL durumları eşzamanlı sorgulanır"""
+        if not oco_pair.get('active'):
+            return {'already_handled': True}
+
+        try:
+            symbol = oco_pair['symbol']
+            statuses = await asyncio.gather(self.get_order_status_async(symbol, oco_pair['tp_order_id']),
+                                            self.get_order_status_async(symbol, oco_pair['sl_order_id']))
+            decision = self._oco_decision(oco_pair, *statuses)
+            if decision is None:
+                return {'status': 'both_active'}
+            await self.cancel_order_async(symbol, decision.pop('cancel_id'))
+            oco_pair['active'] = False
+            return decision
+
+        except Exception as e:
+            self.logger.error(f"❌ OCO kontrol hatası: {e}")
+            return {'error': str(e)}
+
+
+    async def get_order_status_async(self, symbol, order_id):
+        """get_order_status ile aynı (async)"""
+        try:
+            query = self._order_query(symbol, order_id)
+            status = self._first_status(await self.async_client.get_open_orders(**query))
+            if status is None:
+                status = self._first_status(await self.async_client.get_order_history(**query)) or 'NotFound'
+            return status
+
+        except Exception as e:
+            self.logger.error(f"❌ {symbol} emir durum sorgu hatası: {e}")
+            return 'Error'
+
+
+    async def cancel_order_async(self, symbol, order_id):
+        """cancel_order ile aynı (async)"""
+        try:
+            result = await self.async_client.cancel_order(**self._order_query(symbol, order_id))
+            self.logger.info(f"✓ {symbol} emir iptal edildi: {order_id}")
             return result
         except Exception as e:
-            print(f"❌ İptal hatası: {e}")
+            self.logger.warning(f"❌ {symbol} iptal hatası: {e}")
             return None
@@ -0,0 +1,184 @@
+"""
+İndikatör sonuçları için memoization: aynı barlar + aynı parametrelerle tekrar hesaplama yapılmaz
+(retry, manuel tetikleme, çakışan çağrılar).
+
+Anahtar: (sembol, interval, son bar zamanı, OHLCV içerik hash'i, parametre hash'i, tür, kolonlar)
+- parametre hash'i her çağrıda config'teki güncel atr_ranges / Z_RANGES / Z_INDICATOR_PARAMS
+  değerlerinden hesaplanır; değerler değişince eski kayıtlar kendiliğinden geçersiz olur
+- katman 1: süreç içi LRU (OrderedDict)
+- katman 2 (opsiyonel): disk üzerinde pickle dosyaları, toplam boyut aşılınca en eski erişilen silinir
+
+Varsayılan kapalıdır (INDICATOR_CACHE_SIZE=0, INDICATOR_CACHE_DIR boş). Normal canlı döngüde isabet olmaz:
+her çekimde yeni bir oluşan / kapanmış bar vardır (içerik hash'i her tur değişir) ve CLOSED_BAR_MODE'da
+değişmeyen semboller önbelleğe gelmeden atlanır (simulator.replay, 60 tur x 5 sembol: 0 isabet / 300 ıska).
+İşe yaradığı yükler:
+- aynı bar içinde tekrar tetikleme (Cloud Scheduler retry, manuel tetikleme, çakışan çağrılar) -> LRU
+- aynı sembolleri aynı bar için hesaplayan birden fazla instance / hesap süreci -> ortak disk katmanı
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (INTERVAL, atr_ranges, Z_RANGES, Z_INDICATOR_PARAMS,
+                    INDICATOR_CACHE_SIZE, INDICATOR_CACHE_DIR, INDICATOR_CACHE_MAX_MB)
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:  # girdiler DataFrame veya KlineArrays; pandas sadece frame() katmanında gerekir
+    import pandas as pd
+
+CACHE_VERSION = 1  # indikatör hesaplaması değişirse artırılır (disk katmanı eski kayıtları kullanmaz)
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
+Key = Tuple[Any, ...]
+
+
+def data_fingerprint(df) -> Tuple[int, str]:
+    """(son bar zamanı ms, zaman + OHLCV içerik hash'i); DataFrame ve KlineArrays için aynı değer"""
+    if isinstance(df, dict):
+        times = np.ascontiguousarray(df['time'], dtype=np.int64)
+        values = np.column_stack([df[col] for col in OHLCV]).astype(np.float64, copy=False)
+    else:
+        times = np.ascontiguousarray(df.index.as_unit('ms').asi8)
+        values = df[OHLCV].to_numpy(dtype=np.float64)
+    digest = hashlib.blake2b(times.tobytes(), digest_size=16)
+    digest.update(np.ascontiguousarray(values).tobytes())
+    return int(times[-1]), digest.hexdigest()
+
+
+def params_fingerprint(symbol: str, columns: Optional[List[str]] = None) -> str:
+    """Sembolün indikatör parametreleri + istenen kolonlar (config yerinde değişse de güncel değer okunur)"""
+    payload = json.dumps([
+        CACHE_VERSION,
+        atr_ranges.get(symbol),
+        Z_RANGES.get(symbol),
+        Z_INDICATOR_PARAMS,
+        sorted(columns) if columns is not None else None,
+    ], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class IndicatorCache:
+    """Son satır kayıtları ('row') ve tam DataFrame'ler ('frame') için iki katmanlı önbellek"""
+
+    def __init__(self, max_entries: int = INDICATOR_CACHE_SIZE, disk_dir: str = INDICATOR_CACHE_DIR,
+                 disk_max_mb: float = INDICATOR_CACHE_MAX_MB, interval: str = INTERVAL):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = int(disk_max_mb * 1024 * 1024)
+        self.interval = interval
+        self._memory: 'OrderedDict[Key, Any]' = OrderedDict()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def key(self, kind: str, df: 'pd.DataFrame', symbol: str, columns: Optional[List[str]] = None) -> Key:
+        last_time, content = data_fingerprint(df)
+        return (symbol, self.interval, last_time, content, params_fingerprint(symbol, columns), kind)
+
+    # --- Katmanlar ---
+    def _disk_path(self, key: Key) -> str:
+        name = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.disk_dir, f"{key[0]}_{name}.pkl")
+
+    def get(self, key: Key) -> Optional[Any]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._memory[key]
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+                os.utime(path)  # LRU tahliyesi için erişim zamanı
+                self.stats['disk_hits'] += 1
+                self._remember(key, value)
+                return value
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"İndikatör önbellek dosyası okunamadı ({path}): {e}")
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key: Key, value: Any) -> None:
+        self._remember(key, value)
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except Exception as e:
+            logger.warning(f"İndikatör önbelleği diske yazılamadı ({path}): {e}")
+
+    def _remember(self, key: Key, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        """Toplam boyut disk_max_bytes'ı aşarsa en eski erişilen dosyalardan başlayarak siler"""
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pkl'):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.disk_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    # --- Yüksek seviye ---
+    def latest_rows(
+        self,
+        frames: Dict[str, 'pd.DataFrame'],
+        columns: Optional[List[str]],
+        compute: Callable[[Dict[str, 'pd.DataFrame']], Dict[str, Optional[Dict]]]
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        Önbellekte olan semboller için kayıtlı son satır, diğerleri için compute(eksik_frameler)
+        (örn. latest_rows_batch); sıra frames ile aynıdır, dönen kayıtlar kopyadır
+        """
+        keys = {symbol: self.key('row', df, symbol, columns) for symbol, df in frames.items()}
+        rows = {symbol: self.get(key) for symbol, key in keys.items()}
+        missing = {symbol: frames[symbol] for symbol, row in rows.items() if row is None}
+        if missing:
+            for symbol, row in compute(missing).items():
+                rows[symbol] = row
+                if row is not None:
+                    self.put(keys[symbol], row)
+        return {symbol: dict(rows[symbol]) if rows.get(symbol) is not None else None for symbol in frames}
+
+    def frame(self, df: 'pd.DataFrame', symbol: str, columns: Optional[List[str]] = None) -> 'pd.DataFrame':
+        """calculate_indicators(df.copy(), symbol, columns) sonucunun önbellekli karşılığı (kopya döner)"""
+        from indicators import calculate_indicators
+        key = self.key('frame', df, symbol, columns)
+        result = self.get(key)
+        if result is None:
+            result = calculate_indicators(df.copy(), symbol, columns)
+            self.put(key, result)
+        return result.copy()
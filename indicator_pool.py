@@ -0,0 +1,166 @@
+"""
+Çok çekirdekli indikatör hesaplama (opsiyonel, INDICATOR_WORKERS > 0): np_indicators.latest_rows ile aynı sonuç.
+
+- İşçiler bot açılışında başlatılır (forkserver, np_indicators önceden yüklü) ve ısıtılır; turda süreç açılmaz
+- OHLC blokları tek bir paylaşımlı bellek bölgesine yazılır (symbols x bars, kolon başına); işçiye sadece
+  (bölge adı, offset, boyut, satır aralığı) gider, DataFrame / dizi pickle edilmez
+- Semboller parçalara bölünür (INDICATOR_POOL_CHUNK); işçi sadece son bar değerlerini döndürür
+- Parametreler (atr_ranges, Z_RANGES, Z_INDICATOR_PARAMS) her görevle gönderilir: ana süreçte çalışırken
+  değişen tablolar (yük testi sembolleri, yeniden yapılandırma) işçilerde de geçerlidir
+- INDICATOR_POOL_MIN_SYMBOLS altında veya havuz bozulursa seri hesaplanır
+"""
+import atexit
+import logging
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (atr_ranges, Z_RANGES, Z_INDICATOR_PARAMS, INDICATOR_WORKERS, INDICATOR_POOL_MIN_SYMBOLS,
+                    INDICATOR_POOL_CHUNK)
+from np_indicators import OHLCV, KlineArrays, _aligned_groups, compute_columns, latest_rows
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')  # compute_columns girdileri (volume son değeri ana süreçte)
+
+# --- İşçi tarafı ---
+_attached: Dict[str, shared_memory.SharedMemory] = {}  # işçi süreçte bölge adı -> bağlantı
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Bölgeye bağlanır (süreç başına bir kez); eski bölgeler kapatılır. Bölgeyi sadece ana süreç siler"""
+    block = _attached.get(name)
+    if block is None:
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        try:
+            block = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13: işçiler ana sürecin resource_tracker'ını paylaşır, kayıt tekrarı zararsız
+            block = shared_memory.SharedMemory(name=name)
+        _attached[name] = block
+    return block
+
+
+def _apply_params(params: Dict[str, Any]) -> None:
+    """Ana süreçteki parametre tabloları (np_indicators aynı dict nesnelerini config'ten okur)"""
+    atr_ranges.update(params['atr_ranges'])
+    Z_RANGES.update(params['z_ranges'])
+    Z_INDICATOR_PARAMS.update(params['z_params'])
+
+
+def _compute_chunk(name: str, offset: int, shape: Tuple[int, int, int], lo: int, hi: int, symbols: List[str],
+                   columns: Optional[List[str]], params: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Bölgedeki (4, S, N) bloğun [lo, hi) satırları için compute_columns; {kolon: son bar değerleri}"""
+    _apply_params(params)
+    block = np.ndarray(shape, dtype=np.float64, buffer=_attach(name).buf, offset=offset)[:, lo:hi]
+    cols = compute_columns(block[0], block[1], block[2], block[3], symbols, columns)
+    return {column: values[:, -1].copy() for column, values in cols.items()}
+
+
+def _warm_worker(_: int) -> int:
+    """İşçiyi başlatır ve hesaplama yolunu küçük bir blokla bir kez çalıştırır"""
+    n = 60
+    close = 100 + np.cumsum(np.sin(np.arange(n)))[None, :]
+    symbol = next(iter(Z_RANGES))
+    compute_columns(close, close + 1, close - 1, close, [symbol])
+    return multiprocessing.current_process().pid
+
+
+# --- Ana süreç ---
+class IndicatorPool:
+    def __init__(self, workers: int = INDICATOR_WORKERS, min_symbols: int = INDICATOR_POOL_MIN_SYMBOLS,
+                 chunk_size: int = INDICATOR_POOL_CHUNK):
+        """Havuz burada başlatılır ve ısıtılır (ilk tur süreç açma maliyeti ödemez)"""
+        self.workers = workers
+        self.min_symbols = min_symbols
+        self.chunk_size = chunk_size
+        self.stats = {'pooled': 0, 'serial': 0, 'fallbacks': 0}
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['np_indicators'])
+        self.pool: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        pids = set(self.pool.map(_warm_worker, range(workers * 2)))
+        logger.info(f"🧮 İndikatör havuzu hazır | İşçi: {len(pids)} | Seri eşik: {min_symbols} sembol")
+        atexit.register(self.close)
+
+    def _buffer(self, size: int) -> shared_memory.SharedMemory:
+        """En az size bayt paylaşımlı bölge (yeterliyse yeniden kullanılır, değilse büyütülür)"""
+        if self._shm is None or self._shm.size < size:
+            self._release()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        return self._shm
+
+    def _release(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _chunk(self, count: int) -> int:
+        return self.chunk_size if self.chunk_size > 0 else max(1, math.ceil(count / self.workers))
+
+    def latest_rows(self, arrays: Dict[str, KlineArrays], columns: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """np_indicators.latest_rows karşılığı; küçük evrende veya havuz hatasında seri"""
+        if self.pool is None or len(arrays) < self.min_symbols:
+            self.stats['serial'] += 1
+            return latest_rows(arrays, columns)
+        try:
+            results = self._latest_rows_pooled(arrays, columns)
+            self.stats['pooled'] += 1
+            return results
+        except Exception as e:
+            from concurrent.futures.process import BrokenProcessPool
+            self.stats['fallbacks'] += 1
+            if isinstance(e, BrokenProcessPool):
+                logger.error(f"İndikatör havuzu bozuldu, seri hesaplamaya geçiliyor: {str(e)}")
+                self.close()
+            else:
+                logger.warning(f"Havuzda indikatör hatası, bu tur seri hesaplanıyor: {str(e)}")
+            return latest_rows(arrays, columns)
+
+    def _latest_rows_pooled(self, arrays: Dict[str, KlineArrays], columns: Optional[List[str]]) -> Dict[str, Dict[str, Any]]:
+        groups = _aligned_groups(arrays)
+        shapes = [(len(PRICE_COLUMNS), len(symbols), len(arrays[symbols[0]]['time'])) for symbols in groups]
+        offsets = np.cumsum([0] + [math.prod(shape) * 8 for shape in shapes]).tolist()
+        shm = self._buffer(offsets[-1])
+
+        for symbols, shape, offset in zip(groups, shapes, offsets):
+            block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, offset=offset)
+            for row, symbol in enumerate(symbols):
+                for k, col in enumerate(PRICE_COLUMNS):
+                    block[k, row] = arrays[symbol][col]
+
+        params = {
+            'atr_ranges': {symbol: atr_ranges[symbol] for symbol in arrays if symbol in atr_ranges},
+            'z_ranges': {symbol: Z_RANGES[symbol] for symbol in arrays if symbol in Z_RANGES},
+            'z_params': dict(Z_INDICATOR_PARAMS),
+        }
+        tasks = []
+        for symbols, shape, offset in zip(groups, shapes, offsets):
+            step = self._chunk(len(symbols))
+            for lo in range(0, len(symbols), step):
+                hi = min(lo + step, len(symbols))
+                future = self.pool.submit(_compute_chunk, shm.name, offset, shape, lo, hi, symbols[lo:hi], columns, params)
+                tasks.append((symbols[lo:hi], future))
+
+        results = {}
+        for symbols, future in tasks:
+            last = future.result()
+            for row, symbol in enumerate(symbols):
+                record = {col: float(arrays[symbol][col][-1]) for col in OHLCV}
+                for name, values in last.items():
+                    record[name] = values[row].item()
+                results[symbol] = record
+        return {symbol: results[symbol] for symbol in arrays}
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        self._release()
@@ -2,6 +2,9 @@
 import numpy as np
 import pandas as pd
 from config import atr_ranges,Z_INDICATOR_PARAMS, Z_RANGES
+# pandas'sız çekirdekle ortak: sinyal kernel'i ve kolon bağımlılık grafiği (bu modül pandas adaptörüdür)
+from np_indicators import (pivot_signal_kernel, required_columns, COLUMN_INPUTS, ZIGZAG_COLUMNS,
+                           DONCHIAN_COLUMNS, SIGNAL_COLUMNS)
 import warnings
 warnings.filterwarnings('ignore', category=FutureWarning)
 
@@ -196,16 +199,23 @@ def calculate_z(df, symbol):
     
     return z
 
-# --- Calculations ---
-def calculate_indicators(df, symbol):
+# --- Feature Graph ---
+def _feature_rsi(df, symbol, wanted):
     df['rsi'] = calculate_rsi(df)
+    return df
+
+def _feature_atr(df, symbol, wanted):
     df['atr'] = calculate_atr(df)
     df['pct_atr'] = (df['atr'] / df['close']) * 100
-    
+    return df
+
+def _feature_z(df, symbol, wanted):
     df['z'] = calculate_z(df, symbol=symbol)
     df['pct_z'] = (df['z'] / df['close']) * 100
-    
-    for w in [20, 50]:
+    return df
+
+def _feature_donchian(w):
+    def compute(df, symbol, wanted):
         dc = calculate_donchian_channel(df, window=w)
         df[f'dc_upper_{w}'] = dc['dc_upper']
         df[f'dc_lower_{w}'] = dc['dc_lower']
@@ -213,123 +223,82 @@ def calculate_indicators(df, symbol):
         df[f'dc_position_ratio_{w}'] = (df['close'] - df[f'dc_lower_{w}']) / (df[f'dc_upper_{w}'] - df[f'dc_lower_{w}']) * 100
         df[f'dc_breakout_{w}'] = df['high'] > df[f'dc_upper_{w}']
         df[f'dc_breakdown_{w}'] = df['low'] < df[f'dc_lower_{w}']
-    
-    df['sma_50'] = calculate_sma(df,window=50)
-    df['sma_200'] = calculate_sma(df,window=200)
-    
+        return df
+    return compute
+
+def _feature_sma(df, symbol, wanted):
+    if 'sma_50' in wanted:
+        df['sma_50'] = calculate_sma(df, window=50)
+    if 'sma_200' in wanted:
+        df['sma_200'] = calculate_sma(df, window=200)
+    return df
+
+def _feature_trend(df, symbol, wanted):
     df['trend_50_200'] = determine_sma_trend(df, short_window=50, long_window=200)
+    return df
 
+def _feature_nw(df, symbol, wanted):
     nw = calculate_nadaraya_watson_envelope_optimized(df)
     df[['nw', 'nw_upper', 'nw_lower']] = nw
-    
-    df = atr_zigzag_two_columns(df, atr_col="z", close_col="close", atr_mult=2, suffix='_2x')
-    df = atr_zigzag_two_columns(df, atr_col="z", close_col="close", atr_mult=3, suffix='_3x')
+    return df
 
-    df.loc[df['high_pivot_filled_2x'] < df['high_pivot_filled_2x'].shift(1), 'high_structure_2x'] = 'LH'
-    df.loc[df['high_pivot_filled_2x'] > df['high_pivot_filled_2x'].shift(1), 'high_structure_2x'] = 'HH'
-    df.loc[df['low_pivot_filled_2x'] < df['low_pivot_filled_2x'].shift(1), 'low_structure_2x'] = 'LL'
-    df.loc[df['low_pivot_filled_2x'] > df['low_pivot_filled_2x'].shift(1), 'low_structure_2x'] = 'HL'
-    
-    df['high_structure_2x'] = df['high_structure_2x'].ffill().fillna('HH')
-    df['low_structure_2x'] = df['low_structure_2x'].ffill().fillna('LL')
-    
-    df.loc[df['high_pivot_filled_3x'] < df['high_pivot_filled_3x'].shift(1), 'high_structure_3x'] = 'LH'
-    df.loc[df['high_pivot_filled_3x'] > df['high_pivot_filled_3x'].shift(1), 'high_structure_3x'] = 'HH'
-    df.loc[df['low_pivot_filled_3x'] < df['low_pivot_filled_3x'].shift(1), 'low_structure_3x'] = 'LL'
-    df.loc[df['low_pivot_filled_3x'] > df['low_pivot_filled_3x'].shift(1), 'low_structure_3x'] = 'HL'
-    
-    df['high_structure_3x'] = df['high_structure_3x'].ffill().fillna('HH')
-    df['low_structure_3x'] = df['low_structure_3x'].ffill().fillna('LL')
-    
-    df['pivot_go_up_2x'] = False
-    df['pivot_go_down_2x'] = False
-    df.loc[(df['low_pivot_confirmed_2x']) & (df['low_structure_2x']=='HL') & (df['high_structure_2x']=='HH') & (df['trend_50_200']== 'uptrend') & (df['close'] < df['nw_upper']) & (atr_ranges[symbol][0] < df['pct_atr']) & (df['pct_atr'] < atr_ranges[symbol][1]), 'pivot_go_up_2x'] = True
-    df.loc[(df['high_pivot_confirmed_2x']) & (df['high_structure_2x']=='LH') & (df['low_structure_2x']=='LL') & (df['trend_50_200']== 'downtrend') & (df['close'] > df['nw_lower']) & (atr_ranges[symbol][0] < df['pct_atr']) & (df['pct_atr'] < atr_ranges[symbol][1]), 'pivot_go_down_2x'] = True
-    
-    df['pivot_go_up_3x'] = False
-    df['pivot_go_down_3x'] = False
-    df.loc[(df['low_pivot_confirmed_3x']) & (df['low_structure_3x']=='HL') & (df['high_structure_3x']=='HH') &  (df['close'] < df['nw_upper']) & (atr_ranges[symbol][0] < df['pct_atr']) & (df['pct_atr'] < atr_ranges[symbol][1]), 'pivot_go_up_3x'] = True
-    df.loc[(df['high_pivot_confirmed_3x']) & (df['high_structure_3x']=='LH') & (df['low_structure_3x']=='LL') & (df['close'] > df['nw_lower']) & (atr_ranges[symbol][0] < df['pct_atr']) & (df['pct_atr'] < atr_ranges[symbol][1]), 'pivot_go_down_3x'] = True
-
-    df['pivot_go_breakout_2x'] = False
-    df['pivot_go_breakdown_2x'] = False
-    df['pivot_go_breakout_3x'] = False
-    df['pivot_go_breakdown_3x'] = False
-    
-    df.loc[(df['low_pivot_confirmed_2x']) & 
-           (df['low_structure_2x']=='HL') & 
-           (df['high_structure_2x']!='HH') & 
-           (df['high_pivot_filled_2x'].notna()) &  
-           (df['close'] > df['high_pivot_filled_2x']) & 
-           (atr_ranges[symbol][0] < df['pct_atr']) & 
-           (df['pct_atr'] < atr_ranges[symbol][1]), 'pivot_go_breakout_2x'] = True
-    
-    df.loc[(df['high_pivot_confirmed_2x']) & 
-           (df['high_structure_2x']=='LH') & 
-           (df['low_structure_2x']!='LL') & 
-           (df['low_pivot_filled_2x'].notna()) &  
-           (df['close'] < df['low_pivot_filled_2x']) & 
-           (atr_ranges[symbol][0] < df['pct_atr']) & 
-           (df['pct_atr'] < atr_ranges[symbol][1]), 'pivot_go_breakdown_2x'] = True
-    
-    df.loc[(df['low_pivot_confirmed_3x']) & 
-           (df['low_structure_3x']=='HL') & 
-           (df['high_structure_3x']!='HH') & 
-           (df['high_pivot_filled_3x'].notna()) &  
-           (df['close'] > df['high_pivot_filled_3x']) & 
-           (atr_ranges[symbol][0] < df['pct_atr']) & 
-           (df['pct_atr'] < atr_ranges[symbol][1]), 'pivot_go_breakout_3x'] = True
-    
-    df.loc[(df['high_pivot_confirmed_3x']) & 
-           (df['high_structure_3x']=='LH') & 
-           (df['low_structure_3x']!='LL') & 
-           (df['low_pivot_filled_3x'].notna()) &  # 
-           (df['close'] < df['low_pivot_filled_3x']) & 
-           (atr_ranges[symbol][0] < df['pct_atr']) & 
-           (df['pct_atr'] < atr_ranges[symbol][1]), 'pivot_go_breakdown_3x'] = True
-    
-    low_atr = atr_ranges[symbol][0]
-    high_atr = atr_ranges[symbol][1]
-    
-    # NaN Control long conditions
-    long_conditions = [
-        ((df['high_pivot_filled_2x'].notna()) & 
-         (df['close'].shift(i) < df['high_pivot_filled_2x'])).fillna(False) 
-        for i in range(1, 11)
-    ]
-    long_shift_condition = pd.concat(long_conditions, axis=1).all(axis=1)
-    
-    second_long_condition = (
-        (df['low_structure_2x'] == 'HL') & 
-        long_shift_condition & 
-        (df['high_structure_2x'] != 'HH') & 
-        (df['high_pivot_filled_2x'].notna()) & 
-        (df['close'] > df['high_pivot_filled_2x']) & 
-        (low_atr < df['pct_atr']) & 
-        (df['pct_atr'] < high_atr) & 
-        (df['pivot_go_breakout_2x'] == False)
-    )
-    
-    # NaN Control short conditions
-    short_conditions = [
-        ((df['low_pivot_filled_2x'].notna()) & 
-         (df['close'].shift(i) > df['low_pivot_filled_2x'])).fillna(False) 
-        for i in range(1, 11)
-    ]
-    short_shift_condition = pd.concat(short_conditions, axis=1).all(axis=1)
-    
-    second_short_condition = (
-        (df['low_structure_2x'] != 'LL') & 
-        short_shift_condition & 
-        (df['high_structure_2x'] == 'LH') & 
-        (df['low_pivot_filled_2x'].notna()) & 
-        (df['close'] < df['low_pivot_filled_2x']) & 
-        (low_atr < df['pct_atr']) & 
-        (df['pct_atr'] < high_atr) & 
-        (df['pivot_go_breakdown_2x'] == False)
+def _feature_zigzag(mult, suffix):
+    def compute(df, symbol, wanted):
+        return atr_zigzag_two_columns(df, atr_col="z", close_col="close", atr_mult=mult, suffix=suffix)
+    return compute
+
+def _feature_signals(df, symbol, wanted):
+    suffixes = [sfx for sfx in ('_2x', '_3x') if any(col.endswith(sfx) for col in wanted)]
+    signals = pivot_signal_kernel(
+        close=df['close'].to_numpy(dtype=float),
+        pct_atr=df['pct_atr'].to_numpy(dtype=float),
+        uptrend=(df['trend_50_200'] == 'uptrend').to_numpy() if 'trend_50_200' in df else None,
+        nw_upper=df['nw_upper'].to_numpy(dtype=float) if 'nw_upper' in df else None,
+        nw_lower=df['nw_lower'].to_numpy(dtype=float) if 'nw_lower' in df else None,
+        pivots={suffix: (df[f'high_pivot_filled{suffix}'].to_numpy(dtype=float),
+                         df[f'low_pivot_filled{suffix}'].to_numpy(dtype=float),
+                         df[f'high_pivot_confirmed{suffix}'].to_numpy(),
+                         df[f'low_pivot_confirmed{suffix}'].to_numpy())
+                for suffix in suffixes},
+        low_atr=atr_ranges[symbol][0],
+        high_atr=atr_ranges[symbol][1],
+        wanted=set(wanted),
     )
-    
-    df.loc[second_long_condition,'pivot_go_breakout_2x'] = True
-    df.loc[second_short_condition,'pivot_go_breakdown_2x'] = True
-    
+    for name, values in signals.items():
+        df[name] = values
+    return df
+
+# (özellik, ürettiği kolonlar, hesaplama) - liste sırası hesaplama (topolojik) sırasıdır
+FEATURES = [
+    ('rsi', ['rsi'], _feature_rsi),
+    ('atr', ['atr', 'pct_atr'], _feature_atr),
+    ('z', ['z', 'pct_z'], _feature_z),
+    ('donchian_20', [f'{name}_20' for name in DONCHIAN_COLUMNS], _feature_donchian(20)),
+    ('donchian_50', [f'{name}_50' for name in DONCHIAN_COLUMNS], _feature_donchian(50)),
+    ('sma', ['sma_50', 'sma_200'], _feature_sma),
+    ('trend', ['trend_50_200'], _feature_trend),
+    ('nw', ['nw', 'nw_upper', 'nw_lower'], _feature_nw),
+    ('zigzag_2x', [f'{c}_2x' for c in ZIGZAG_COLUMNS], _feature_zigzag(2, '_2x')),
+    ('zigzag_3x', [f'{c}_3x' for c in ZIGZAG_COLUMNS], _feature_zigzag(3, '_3x')),
+    ('signals', SIGNAL_COLUMNS, _feature_signals),
+]
+
+def feature_plan(columns=None):
+    """[(hesaplama, istenen kolonlar)]; columns None ise tüm özellikler"""
+    needed = None if columns is None else required_columns(columns)
+    plan = []
+    for _, outputs, compute in FEATURES:
+        wanted = outputs if needed is None else [c for c in outputs if c in needed]
+        if wanted:
+            plan.append((compute, wanted))
+    return plan
+
+# --- Calculations ---
+def calculate_indicators(df, symbol, columns=None):
+    """
+    columns verilirse sadece bu kolonlar ve bağımlılıkları hesaplanır (COLUMN_INPUTS),
+    verilmezse tüm indikatör seti (araştırma / geriye dönük uyum)
+    """
+    for compute, wanted in feature_plan(columns):
+        df = compute(df, symbol, wanted)
     return df
@@ -0,0 +1,258 @@
+"""
+Tur günlüğü (cycle journal): her run_once sonunda tek bir Arrow RecordBatch eklenir (sembol başına bir satır),
+belirli aralıkla bölümlenmiş parquet'e yazılır. Sonradan inceleme (post-mortem) ve offline replay içindir.
+
+Satır içeriği:
+    cycle_id, cycle_time (UTC ms), symbol, signal, unchanged, success, error, elapsed_s
+    phase_<faz>   tur faz süreleri (s): fetch / indicators / signals / tickers / ...
+    position      tur sonundaki active_positions[symbol] (JSON, yoksa null)
+    <feature>     son satır indikatörleri (sayısal -> float64, bool -> bool, diğer -> string)
+
+Dizin düzeni (Hive bölümleme, pyarrow.dataset / DuckDB / BigQuery doğrudan okur):
+    <JOURNAL_DIR>/date=YYYY-MM-DD/hour=HH/part-<ilk tur ms>-<pid>.parquet
+    <JOURNAL_DIR>/date=YYYY-MM-DD/hour=HH/compact-<ilk tur ms>-<son tur ms>.parquet
+- flush: JOURNAL_FLUSH_CYCLES turda bir (varsayılan 1; Cloud Functions'ta instance tur arasında dondurulabilir)
+- yazma önce geçici dosyaya, sonra os.replace (okuyucu yarım dosya görmez)
+- sıkıştırma: süresi geçmiş saat bölümlerindeki küçük dosyalar tek compact dosyada birleştirilir;
+  bölüm başına kilit dosyası ile aynı dizini paylaşan instance'lar aynı bölümü iki kez birleştirmez
+Şema turlar arasında değişebilir (yeni feature, faz); birleştirme ve okuma sırasında kolonlar birleştirilir.
+"""
+import json
+import logging
+import numbers
+import os
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import JOURNAL_DIR, JOURNAL_FLUSH_CYCLES, JOURNAL_COMPACT_MIN_FILES, JOURNAL_COMPACT_EVERY
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:  # pyarrow ilk flush'ta yüklenir (günlük kapalıyken import maliyeti yok)
+    import pyarrow as pa
+
+META_COLUMNS = ('cycle_id', 'cycle_time', 'symbol', 'signal', 'unchanged', 'success', 'error', 'elapsed_s', 'position')
+LOCK_STALE_S = 600  # bu süreden eski sıkıştırma kilidi sahipsiz sayılır
+
+
+def _json_default(value):
+    # numpy skalerleri -> python tipi (state_store.dumps ile aynı)
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(value)}")
+
+
+def partition_path(directory: str, cycle_ms: int) -> str:
+    moment = datetime.fromtimestamp(cycle_ms / 1000, tz=timezone.utc)
+    return os.path.join(directory, f"date={moment:%Y-%m-%d}", f"hour={moment:%H}")
+
+
+def _feature_array(values: List[Any]) -> 'pa.Array':
+    """Sembol değerlerinden kolon: tümü bool -> bool, sayısal -> float64, diğer -> string (None -> null)"""
+    import pyarrow as pa
+    kinds = {type(v) for v in values}
+    kinds.discard(type(None))
+    if kinds and all(issubclass(kind, (bool, np.bool_)) for kind in kinds):
+        return pa.array(values, type=pa.bool_())
+    if all(issubclass(kind, numbers.Real) for kind in kinds):  # python / numpy sayıları
+        return pa.array(values, type=pa.float64(), from_pandas=True)  # NaN -> null
+    return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _concat(tables: List['pa.Table']) -> 'pa.Table':
+    import pyarrow as pa
+    return pa.concat_tables(tables, promote_options='permissive')
+
+
+class CycleJournal:
+    def __init__(self, directory: str = JOURNAL_DIR, flush_cycles: int = JOURNAL_FLUSH_CYCLES,
+                 compact_min_files: int = JOURNAL_COMPACT_MIN_FILES, compact_every: int = JOURNAL_COMPACT_EVERY):
+        self.directory = directory
+        self.flush_cycles = max(1, flush_cycles)
+        self.compact_min_files = compact_min_files
+        self.compact_every = compact_every
+        self._pending: List['pa.RecordBatch'] = []
+        self._flushes = 0
+
+    # --- Kayıt ---
+    def build_batch(self, cycle_ms: int, rows: Dict[str, Optional[Dict]], signals: Dict[str, Optional[str]],
+                    positions: Dict[str, Dict], phases: Dict[str, float], elapsed: float,
+                    unchanged: Iterable[str] = (), error: Optional[str] = None) -> 'pa.RecordBatch':
+        """Bir turun sembol başına satırlarından RecordBatch (sıra rows ile aynı)"""
+        import pyarrow as pa
+        symbols = list(rows)
+        n = len(symbols)
+        skipped = set(unchanged)
+        columns = {
+            'cycle_id': pa.array([f"{cycle_ms}-{os.getpid()}"] * n, type=pa.string()),
+            'cycle_time': pa.array([cycle_ms] * n, type=pa.timestamp('ms', tz='UTC')),
+            'symbol': pa.array(symbols, type=pa.string()),
+            'signal': pa.array([signals.get(s) for s in symbols], type=pa.string()),
+            'unchanged': pa.array([s in skipped for s in symbols], type=pa.bool_()),
+            'success': pa.array([error is None] * n, type=pa.bool_()),
+            'error': pa.array([error] * n, type=pa.string()),
+            'elapsed_s': pa.array([elapsed] * n, type=pa.float64()),
+        }
+        for phase, seconds in phases.items():
+            columns[f'phase_{phase}'] = pa.array([seconds] * n, type=pa.float64())
+        columns['position'] = pa.array([
+            json.dumps(positions[s], default=_json_default, sort_keys=True) if s in positions else None
+            for s in symbols
+        ], type=pa.string())
+
+        # sembol satırlarındaki kolonlar, ilk görülme sırasıyla (satırlar genelde aynı anahtarlara sahiptir)
+        features: Dict[str, None] = {}
+        for row in rows.values():
+            if row and row.keys() != features.keys():
+                features.update(dict.fromkeys(row))
+        records = [rows[s] or {} for s in symbols]
+        for name in features:
+            column = name if name not in columns else f'feature_{name}'
+            columns[column] = _feature_array([record.get(name) for record in records])
+        return pa.RecordBatch.from_pydict(columns)
+
+    def record(self, cycle_ms: int, rows: Dict[str, Optional[Dict]], signals: Dict[str, Optional[str]],
+               positions: Dict[str, Dict], phases: Dict[str, float], elapsed: float,
+               unchanged: Iterable[str] = (), error: Optional[str] = None) -> None:
+        """Turu tampona ekler; flush_cycles dolunca diske yazar"""
+        if not rows:
+            return
+        self._pending.append(self.build_batch(cycle_ms, rows, signals, positions, phases, elapsed, unchanged, error))
+        if len(self._pending) >= self.flush_cycles:
+            self.flush()
+
+    # --- Yazma ---
+    def flush(self) -> List[str]:
+        """Tampondaki turları saat bölümü başına tek part dosyasına yazar; yazılan yolları döndürür"""
+        if not self._pending:
+            return []
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        by_partition: Dict[str, List['pa.Table']] = {}
+        first_ms: Dict[str, int] = {}
+        for batch in self._pending:
+            cycle_ms = batch.column('cycle_time')[0].value
+            path = partition_path(self.directory, cycle_ms)
+            by_partition.setdefault(path, []).append(pa.Table.from_batches([batch]))
+            first_ms.setdefault(path, cycle_ms)
+        self._pending = []
+
+        written = []
+        for path, tables in by_partition.items():
+            os.makedirs(path, exist_ok=True)
+            target = os.path.join(path, f"part-{first_ms[path]}-{os.getpid()}.parquet")
+            self._write(pq, _concat(tables), target)
+            written.append(target)
+
+        self._flushes += 1
+        if self.compact_every > 0 and self._flushes % self.compact_every == 0:
+            self.compact()
+        return written
+
+    @staticmethod
+    def _write(pq, table: 'pa.Table', target: str) -> None:
+        tmp = f"{target}.tmp"
+        pq.write_table(table, tmp, compression='zstd')
+        os.replace(tmp, target)
+
+    def close(self) -> None:
+        self.flush()
+
+    # --- Sıkıştırma ---
+    def compact(self, now_ms: Optional[int] = None) -> List[str]:
+        """
+        Saati geçmiş bölümlerde compact_min_files veya daha fazla dosya varsa hepsi (önceki compact dahil)
+        tek dosyada birleştirilir; içinde bulunulan saat yazılmaya devam ettiği için atlanır
+        """
+        import pyarrow.parquet as pq
+        current = partition_path(self.directory, now_ms if now_ms is not None else int(time.time() * 1000))
+        compacted = []
+        for path in self.partitions():
+            if path == current:
+                continue
+            files = sorted(name for name in os.listdir(path) if name.endswith('.parquet'))
+            if len(files) < max(2, self.compact_min_files):
+                continue
+            lock = os.path.join(path, '.compacting')
+            if not self._acquire(lock):
+                continue
+            try:
+                table = _concat([pq.read_table(os.path.join(path, name)) for name in files]).sort_by('cycle_time')
+                times = table.column('cycle_time')
+                target = os.path.join(path, f"compact-{times[0].value}-{times[-1].value}.parquet")
+                self._write(pq, table, target)
+                for name in files:
+                    if os.path.join(path, name) != target:
+                        os.unlink(os.path.join(path, name))
+                compacted.append(target)
+                logger.info(f"Tur günlüğü sıkıştırıldı: {path} ({len(files)} dosya -> 1, {table.num_rows} satır)")
+            except Exception as e:
+                logger.warning(f"Tur günlüğü sıkıştırma hatası ({path}): {str(e)}")
+            finally:
+                os.unlink(lock)
+        return compacted
+
+    @staticmethod
+    def _acquire(lock: str) -> bool:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > LOCK_STALE_S:
+                    os.unlink(lock)  # yarıda kalmış sıkıştırma; bir sonraki turda tekrar denenir
+            except FileNotFoundError:
+                pass
+            return False
+
+    def partitions(self) -> List[str]:
+        return _partitions(self.directory)
+
+
+def _partitions(directory: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[str]:
+    """date=/hour= bölüm dizinleri (zaman sırasıyla); start/end verilirse aralık dışındaki saatler atlanır"""
+    if not os.path.isdir(directory):
+        return []
+    lo = partition_path(directory, start_ms) if start_ms is not None else None
+    hi = partition_path(directory, end_ms) if end_ms is not None else None
+    paths = []
+    for day in sorted(os.listdir(directory)):
+        if not day.startswith('date='):
+            continue
+        for hour in sorted(os.listdir(os.path.join(directory, day))):
+            path = os.path.join(directory, day, hour)
+            if hour.startswith('hour=') and (lo is None or path >= lo) and (hi is None or path <= hi):
+                paths.append(path)
+    return paths
+
+
+def read_journal(directory: str = JOURNAL_DIR, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+                 symbols: Optional[List[str]] = None, columns: Optional[List[str]] = None) -> 'pa.Table':
+    """
+    [start_ms, end_ms] aralığındaki turlar (cycle_time sıralı); bölüm adlarıyla saat bazında budanır,
+    symbols verilirse parquet satır grubu filtresiyle okunur. columns: META kolonlarına ek istenen kolonlar.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    filters = [('symbol', 'in', list(symbols))] if symbols else None
+    tables = []
+    for path in _partitions(directory, start_ms, end_ms):
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.parquet'):
+                tables.append(pq.read_table(os.path.join(path, name), filters=filters))
+    if not tables:
+        return pa.table({})
+    table = _concat(tables)
+    if columns is not None:
+        table = table.select([c for c in (*META_COLUMNS, *columns) if c in table.column_names])
+    if start_ms is not None:
+        table = table.filter(pc.greater_equal(table['cycle_time'], pa.scalar(start_ms, pa.timestamp('ms', tz='UTC'))))
+    if end_ms is not None:
+        table = table.filter(pc.less_equal(table['cycle_time'], pa.scalar(end_ms, pa.timestamp('ms', tz='UTC'))))
+    return table.sort_by([('cycle_time', 'ascending'), ('symbol', 'ascending')])
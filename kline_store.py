@@ -0,0 +1,250 @@
+"""
+Sembol/interval başına memory-mapped kline ring buffer'ı (süreçler arası ortak piyasa verisi).
+
+Dosya düzeni (tümü little-endian, sabit genişlik):
+    başlık   int64[8]                 magic, version, capacity, count, seq, interval_ms, last_time, reserved
+    time     int64[2 * capacity]      bar açılış zamanı (ms)
+    ohlcv    float64[5, 2 * capacity] open, high, low, close, volume (kolon bazlı)
+
+Her bar hem slot'una hem slot + capacity'ye yazılır (ayna); böylece son n bar her zaman
+tek parça (contiguous) bir dilimdir ve okuyucu onu tek kopyayla (n x 6 değer) alır.
+
+Eşzamanlılık:
+- yazıcılar dosya üzerinde fcntl.flock ile sıraya girer
+- okuyucular kilitsizdir; seq alanı (seqlock) yazım sırasında tektir. Son n bar iki seq okuması
+  arasında kopyalanır, seq değiştiyse kopya atılıp tekrarlanır: dönen diziler buffer'dan bağımsızdır,
+  başka süreçteki yazıcının oluşan mum güncellemesi yarım satır (yeni high + eski close) üretemez
+"""
+import fcntl
+import logging
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from config import INTERVAL, KLINE_STORE_DIR, KLINE_STORE_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:  # DataFrame görünümü sadece frame() ile; arrays() pandas yüklemez
+    import pandas as pd
+
+MAGIC = 0x4B4C5242  # 'KLRB'
+VERSION = 1
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+HEADER_FIELDS = ('magic', 'version', 'capacity', 'count', 'seq', 'interval_ms', 'last_time', 'reserved')
+HEADER_BYTES = len(HEADER_FIELDS) * 8
+_H = {name: i for i, name in enumerate(HEADER_FIELDS)}
+
+
+def _file_size(capacity: int) -> int:
+    return HEADER_BYTES + 2 * capacity * 8 * (1 + len(COLUMNS))
+
+
+def _frame_times_ms(df: 'pd.DataFrame') -> np.ndarray:
+    """DatetimeIndex (ns veya ms) -> int64 ms"""
+    return np.asarray(df.index.as_unit('ms').asi8, dtype=np.int64)
+
+
+class KlineRingBuffer:
+    """Tek sembol/interval için sabit kapasiteli, memory-mapped OHLCV halkası"""
+
+    def __init__(self, path: str, capacity: Optional[int] = None, interval_ms: int = 0, readonly: bool = False):
+        self.path = path
+        if not os.path.exists(path):
+            if capacity is None or readonly:
+                raise FileNotFoundError(f"Kline buffer bulunamadı: {path}")
+            self._create(path, capacity, interval_ms)
+
+        self.readonly = readonly
+        self._mm = np.memmap(path, dtype=np.uint8, mode='r' if readonly else 'r+')
+        self._header = self._mm[:HEADER_BYTES].view(np.int64)
+        if self._header[_H['magic']] != MAGIC or self._header[_H['version']] != VERSION:
+            raise ValueError(f"Geçersiz kline buffer dosyası: {path}")
+
+        self.capacity = int(self._header[_H['capacity']])
+        if self._mm.size != _file_size(self.capacity):
+            raise ValueError(f"Kline buffer boyutu bozuk: {path}")
+        width = 2 * self.capacity
+        self._times = self._mm[HEADER_BYTES:HEADER_BYTES + width * 8].view(np.int64)
+        self._data = self._mm[HEADER_BYTES + width * 8:].view(np.float64).reshape(len(COLUMNS), width)
+        self._lock_fd: Optional[int] = None
+
+    @staticmethod
+    def _create(path: str, capacity: int, interval_ms: int) -> None:
+        """Boş buffer'ı geçici dosyada hazırlar ve os.link ile atomik olarak yerine koyar (varsa dokunmaz)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.truncate(_file_size(capacity))
+            header = np.zeros(len(HEADER_FIELDS), dtype=np.int64)
+            header[[_H['magic'], _H['version'], _H['capacity'], _H['interval_ms']]] = [MAGIC, VERSION, capacity, interval_ms]
+            f.write(header.tobytes())
+        try:
+            os.link(tmp_path, path)  # başka süreç önce oluşturduysa FileExistsError
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+
+    def close(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self._mm._mmap.close()
+
+    def __len__(self) -> int:
+        return int(min(self._header[_H['count']], self.capacity))
+
+    @property
+    def last_time(self) -> Optional[int]:
+        return int(self._header[_H['last_time']]) if self._header[_H['count']] else None
+
+    def _lock(self) -> int:
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.path, os.O_RDONLY if self.readonly else os.O_RDWR)
+        return self._lock_fd
+
+    # --- Yazma ---
+    def append(self, times: np.ndarray, ohlcv: np.ndarray) -> int:
+        """
+        Kronolojik barları ekler (times: int64 ms, ohlcv: (5, n) veya (n, 5) float64).
+        last_time'dan eski barlar atlanır, aynı zaman damgalı bar son slot'u günceller.
+        Dönüş: eklenen yeni bar sayısı.
+        """
+        if self.readonly:
+            raise PermissionError(f"Salt okunur kline buffer: {self.path}")
+        times = np.asarray(times, dtype=np.int64)
+        ohlcv = np.asarray(ohlcv, dtype=np.float64)
+        if ohlcv.shape[0] != len(COLUMNS):
+            ohlcv = ohlcv.T
+        header = self._header
+        fcntl.flock(self._lock(), fcntl.LOCK_EX)
+        try:
+            count = int(header[_H['count']])
+            last = int(header[_H['last_time']]) if count else None
+            start = 0 if last is None else int(np.searchsorted(times, last, side='left'))
+            appended = 0
+
+            if header[_H['seq']] % 2 == 0:  # tek kalmışsa önceki yazıcı yarıda ölmüş
+                header[_H['seq']] += 1  # tek: yazım sürüyor
+            for i in range(start, len(times)):
+                if last is not None and times[i] == last:
+                    index = count - 1          # oluşan mum güncellemesi
+                else:
+                    index = count
+                    count += 1
+                    appended += 1
+                    last = int(times[i])
+                slot = index % self.capacity
+                for offset in (slot, slot + self.capacity):
+                    self._times[offset] = times[i]
+                    self._data[:, offset] = ohlcv[:, i]
+            header[_H['count']] = count
+            if last is not None:
+                header[_H['last_time']] = last
+            header[_H['seq']] += 1  # çift: tutarlı
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        return appended
+
+    def append_frame(self, df: 'pd.DataFrame') -> int:
+        """exchange.get_ohlcv formatındaki DataFrame'i ekler"""
+        return self.append(_frame_times_ms(df), df[list(COLUMNS)].to_numpy(dtype=np.float64).T)
+
+    def append_arrays(self, arrays: Dict[str, np.ndarray]) -> int:
+        """exchange.klines_to_arrays formatındaki KlineArrays sözlüğünü ekler"""
+        return self.append(arrays['time'], np.vstack([arrays[col] for col in COLUMNS]))
+
+    # --- Okuma ---
+    def latest(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Son n barın (time[n], ohlcv[5, n]) kopyası; seqlock ile tutarlı anlık görüntü"""
+        header = self._header
+        while True:
+            seq = int(header[_H['seq']])
+            if seq % 2 and not self._writer_dead():
+                continue
+            count = int(header[_H['count']])
+            size = min(count, self.capacity) if n is None else min(n, count, self.capacity)
+            start = (count - size) % self.capacity
+            times = self._times[start:start + size].copy()
+            data = self._data[:, start:start + size].copy()
+            if int(header[_H['seq']]) == seq:
+                return times, data
+
+    def _writer_dead(self) -> bool:
+        """seq tek: yazıcı bitene kadar bekler; kilit alındığında hâlâ tekse yazıcı yarıda ölmüştür"""
+        fcntl.flock(self._lock(), fcntl.LOCK_SH)
+        fcntl.flock(self._lock(), fcntl.LOCK_UN)
+        return bool(self._header[_H['seq']] % 2)
+
+    def arrays(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """{'time': int64 ms, 'open': ..., 'volume': ...} (latest kopyasının satırları)"""
+        times, data = self.latest(n)
+        arrays = {'time': times}
+        arrays.update(zip(COLUMNS, data))
+        return arrays
+
+    def frame(self, n: Optional[int] = None) -> 'pd.DataFrame':
+        """Son n bar; exchange.get_ohlcv ile aynı kolonlar, veri ve indeks latest() kopyasını paylaşır"""
+        import pandas as pd
+        times, data = self.latest(n)
+        index = pd.DatetimeIndex(times.view('datetime64[ms]'), copy=False, name='time')
+        return pd.DataFrame(data.T, columns=list(COLUMNS), index=index, copy=False)
+
+
+class KlineStore:
+    """Bir klasördeki <SYMBOL>_<interval>.klrb buffer'ları; indikatörlerin ortak yerel veri katmanı"""
+
+    def __init__(self, root: str = KLINE_STORE_DIR, interval: str = INTERVAL,
+                 capacity: int = KLINE_STORE_CAPACITY, readonly: bool = False):
+        self.root = root
+        self.interval = interval
+        self.capacity = capacity
+        self.readonly = readonly
+        self._buffers: Dict[str, KlineRingBuffer] = {}
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol}_{self.interval}.klrb")
+
+    def buffer(self, symbol: str) -> KlineRingBuffer:
+        if symbol not in self._buffers:
+            self._buffers[symbol] = KlineRingBuffer(
+                self.path(symbol), capacity=self.capacity, interval_ms=int(self.interval) * 60_000,
+                readonly=self.readonly
+            )
+        return self._buffers[symbol]
+
+    def write(self, frames: Dict[str, Optional['pd.DataFrame']]) -> Dict[str, int]:
+        """Çekilen mumları (DataFrame veya KlineArrays) ilgili buffer'lara ekler; {sembol: yeni bar sayısı}"""
+        written = {}
+        for symbol, data in frames.items():
+            if isinstance(data, dict):
+                if len(data['time']):
+                    written[symbol] = self.buffer(symbol).append_arrays(data)
+            elif data is not None and not data.empty:
+                written[symbol] = self.buffer(symbol).append_frame(data)
+        return written
+
+    def frame(self, symbol: str, n: Optional[int] = None) -> Optional['pd.DataFrame']:
+        try:
+            buf = self.buffer(symbol)
+        except FileNotFoundError:
+            return None
+        return buf.frame(n) if len(buf) else None
+
+    def arrays(self, symbol: str, n: Optional[int] = None) -> Optional[Dict[str, np.ndarray]]:
+        """frame() ile aynı barlar, KlineArrays olarak (pandas'sız canlı yol)"""
+        try:
+            buf = self.buffer(symbol)
+        except FileNotFoundError:
+            return None
+        return buf.arrays(n) if len(buf) else None
+
+    def frames(self, symbols: Iterable[str], n: Optional[int] = None) -> Dict[str, Optional['pd.DataFrame']]:
+        return {symbol: self.frame(symbol, n) for symbol in symbols}
+
+    def close(self) -> None:
+        for buf in self._buffers.values():
+            buf.close()
+        self._buffers.clear()
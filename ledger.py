@@ -0,0 +1,418 @@
+"""
+İşlem defteri (execution ledger): pozisyon kapandıktan sonra gerçekleşen PnL, komisyon ve planlanan seviyelere
+göre kayma kaydı (monitor_oco_orders pozisyonu sildiğinde bot bu bilgiyi kaybeder).
+
+- Her turda (hesap başına) get_executions ve get_closed_pnl sadece imleçten sonraki kayıtlar için çağrılır;
+  imleç (taranan son an + örtüşme penceresinde görülen kimlikler) diskte tutulur, geçmiş yeniden çekilmez
+- İlk senkron LEDGER_LOOKBACK_DAYS geriden başlar; Bybit aralığı en fazla 7 gün olduğundan pencerelere bölünür
+- PositionManager kapanan pozisyonu expect() ile bildirir (planlanan giriş / TP / SL ve TP, SL, kapatma emir id'leri).
+  Kapanan PnL kaydı kapanış emrinin id'siyle bu bildirime, yoksa henüz silinmemiş pozisyonun OCO emirlerine,
+  yoksa aynı sembolün eşlenmemiş bildirimine eşlenir; hiçbiri değilse çıkış sebebi EXTERNAL
+  (likidasyon, borsa arayüzünden kapatma, bot kapalıyken kapanış)
+- Kayıtlar parquet'e eklenir (pyarrow ilk senkronda yüklenir):
+    <LEDGER_DIR>/<hesap>/trades/part-<ns>-<pid>.parquet       işlem başına kompakt kayıt
+    <LEDGER_DIR>/<hesap>/executions/part-<ns>-<pid>.parquet   ham dolumlar
+    <LEDGER_DIR>/<hesap>/cursor.json                          imleçler + eşlenmeyi bekleyen kapanışlar
+- Önce parquet, sonra imleç yazılır: arada kesilirse kayıtlar tekrar çekilir, okumada kimlikle tekilleştirilir
+- summary(by='symbol' | 'exit_reason' | 'direction'): bellekteki tablo üzerinde pyarrow group_by
+
+İşlem kaydı: trade_id (kapanış emri), closed_time, symbol, direction, exit_reason, qty,
+planned_entry / take_profit / stop_loss (bot bildirimi), avg_entry / avg_exit (borsa), gross_pnl,
+fees (gross - realised), realised_pnl (borsa closedPnl), entry_slippage_bps / exit_slippage_bps
+(pozitif = aleyhte; çıkış kayması TP/SL seviyesine göre), exit_fee / exit_fills / exit_maker, entry_order_id
+"""
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from accounts import PRIMARY_ACCOUNT
+from config import LEDGER_DIR, LEDGER_LOOKBACK_DAYS, LEDGER_OVERLAP_S, LEDGER_COMPACT_FILES
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:  # pyarrow ilk senkronda yüklenir (defter kapalıyken import maliyeti yok)
+    import pyarrow as pa
+
+DAY_MS = 86_400_000
+WINDOW_MS = 7 * DAY_MS        # Bybit geçmiş uç noktalarında endTime - startTime en fazla 7 gün
+PAGE_LIMIT = 100              # get_executions / get_closed_pnl sayfa üst sınırı
+PENDING_TTL_MS = 7 * DAY_MS   # eşlenmeyen kapanış bildirimi bu süreden sonra düşülür
+
+# akış -> (pybit metodu, kayıt zaman alanı, kayıt kimliği alanı)
+STREAMS = {
+    'executions': ('get_executions', 'execTime', 'execId'),
+    'closed_pnl': ('get_closed_pnl', 'updatedTime', 'orderId'),
+}
+# veri seti -> (tekilleştirme kolonu, zaman kolonu)
+DATASETS = {
+    'trades': ('trade_id', 'closed_time'),
+    'executions': ('exec_id', 'exec_time'),
+}
+
+
+def _schema(dataset: str) -> 'pa.Schema':
+    import pyarrow as pa
+    ts = pa.timestamp('ms', tz='UTC')
+    if dataset == 'executions':
+        return pa.schema([
+            ('exec_id', pa.string()), ('exec_time', ts), ('symbol', pa.string()), ('order_id', pa.string()),
+            ('order_link_id', pa.string()), ('side', pa.string()), ('order_type', pa.string()),
+            ('price', pa.float64()), ('qty', pa.float64()), ('fee', pa.float64()), ('is_maker', pa.bool_()),
+            ('closed_size', pa.float64()),
+        ])
+    return pa.schema([
+        ('trade_id', pa.string()), ('closed_time', ts), ('symbol', pa.string()), ('direction', pa.string()),
+        ('exit_reason', pa.string()), ('qty', pa.float64()), ('planned_entry', pa.float64()),
+        ('take_profit', pa.float64()), ('stop_loss', pa.float64()), ('avg_entry', pa.float64()),
+        ('avg_exit', pa.float64()), ('gross_pnl', pa.float64()), ('fees', pa.float64()),
+        ('realised_pnl', pa.float64()), ('entry_slippage_bps', pa.float64()), ('exit_slippage_bps', pa.float64()),
+        ('exit_fee', pa.float64()), ('exit_fills', pa.int64()), ('exit_maker', pa.bool_()),
+        ('entry_order_id', pa.string()),
+    ])
+
+
+def _num(value: Any) -> Optional[float]:
+    """Bybit string / numpy sayısı -> float ('' ve None -> None)"""
+    return float(value) if value not in (None, '') else None
+
+
+def _slippage_bps(planned: Optional[float], actual: float, sign: int) -> Optional[float]:
+    """planned'a göre kayma (bps); sign: fiyatın yükselmesi aleyhteyse +1 (LONG giriş, SHORT çıkış)"""
+    if not planned:
+        return None
+    return round(sign * (actual - planned) / planned * 1e4, 4)
+
+
+def _dedupe(table: 'pa.Table', key: str) -> 'pa.Table':
+    """key kolonunda tekrar eden satırların ilki (tekrar çekilen kayıtlar)"""
+    import pyarrow.compute as pc
+    if table.num_rows == 0 or pc.count_distinct(table[key]).as_py() == table.num_rows:
+        return table
+    seen = set()
+    keep = [i for i, value in enumerate(table[key].to_pylist()) if not (value in seen or seen.add(value))]
+    return table.take(keep)
+
+
+def read_ledger(directory: str = LEDGER_DIR, account: str = PRIMARY_ACCOUNT, dataset: str = 'trades') -> 'pa.Table':
+    """Hesabın 'trades' veya 'executions' veri seti (tekilleştirilmiş, zaman sıralı)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    key, time_column = DATASETS[dataset]
+    path = os.path.join(directory, account, dataset)
+    files = sorted(name for name in os.listdir(path) if name.endswith('.parquet')) if os.path.isdir(path) else []
+    if not files:
+        return _schema(dataset).empty_table()
+    table = pa.concat_tables([pq.read_table(os.path.join(path, name)) for name in files],
+                             promote_options='permissive')
+    return _dedupe(table, key).sort_by(time_column)
+
+
+def summarize(trades: 'pa.Table', by: str = 'symbol') -> Dict[str, Dict[str, Any]]:
+    """İşlem kayıtlarının by kolonuna göre toplamı: işlem sayısı, kazanma oranı, PnL, komisyon, ortalama kayma"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    if trades.num_rows == 0:
+        return {}
+    trades = trades.append_column('win', pc.cast(pc.greater(trades['realised_pnl'], 0), pa.int64()))
+    grouped = trades.group_by(by).aggregate([
+        ('trade_id', 'count'), ('win', 'sum'), ('realised_pnl', 'sum'), ('gross_pnl', 'sum'), ('fees', 'sum'),
+        ('entry_slippage_bps', 'mean'), ('exit_slippage_bps', 'mean'),
+    ])
+    summary = {}
+    for row in grouped.to_pylist():
+        count = row['trade_id_count']
+        summary[row[by]] = {
+            'trades': count,
+            'win_rate': round(row['win_sum'] / count, 4),
+            'realised_pnl': round(row['realised_pnl_sum'], 6),
+            'gross_pnl': round(row['gross_pnl_sum'], 6),
+            'fees': round(row['fees_sum'], 6),
+            'avg_entry_slippage_bps': None if row['entry_slippage_bps_mean'] is None else round(row['entry_slippage_bps_mean'], 4),
+            'avg_exit_slippage_bps': None if row['exit_slippage_bps_mean'] is None else round(row['exit_slippage_bps_mean'], 4),
+        }
+    return summary
+
+
+class ExecutionLedger:
+    def __init__(self, session, account: str, directory: str = LEDGER_DIR,
+                 lookback_days: float = LEDGER_LOOKBACK_DAYS, overlap_s: int = LEDGER_OVERLAP_S,
+                 compact_files: int = LEDGER_COMPACT_FILES, clock: Callable[[], float] = time.time):
+        """session: hesabın senkron oturumu; clock: kayıt zamanlarıyla aynı saat (simülatörde borsa saati)"""
+        self.session = session
+        self.account = account
+        self.root = directory
+        self.directory = os.path.join(directory, account)
+        self.lookback_ms = int(lookback_days * DAY_MS)
+        self.overlap_ms = overlap_s * 1000
+        self.compact_files = compact_files
+        self.clock = clock
+        self.state_path = os.path.join(self.directory, 'cursor.json')
+        self.state = self._load_state()
+        self.last_sync: Dict[str, int] = {}
+        self._tables: Dict[str, 'pa.Table'] = {}  # veri seti -> bellekteki tablo (ilk okumada diskten)
+
+    # --- Durum (imleç + bekleyen kapanışlar) ---
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"İşlem defteri imleci okunamadı, ilk senkron gibi başlanıyor: {str(e)}")
+            state = {}
+        state.setdefault('cursors', {})
+        state.setdefault('pending', [])
+        return state
+
+    def _save_state(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def expect(self, symbol: str, position: Dict, reason: str, close_order_id: Optional[str] = None) -> None:
+        """
+        Bot tarafından kapatılan / TP-SL'si tetiklenen pozisyon (silinmeden önce): planlanan seviyeler ve
+        kapanışı yapabilecek emir id'leri -> çıkış sebebi. Kapanan PnL kaydı gelince işlem kaydına eşlenir
+        """
+        oco = position.get('oco_pair') or {}
+        orders = {}
+        if oco.get('tp_order_id'):
+            orders[oco['tp_order_id']] = 'TP'
+        if oco.get('sl_order_id'):
+            orders[oco['sl_order_id']] = 'SL'
+        if close_order_id:
+            orders[close_order_id] = reason
+        self.state['pending'].append({
+            'symbol': symbol,
+            'direction': position.get('direction'),
+            'entry_price': _num(position.get('entry_price')),
+            'take_profit': _num(position.get('take_profit')),
+            'stop_loss': _num(position.get('stop_loss')),
+            'entry_order_id': position.get('order_id'),
+            'orders': orders,
+            'reason': reason,
+            'time': int(self.clock() * 1000),
+            'matched': False,
+        })
+        self._save_state()
+
+    # --- Senkron ---
+    def sync(self, positions: Optional[Dict[str, Dict]] = None) -> Dict[str, int]:
+        """
+        İmleçten sonraki dolumlar ve kapanan PnL kayıtları çekilir, işlem kayıtları üretilip diske eklenir.
+        positions: hesabın active_positions'ı (kapanışı henüz monitor_oco_orders'ta görülmemiş pozisyonlar için)
+        """
+        now_ms = int(self.clock() * 1000)
+        executions, executions_cursor = self._fetch('executions', now_ms)
+        closed, closed_cursor = self._fetch('closed_pnl', now_ms)
+
+        fills = self._order_fills(executions, {record['orderId'] for record in closed})
+        trades = [self._trade(record, positions or {}, fills)
+                  for record in sorted(closed, key=lambda record: int(record['updatedTime']))]
+        self._append('executions', [self._execution_row(record) for record in executions])
+        self._append('trades', trades)
+
+        self.state['cursors'].update(executions=executions_cursor, closed_pnl=closed_cursor)
+        self.state['pending'] = [pending for pending in self.state['pending'] if pending['time'] >= now_ms - PENDING_TTL_MS]
+        self._save_state()
+
+        self.last_sync = {'executions': len(executions), 'trades': len(trades)}
+        if trades:
+            closed = ', '.join(f"{trade['symbol']} {trade['exit_reason']} {trade['realised_pnl']:+.4f}" for trade in trades)
+            logger.info(f"📒 {self.account} işlem defteri: {len(trades)} yeni işlem | {closed}")
+        return self.last_sync
+
+    def _fetch(self, stream: str, now_ms: int) -> Tuple[List[Dict], Dict]:
+        """
+        Akışın imleçten sonraki kayıtları (7 günlük pencereler, sayfalı) ve yeni imleç. Her senkron taranan
+        son andan LEDGER_OVERLAP_S geriden başlar; örtüşmedeki kayıtlar zamana değil kimliğe göre
+        tekilleştirilir (görülen kimlikler zamanlarıyla imleçte), geç yayınlanan eski kayıtlar da alınır.
+        İmleç yerel saatin ilerisindeyse (saat kayması, geri yüklenen durum) başlangıç şimdiye göre sıkıştırılır
+        """
+        method, time_key, id_key = STREAMS[stream]
+        cursor = self.state['cursors'].get(stream) or {'scanned': now_ms - self.lookback_ms, 'seen': {}}
+        if 'seen' not in cursor:  # eski imleç biçimi: {'time', 'ids', 'scanned'}
+            cursor = {'scanned': cursor['scanned'], 'seen': {key: cursor['time'] for key in cursor['ids']}}
+        seen = cursor['seen']
+        records: Dict[str, Dict] = {}
+
+        start = min(cursor['scanned'], now_ms) - self.overlap_ms
+        while True:
+            end = min(start + WINDOW_MS, now_ms)
+            page = None
+            while True:
+                query = dict(category='linear', startTime=start, endTime=end, limit=PAGE_LIMIT)
+                if page:
+                    query['cursor'] = page
+                response = getattr(self.session, method)(**query)
+                if response['retCode'] != 0:
+                    raise Exception(f"{method} hatası: {response['retMsg']}")
+                items = response['result'].get('list') or []
+                for record in items:
+                    if record[id_key] not in seen:
+                        records[record[id_key]] = record
+                page = response['result'].get('nextPageCursor')
+                if not page or not items:
+                    break
+            if end >= now_ms:
+                break
+            start = end
+
+        horizon = now_ms - self.overlap_ms  # sonraki senkronun başlangıcı; daha eski kimlikler tekrar gelmez
+        seen = {key: moment for key, moment in seen.items() if moment >= horizon}
+        seen.update((key, int(record[time_key])) for key, record in records.items()
+                    if int(record[time_key]) >= horizon)
+        return list(records.values()), {'scanned': now_ms, 'seen': seen}
+
+    # --- İşlem kaydı ---
+    def _order_fills(self, executions: List[Dict], order_ids: set) -> Dict[str, Tuple[float, int, bool]]:
+        """Kapanış emirlerinin dolum özeti {orderId: (komisyon, dolum sayısı, hepsi maker)}; önceki senkronlarda
+        gelmiş dolumlar diskteki tablodan alınır"""
+        fills: Dict[str, Tuple[float, int, bool]] = {}
+        for record in executions:
+            if record['orderId'] in order_ids:
+                fee, count, maker = fills.get(record['orderId'], (0.0, 0, True))
+                fills[record['orderId']] = (fee + float(record['execFee']), count + 1,
+                                            maker and str(record.get('isMaker')).lower() == 'true')
+        missing = order_ids - fills.keys()
+        if missing:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            stored = self.table('executions')
+            stored = stored.filter(pc.is_in(stored['order_id'], value_set=pa.array(sorted(missing), pa.string())))
+            for row in stored.select(['order_id', 'fee', 'is_maker']).to_pylist():
+                fee, count, maker = fills.get(row['order_id'], (0.0, 0, True))
+                fills[row['order_id']] = (fee + row['fee'], count + 1, maker and bool(row['is_maker']))
+        return fills
+
+    def _match(self, order_id: str, symbol: str, positions: Dict[str, Dict]) -> Tuple[Dict, str]:
+        """Kapanan PnL kaydının planı (bot bildirimi veya aktif pozisyon) ve çıkış sebebi"""
+        for pending in self.state['pending']:
+            if order_id in pending['orders']:
+                pending['matched'] = True
+                return pending, pending['orders'][order_id]
+        position = positions.get(symbol)
+        if position:  # TP/SL dolmuş ama monitor_oco_orders henüz görmedi
+            oco = position.get('oco_pair') or {}
+            for key, reason in (('tp_order_id', 'TP'), ('sl_order_id', 'SL')):
+                if oco.get(key) == order_id:
+                    return {
+                        'entry_price': _num(position.get('entry_price')),
+                        'take_profit': _num(position.get('take_profit')),
+                        'stop_loss': _num(position.get('stop_loss')),
+                        'entry_order_id': position.get('order_id'),
+                    }, reason
+        for pending in self.state['pending']:
+            if pending['symbol'] == symbol and not pending['matched']:
+                pending['matched'] = True
+                return pending, pending['reason']
+        return {}, 'EXTERNAL'
+
+    def _trade(self, record: Dict, positions: Dict[str, Dict], fills: Dict[str, Tuple[float, int, bool]]) -> Dict:
+        """Kapanan PnL kaydı (kapanış emri başına) -> işlem kaydı; record['side'] kapanış emrinin yönüdür"""
+        order_id = record['orderId']
+        symbol = record['symbol']
+        direction = 'LONG' if record['side'] == 'Sell' else 'SHORT'
+        sign = 1 if direction == 'LONG' else -1
+        plan, reason = self._match(order_id, symbol, positions)
+
+        qty = _num(record.get('closedSize')) or float(record['qty'])
+        avg_entry = float(record['avgEntryPrice'])
+        avg_exit = float(record['avgExitPrice'])
+        gross = sign * (avg_exit - avg_entry) * qty
+        realised = float(record['closedPnl'])
+        target = plan.get('take_profit') if reason == 'TP' else plan.get('stop_loss') if reason == 'SL' else None
+        exit_fee, exit_fills, exit_maker = fills.get(order_id, (None, 0, None))
+        return {
+            'trade_id': order_id,
+            'closed_time': int(record['updatedTime']),
+            'symbol': symbol,
+            'direction': direction,
+            'exit_reason': reason,
+            'qty': qty,
+            'planned_entry': plan.get('entry_price'),
+            'take_profit': plan.get('take_profit'),
+            'stop_loss': plan.get('stop_loss'),
+            'avg_entry': avg_entry,
+            'avg_exit': avg_exit,
+            'gross_pnl': gross,
+            'fees': gross - realised,
+            'realised_pnl': realised,
+            'entry_slippage_bps': _slippage_bps(plan.get('entry_price'), avg_entry, sign),
+            'exit_slippage_bps': _slippage_bps(target, avg_exit, -sign),
+            'exit_fee': exit_fee,
+            'exit_fills': exit_fills,
+            'exit_maker': exit_maker,
+            'entry_order_id': plan.get('entry_order_id'),
+        }
+
+    @staticmethod
+    def _execution_row(record: Dict) -> Dict:
+        return {
+            'exec_id': record['execId'],
+            'exec_time': int(record['execTime']),
+            'symbol': record['symbol'],
+            'order_id': record['orderId'],
+            'order_link_id': record.get('orderLinkId') or None,
+            'side': record['side'],
+            'order_type': record.get('orderType'),
+            'price': float(record['execPrice']),
+            'qty': float(record['execQty']),
+            'fee': float(record['execFee']),
+            'is_maker': str(record.get('isMaker')).lower() == 'true',
+            'closed_size': _num(record.get('closedSize')),
+        }
+
+    # --- Depolama ---
+    def _append(self, dataset: str, rows: List[Dict]) -> None:
+        """Satırları yeni bir part dosyasına yazar (geçici dosya + os.replace); bellekteki tablo da güncellenir"""
+        if not rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pylist(rows, schema=_schema(dataset))
+        path = os.path.join(self.directory, dataset)
+        os.makedirs(path, exist_ok=True)
+        self._write(pq, table, os.path.join(path, f"part-{time.time_ns()}-{os.getpid()}.parquet"))
+        if dataset in self._tables:
+            key, time_column = DATASETS[dataset]
+            self._tables[dataset] = _dedupe(pa.concat_tables([self._tables[dataset], table]), key).sort_by(time_column)
+        if self.compact_files > 0:
+            self.compact(dataset)
+
+    @staticmethod
+    def _write(pq, table: 'pa.Table', target: str) -> None:
+        tmp = f"{target}.tmp"
+        pq.write_table(table, tmp, compression='zstd')
+        os.replace(tmp, target)
+
+    def compact(self, dataset: str) -> Optional[str]:
+        """compact_files veya daha fazla part dosyası varsa hepsi tek dosyada birleştirilir (tekilleştirilmiş)"""
+        import pyarrow.parquet as pq
+        path = os.path.join(self.directory, dataset)
+        files = sorted(name for name in os.listdir(path) if name.endswith('.parquet'))
+        if len(files) < max(2, self.compact_files):
+            return None
+        table = read_ledger(self.root, self.account, dataset)
+        target = os.path.join(path, f"compact-{time.time_ns()}-{os.getpid()}.parquet")
+        self._write(pq, table, target)
+        for name in files:
+            os.unlink(os.path.join(path, name))
+        logger.info(f"İşlem defteri sıkıştırıldı: {path} ({len(files)} dosya -> 1, {table.num_rows} satır)")
+        return target
+
+    # --- Okuma / toplama ---
+    def table(self, dataset: str = 'trades') -> 'pa.Table':
+        """Veri setinin bellekteki tablosu (ilk çağrıda diskten okunur, sonra senkronlarla güncellenir)"""
+        if dataset not in self._tables:
+            self._tables[dataset] = read_ledger(self.root, self.account, dataset)
+        return self._tables[dataset]
+
+    def summary(self, by: str = 'symbol') -> Dict[str, Dict[str, Any]]:
+        """Sembol / çıkış sebebi / yön bazında toplam (diski yeniden okumaz)"""
+        return summarize(self.table('trades'), by)
@@ -0,0 +1,208 @@
+"""
+TradingBot yük testi: sentetik sembol evreni + açık pozisyon defteri ile simülatör üzerinde tekrarlı turlar.
+
+Her evren büyüklüğü için throughput, p50/p99 tur süresi, tur başına API çağrısı ve
+faz süreleri (fetch, indicators, signals, tickers, manage_positions, execute_trades) raporlanır;
+p99'un bar aralığına (bütçe) oranı run_once'ın turu ne zaman sığdıramadığını gösterir.
+
+Kullanım:
+    python loadtest.py                                        # 20 / 100 / 500 sembol, gecikmesiz
+    python loadtest.py --sizes 20 100 500 --latency 0.02      # çağrı başına 20ms
+    python loadtest.py --sizes 100 --positions 0.5 --signal-rate 0.1 --async --json sonuc.json
+    python loadtest.py --sizes 100 --latency 0.02 --tail-rate 0.01 --tail-latency 3 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+import config
+import entry_strategies
+from simulator import REFERENCE_PRICES, SimulatedBybitHTTP, create_simulated_bot, synthetic_frames
+
+logger = logging.getLogger(__name__)
+
+# Sentetik semboller bu şablonların ayarlarını (ATR/Z aralıkları, yuvarlama, giriş listeleri) kopyalar
+TEMPLATE_PRICES = REFERENCE_PRICES
+
+PHASES = ('fetch', 'indicators', 'signals', 'tickers', 'prearm', 'manage_positions', 'execute_trades', 'journal')
+
+
+def register_symbols(count: int) -> Dict[str, str]:
+    """
+    count adet sentetik sembolü config sözlüklerine ve giriş listelerine şablonlarından kopyalar.
+    Modüller bu nesneleri 'from config import ...' ile paylaştığı için yerinde güncellenir.
+    Dönüş: {sembol: şablon}
+    """
+    templates = list(TEMPLATE_PRICES)
+    universe = {}
+    for i in range(count):
+        template = templates[i % len(templates)]
+        symbol = f"SYN{i:04d}USDT"
+        universe[symbol] = template
+        for table in (config.atr_ranges, config.Z_RANGES, config.ROUND_NUMBERS,
+                      config.TP_ROUND_NUMBERS, config.SYMBOL_SETTINGS):
+            if template in table:
+                table.setdefault(symbol, table[template])
+        for pairs in (entry_strategies.LONG_PAIRS_2X, entry_strategies.SHORT_PAIRS_2X):
+            if template in pairs and symbol not in pairs:
+                pairs.append(symbol)
+    return universe
+
+
+def seed_positions(exchange: SimulatedBybitHTTP, symbols: List[str], fraction: float, seed: int = 0) -> int:
+    """Sembollerin fraction kadarında market pozisyon + reduceOnly TP (Limit) / SL (stop) emri açar"""
+    rng = random.Random(seed)
+    opened = 0
+    for symbol in rng.sample(symbols, int(round(len(symbols) * fraction))):
+        price = exchange.last_price(symbol)
+        digits = config.ROUND_NUMBERS[symbol]
+        qty = max(round(config.RISK_PER_TRADE_USDT / (3 * price * 0.005), digits), 10.0 ** -digits)
+        long = rng.random() < 0.5
+        side, exit_side = ('Buy', 'Sell') if long else ('Sell', 'Buy')
+        tp, sl = (price * 1.015, price * 0.985) if long else (price * 0.985, price * 1.015)
+
+        exchange.place_order(category='linear', symbol=symbol, side=side, orderType='Market', qty=str(qty))
+        exchange.place_order(category='linear', symbol=symbol, side=exit_side, orderType='Limit',
+                             qty=str(qty), price=str(tp), reduceOnly=True, timeInForce='GTC')
+        exchange.place_order(category='linear', symbol=symbol, side=exit_side, orderType='Market',
+                             qty=str(qty), triggerPrice=str(sl), triggerDirection=2 if long else 1,
+                             triggerBy='LastPrice', reduceOnly=True)
+        opened += 1
+    return opened
+
+
+def force_signals(bot, rate: float, seed: int = 0) -> None:
+    """_generate_signals sonucuna sinyalsiz sembollerde rate olasılıkla LONG/SHORT ekler (execute_trades yükü)"""
+    rng = random.Random(seed)
+    generate = bot._generate_signals
+
+    def _generate_with_forced(all_data):
+        signals = generate(all_data)
+        for symbol, signal in signals.items():
+            if signal is None and all_data.get(symbol) and rng.random() < rate:
+                signals[symbol] = rng.choice(('LONG', 'SHORT'))
+        return signals
+
+    bot._generate_signals = _generate_with_forced
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return round(float(np.percentile(values, q)), 4) if values else 0.0
+
+
+def run_size(size: int, args) -> Dict[str, Any]:
+    """Tek evren büyüklüğü için botu kurar, args.cycles tur çalıştırır ve istatistik döndürür"""
+    universe = register_symbols(size)
+    symbols = list(universe)
+    bases = {symbol: TEMPLATE_PRICES[template] for symbol, template in universe.items()}
+    frames = synthetic_frames(symbols, args.warmup + args.cycles + 1, seed=args.seed, bases=bases)
+
+    exchange = SimulatedBybitHTTP(frames, start=args.warmup, latency=args.latency, tail_rate=args.tail_rate,
+                                  tail_latency=args.tail_latency, seed=args.seed)
+    positions = seed_positions(exchange, symbols, args.positions, args.seed)
+    exchange.calls.clear()
+
+    devnull = open(os.devnull, 'w')
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(devnull):
+        bot = create_simulated_bot(exchange, args.use_async)
+    init_s = time.perf_counter() - t0
+    init_calls = sum(exchange.calls.values())
+    exchange.calls.clear()
+    if args.signal_rate:
+        force_signals(bot, args.signal_rate, args.seed)
+    exchange.error_rate = args.error_rate  # hatalar sadece ölçülen turlarda
+
+    durations, calls, failures = [], [], 0
+    phases: Dict[str, List[float]] = {name: [] for name in PHASES}
+    for _ in range(args.cycles):
+        exchange.advance()
+        before = sum(exchange.calls.values())  # tur başına çağrı
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            result = asyncio.run(bot.run_once_async()) if args.use_async else bot.run_once()
+        durations.append(time.perf_counter() - t0)
+        calls.append(sum(exchange.calls.values()) - before)
+        failures += not result['success']
+        for name in PHASES:
+            phases[name].append(result.get('phases', {}).get(name, 0.0))
+    devnull.close()
+
+    total = sum(durations)
+    p99 = _percentile(durations, 99)
+    return {
+        'symbols': size,
+        'positions_start': positions,
+        'positions_end': len(bot.position_manager.active_positions),
+        'cycles': len(durations),
+        'failed_cycles': failures,
+        'init_s': round(init_s, 4),
+        'init_api_calls': init_calls,
+        'cycles_per_s': round(len(durations) / total, 3) if total else None,
+        'symbols_per_s': round(size * len(durations) / total, 1) if total else None,
+        'cycle_p50_s': _percentile(durations, 50),
+        'cycle_p99_s': p99,
+        'cycle_max_s': round(max(durations), 4) if durations else 0.0,
+        'api_calls_per_cycle': round(float(np.mean(calls)), 1) if calls else 0.0,
+        'api_calls_by_method': {m: round(n / max(len(durations), 1), 1) for m, n in exchange.calls.items()},
+        'phase_mean_s': {name: round(float(np.mean(v)), 4) for name, v in phases.items()},
+        'phase_p99_s': {name: _percentile(v, 99) for name, v in phases.items()},
+        'budget_used_pct': round(p99 / args.budget * 100, 2),
+        'fills': len(exchange.fills),
+        'api_health': bot.resilience.snapshot() if bot.resilience else None,
+    }
+
+
+def print_table(rows: List[Dict[str, Any]], budget: float) -> None:
+    print(f"Bütçe (bar aralığı): {budget:.0f}s")
+    header = (f"{'sembol':>7} {'poz':>5} {'p50':>8} {'p99':>8} {'tur/s':>7} {'çağrı':>7} "
+              + ' '.join(f"{name[:10]:>10}" for name in PHASES) + f" {'bütçe%':>7}")
+    print(header)
+    for r in rows:
+        print(f"{r['symbols']:>7} {r['positions_start']:>5} {r['cycle_p50_s']:>8.3f} {r['cycle_p99_s']:>8.3f} "
+              f"{r['cycles_per_s'] or 0:>7.2f} {r['api_calls_per_cycle']:>7.1f} "
+              + ' '.join(f"{r['phase_mean_s'][name]:>10.4f}" for name in PHASES)
+              + f" {r['budget_used_pct']:>7.2f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 500], help='Sembol evreni büyüklükleri')
+    parser.add_argument('--cycles', type=int, default=20, help='Büyüklük başına tur sayısı')
+    parser.add_argument('--warmup', type=int, default=250, help='İlk turdan önce görünen bar sayısı')
+    parser.add_argument('--positions', type=float, default=0.3, help='Başlangıçta açık pozisyonlu sembol oranı')
+    parser.add_argument('--signal-rate', type=float, default=0.0, help='Tur başına zorla üretilen sinyal oranı')
+    parser.add_argument('--latency', type=float, default=0.0, help='Çağrı başına gecikme (s)')
+    parser.add_argument('--tail-rate', type=float, default=0.0, help='Gecikme kuyruğu olasılığı')
+    parser.add_argument('--tail-latency', type=float, default=0.0, help='Kuyruktaki çağrıya eklenen gecikme (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Çağrı başına enjekte hata oranı')
+    parser.add_argument('--budget', type=float, default=int(config.INTERVAL) * 60, help='Tur bütçesi (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--async', dest='use_async', action='store_true', help='run_once_async kullan')
+    parser.add_argument('--json', help='Sonuçları bu dosyaya yaz')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger().setLevel(logging.ERROR)  # main import'undaki INFO yapılandırmasını bastırır
+
+    rows = []
+    for size in args.sizes:
+        rows.append(run_size(size, args))
+        print(f"{size} sembol tamamlandı: p99 {rows[-1]['cycle_p99_s']:.3f}s", flush=True)
+
+    print_table(rows, args.budget)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -1,12 +1,21 @@
+import time
+_MODULE_START = time.perf_counter()
+
 import functions_framework
+import asyncio
+import importlib
 import logging
-import time
-from typing import Dict, Optional
-from config import SYMBOLS, INTERVAL
-from exchange import BybitFuturesAPI
-from indicators import calculate_indicators
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from bar_clock import next_bar_close, since_bar_close
+from config import (SYMBOLS, INTERVAL, ASYNC_EXECUTION, BATCH_INDICATORS, PRUNE_INDICATORS, KLINE_STORE_DIR,
+                    CLOSED_BAR_MODE, INDICATOR_CACHE_SIZE, INDICATOR_CACHE_DIR, INDICATOR_WORKERS, PROFILING_ENABLED,
+                    TICKER_PRICING, RESILIENCE_ENABLED, NUMPY_CORE, JOURNAL_DIR, CALIBRATION_DIR, ACCOUNT_SETTINGS,
+                    PREWARM_COMMIT_BARS, PREWARM_COMMIT_DELAY_S, PREWARM_MAX_WAIT_S, PREWARM_MAX_SLEEP_S,
+                    FUNCTION_TIMEOUT_S, CYCLE_BUDGET_S)
+import entry_strategies
 from entry_strategies import check_long_entry, check_short_entry
-from position_manager import PositionManager
 
 # Cloud Logging için yapılandırma (dosyaya yazmaz, Cloud Console'a gider)
 logging.basicConfig(
@@ -15,116 +24,362 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Ağır modüller (pandas, numpy, pybit) ilk ihtiyaçta yüklenir; süreler cold start profili için tutulur.
+# NUMPY_CORE açıkken canlı yol pandas'ı hiç yüklemez (indicators/batch_indicators sadece araştırma adaptörü)
+HEAVY_MODULES = (
+    ('exchange', 'np_indicators', 'position_manager') if NUMPY_CORE
+    else ('exchange', 'indicators', 'batch_indicators', 'position_manager')
+)
+
+STARTUP_PROFILE = {
+    'module_import': None,  # main.py'nin kendi import süresi (s)
+    'imports': {},          # {modül: yükleme süresi (s)}
+    'init': {},             # TradingBot.__init__ adımları (s)
+    'init_api_calls': 0,    # __init__ sırasında yapılan API çağrısı sayısı
+}
+
+_bot: Optional['TradingBot'] = None  # Sıcak instance'larda yeniden kullanılır
+
+
+def _import_heavy_modules() -> None:
+    """HEAVY_MODULES'ü yükler ve her birinin süresini STARTUP_PROFILE'a yazar"""
+    for name in HEAVY_MODULES:
+        if name in STARTUP_PROFILE['imports']:
+            continue
+        t0 = time.perf_counter()
+        importlib.import_module(name)
+        STARTUP_PROFILE['imports'][name] = round(time.perf_counter() - t0, 4)
+
+
 class TradingBot:
-    def __init__(self, testnet: bool = False):
-        self.api = BybitFuturesAPI(testnet=testnet)
-        self.position_manager = PositionManager(self.api.session)
-        self.symbols = SYMBOLS
+    def __init__(self, testnet: bool = False, session=None, async_session=None, state_store=None, symbols=None,
+                 accounts: Optional[Dict[str, Dict]] = None):
+        """
+        session / async_session: pybit HTTP ve AsyncBybitHTTP yerine geçen istemciler (örn. simulator)
+        state_store: verilmezse config.STATE_STORE'a göre oluşturulur; symbols: verilmezse config.SYMBOLS
+        accounts: alt hesap tablosu, verilmezse config.ACCOUNT_SETTINGS (kayıtlarda simulator oturumları olabilir)
+        """
+        _import_heavy_modules()
+        from exchange import BybitFuturesAPI
+        import position_manager
+        from accounts import PRIMARY_ACCOUNT, Account, create_account, fan_out
+
+        self.testnet = testnet
+        self.init_profile: Dict[str, float] = {}
+
+        t0 = time.perf_counter()
+        self.api = BybitFuturesAPI(testnet=testnet, session=session)
+        # Deadline / retry / hedge / devre kesici: tüm çağrılar (veri, emir, OCO) aynı durumu paylaşır
+        self.resilience = None
+        if RESILIENCE_ENABLED:
+            from resilience import ResilienceState, ResilientSession
+            self.resilience = ResilienceState()
+            self.api.session = ResilientSession(self.api.session, self.resilience)
+        self.symbols = list(symbols) if symbols else SYMBOLS
+        # Ana hesap + alt hesaplar: her biri kendi oturumu, PositionManager'ı, durum deposu ve koşullu girişleriyle
+        self.account = Account(PRIMARY_ACCOUNT, self.api.session, self.symbols, state_store=state_store,
+                               async_session=async_session, resilience=self.resilience)
+        self.accounts = [self.account]
+        for name, entry in (ACCOUNT_SETTINGS if accounts is None else accounts).items():
+            try:
+                self.accounts.append(create_account(name, entry, self.symbols, testnet))
+            except Exception as e:
+                logger.error(f"❌ [{name}] hesabı açılamadı, atlanıyor: {str(e)}")
+        self.position_manager = self.account.position_manager
+        self.armer = self.account.armer
         self.interval = INTERVAL
-        self._initialize_account()
-        self._load_existing_positions()
+        # Giriş + pozisyon yönetiminin okuduğu kolonlar (None: tüm indikatör seti)
+        self.feature_columns = (
+            entry_strategies.REQUIRED_COLUMNS + position_manager.REQUIRED_COLUMNS if PRUNE_INDICATORS else None
+        )
+        self.init_profile['session'] = round(time.perf_counter() - t0, 4)
+        
+        # Kapanmış bar modu: son kapanmış barın parmak izi ve o bardaki son satır (sıcak instance'da korunur)
+        self.clock = time.time  # simülatörde borsa saati ile değiştirilir
+        self.bar_fingerprints: Dict[str, tuple] = {}
+        self.last_rows: Dict[str, Optional[Dict]] = {}
+        
+        # prewarm() ile bar kapanışından önce hazırlanan kline penceresi (sonraki tur sadece son barları çeker)
+        self.prewarmed: Dict[str, Any] = {}
+        
+        # Aynı barlar için indikatör sonucu önbelleği (retry / tekrar tetikleme)
+        self.indicator_cache = None
+        if INDICATOR_CACHE_SIZE > 0 or INDICATOR_CACHE_DIR:
+            from indicator_cache import IndicatorCache
+            self.indicator_cache = IndicatorCache(interval=self.interval)
+        
+        # Çok çekirdekli indikatör havuzu (işçiler burada başlatılır, turda süreç açılmaz)
+        self.indicator_pool = None
+        if INDICATOR_WORKERS > 0 and NUMPY_CORE:
+            from indicator_pool import IndicatorPool
+            t0 = time.perf_counter()
+            self.indicator_pool = IndicatorPool()
+            self.init_profile['indicator_pool'] = round(time.perf_counter() - t0, 4)
+        
+        # Ortak kline ring buffer'ları (diğer süreçler aynı veriyi yeniden parse etmeden okur)
+        self.kline_store = None
+        if KLINE_STORE_DIR:
+            from kline_store import KlineStore
+            self.kline_store = KlineStore(KLINE_STORE_DIR, self.interval)
 
-    def _initialize_account(self):
-        """ByBit için hesap ayarlarını yapılandır"""
-        from config import LEVERAGE
-        for symbol in self.symbols:
+        # Tur günlüğü (feature / sinyal / pozisyon / süre; bölümlenmiş parquet)
+        self.journal = None
+        if JOURNAL_DIR:
+            from journal import CycleJournal
+            self.journal = CycleJournal(JOURNAL_DIR)
+
+        # pct_atr akış kantilleri -> versiyonlu atr_ranges / Z_RANGES (güncel versiyon burada uygulanır)
+        self.calibrator = None
+        if CALIBRATION_DIR:
+            from calibration import Calibrator
+            self.calibrator = Calibrator(CALIBRATION_DIR, self.interval)
+
+        t0 = time.perf_counter()
+        fan_out(self.accounts, Account.initialize)
+        self.init_profile['initialize_account'] = round(time.perf_counter() - t0, 4)
+
+        t0 = time.perf_counter()
+        fan_out(self.accounts, Account.load_positions)
+        self.init_profile['load_existing_positions'] = round(time.perf_counter() - t0, 4)
+
+    @property
+    def init_api_calls(self) -> int:
+        """Hesapların başlangıç (kaldıraç + pozisyon keşfi) API çağrıları toplamı"""
+        return sum(account.init_api_calls for account in self.accounts)
+
+    def sync_positions(self):
+        """Sıcak instance'da yeniden kullanılan bot için pozisyonları borsadan tazeler (tüm hesaplar)"""
+        from accounts import Account, fan_out
+        fan_out(self.accounts, Account.sync_positions)
+
+    def supervise(self) -> Dict:
+        """
+        Bar kapanışları arasındaki denetim (daemon): her hesapta OCO tetiklenmeleri ve dolan koşullu girişler
+        run_once ile aynı metotlarla işlenir; durumu değişen hesap depoya yazılır (hesap hataları birbirinden bağımsız)
+        """
+        from accounts import Account, fan_out
+        results = fan_out(self.accounts, Account.supervise)
+        done = [result for result in results.values() if not isinstance(result, Exception)]
+        if not done:
+            raise results[self.account.name]
+        return {
+            'changed': any(result['changed'] for result in done),
+            'positions': sum(result['positions'] for result in done),
+            'armed_entries': sum(result['armed_entries'] for result in done)
+        }
+
+    def checkpoint(self):
+        """Pozisyon durumu + tamponda bekleyen tur günlüğü diske (daemon periyodik / kapanışta)"""
+        self._persist_positions()
+        if self.journal is not None:
             try:
-                self.api.session.set_leverage(
-                    category="linear",
-                    symbol=symbol,
-                    buyLeverage=str(LEVERAGE),
-                    sellLeverage=str(LEVERAGE)
-                )
-                logger.info(f"{symbol} kaldıraç ayarlandı: {LEVERAGE}x")
+                self.journal.flush()
             except Exception as e:
-                if "leverage not modified" in str(e):
-                    logger.debug(f"{symbol} kaldıraç zaten {LEVERAGE}x olarak ayarlı")
-                else:
-                    logger.warning(f"{symbol} kaldıraç ayarlama uyarısı: {str(e)}")
+                logger.warning(f"Tur günlüğü flush hatası: {str(e)}")
+
+    def _persist_positions(self):
+        """Her hesabın active_positions'ı kendi durum deposuna (hata hesap içinde loglanır)"""
+        for account in self.accounts:
+            account.persist()
+
+    @staticmethod
+    def _mark_phase(phases: Dict[str, float], name: str, t0: float) -> float:
+        """phases[name] = t0'dan bu yana geçen süre; sonraki fazın başlangıcını döndürür"""
+        now = time.perf_counter()
+        phases[name] = round(now - t0, 4)
+        return now
+
+    def _get_market_data_batch(self) -> Dict[str, Optional[Dict]]:
+        """Tüm sembollerin verilerini tek seferde al"""
+        all_data = self._share_klines(self._fetch_klines())
+        return self._compute_market_data(all_data)
+
+    def prewarm(self) -> Dict:
+        """
+        Bar kapanışından önce (?mode=prewarm): tam kline penceresi KlineStore'dan (yeterince güncelse) veya
+        borsadan alınıp bellekte tutulur; kapanıştaki tur sadece son PREWARM_COMMIT_BARS barı çekip pencereye
+        ekler. Oturum ve pozisyon uzlaştırması get_bot()'ta yapılır
+        """
+        from exchange import KLINE_LIMIT
+        from np_indicators import n_bars, bar_times_ms
+        t0 = time.perf_counter()
+        window = {}
+        if self.kline_store is not None:
+            read = self.kline_store.arrays if NUMPY_CORE else self.kline_store.frame
+            interval_ms = int(self.interval) * 60_000
+            # commit'in çektiği ilk bar (kapanıştan PREWARM_COMMIT_BARS - 1 bar önce) pencerede olmalı
+            boundary_ms = (int(self.clock() * 1000) // interval_ms + 1) * interval_ms
+            oldest_ms = boundary_ms - (PREWARM_COMMIT_BARS - 1) * interval_ms
+            for symbol in self.symbols:
+                try:
+                    data = read(symbol, KLINE_LIMIT)
+                except Exception as e:
+                    logger.warning(f"{symbol} kline store okunamadı, borsadan çekilecek: {str(e)}")
+                    continue
+                if n_bars(data) == KLINE_LIMIT and bar_times_ms(data)[-1] >= oldest_ms:
+                    window[symbol] = data
+        from_store = len(window)
+        
+        missing = [symbol for symbol in self.symbols if symbol not in window]
+        if missing:
+            window.update(self.api.get_multiple_ohlcv(missing, self.interval, as_arrays=NUMPY_CORE))
+        self.prewarmed = {symbol: window[symbol] for symbol in self.symbols if n_bars(window.get(symbol))}
+        
+        summary = {
+            'symbols': len(self.prewarmed),
+            'from_store': from_store,
+            'fetched': len(missing),
+            'elapsed': round(time.perf_counter() - t0, 4)
+        }
+        logger.info(f"🔥 Ön ısıtma tamamlandı | {summary}")
+        return summary
+
+    def _merge_prewarmed(self, base: Dict, recent: Dict) -> Tuple[Dict, List[str]]:
+        """prewarm penceresi + son barlar; birleşemeyen semboller (pencere yok / arada eksik bar) ikinci değerde"""
+        from exchange import KLINE_LIMIT
+        from np_indicators import merge_bars
+        merged, stale = {}, []
+        for symbol in self.symbols:
+            merged[symbol] = merge_bars(base.get(symbol), recent.get(symbol), KLINE_LIMIT)
+            if merged[symbol] is None:
+                stale.append(symbol)
+        if stale:
+            logger.info(f"Ön ısıtma penceresi kullanılamadı, tam çekiliyor: {', '.join(stale)}")
+        return merged, stale
 
-    def _load_existing_positions(self):
-        """Bybit'teki mevcut pozisyonları bot hafızasına yükle"""
+    def _fetch_klines(self) -> Dict:
+        """
+        Tüm sembollerin kline penceresi; prewarm() sonrası ilk turda sadece son PREWARM_COMMIT_BARS bar
+        çekilip pencereye eklenir (pencere tek tur kullanılır, birleşemeyen semboller tam çekilir)
+        """
+        base, self.prewarmed = self.prewarmed, {}
+        if not base:
+            return self.api.get_multiple_ohlcv(self.symbols, self.interval, as_arrays=NUMPY_CORE)
+        recent = self.api.get_multiple_ohlcv(self.symbols, self.interval, limit=PREWARM_COMMIT_BARS, as_arrays=NUMPY_CORE)
+        merged, stale = self._merge_prewarmed(base, recent)
+        if stale:
+            merged.update(self.api.get_multiple_ohlcv(stale, self.interval, as_arrays=NUMPY_CORE))
+        return merged
+
+    async def _fetch_klines_async(self, api) -> Dict:
+        """_fetch_klines'ın AsyncBybitFuturesAPI karşılığı"""
+        base, self.prewarmed = self.prewarmed, {}
+        if not base:
+            return await api.get_multiple_ohlcv(self.symbols, self.interval, as_arrays=NUMPY_CORE)
+        recent = await api.get_multiple_ohlcv(self.symbols, self.interval, limit=PREWARM_COMMIT_BARS, as_arrays=NUMPY_CORE)
+        merged, stale = self._merge_prewarmed(base, recent)
+        if stale:
+            merged.update(await api.get_multiple_ohlcv(stale, self.interval, as_arrays=NUMPY_CORE))
+        return merged
+
+    def _since_bar_close(self) -> float:
+        """Son bar kapanışından bu yana geçen süre (s); commit turunun karar gecikmesi"""
+        return since_bar_close(self.clock(), int(self.interval) * 60)
+
+    def _share_klines(self, raw_data: Dict) -> Dict:
+        """
+        KLINE_STORE_DIR tanımlıysa çekilen mumlar ortak ring buffer'a yazılır ve indikatörler
+        buffer'ın tutarlı anlık görüntüsünden hesaplanır; hata olursa çekilen veriyle devam edilir
+        """
+        if self.kline_store is None:
+            return raw_data
+        from np_indicators import n_bars
+        read = self.kline_store.arrays if NUMPY_CORE else self.kline_store.frame
         try:
-            positions = self.api.session.get_positions(category='linear', settleCoin='USDT')
-            if positions['retCode'] == 0:
-                for pos in positions['result']['list']:
-                    if float(pos.get('size', 0)) > 0:
-                        symbol = pos['symbol']
-                        direction = 'LONG' if pos['side'] == 'Buy' else 'SHORT'
-                        quantity = float(pos['size'])
-                        
-                        oco_pair = self._find_tp_sl_orders(symbol, direction, quantity)
-                        
-                        position_data = {
-                            'symbol': symbol,
-                            'direction': direction,
-                            'entry_price': float(pos['avgPrice']),
-                            'quantity': quantity,
-                            'take_profit': float(pos['takeProfit']) if pos['takeProfit'] else None,
-                            'stop_loss': float(pos['stopLoss']) if pos['stopLoss'] else None,
-                            'order_id': None
-                        }
-                        
-                        if oco_pair:
-                            position_data['oco_pair'] = oco_pair
-                            logger.info(f"{symbol} pozisyon + TP/SL emirleri yüklendi: {direction}")
-                        else:
-                            logger.warning(f"{symbol} pozisyon yüklendi ama TP/SL emirleri bulunamadı")
-                        
-                        self.position_manager.active_positions[symbol] = position_data
-                        
+            self.kline_store.write(raw_data)
+            return {
+                symbol: read(symbol, n_bars(df)) if n_bars(df) else df
+                for symbol, df in raw_data.items()
+            }
         except Exception as e:
-            logger.error(f"Mevcut pozisyonlar yüklenirken hata: {e}")
-    
-    def _find_tp_sl_orders(self, symbol: str, direction: str, quantity: float) -> Optional[Dict]:
-        """Belirli bir pozisyon için açık TP/SL emirlerini bulur"""
-        try:
-            orders = self.api.session.get_open_orders(category='linear', symbol=symbol)
-            
-            if orders['retCode'] != 0:
-                return None
-            
-            tp_order_id = None
-            sl_order_id = None
-            expected_side = "Sell" if direction == "LONG" else "Buy"
-            
-            for order in orders['result']['list']:
-                if order['side'] != expected_side:
-                    continue
-                
-                order_qty = float(order['qty'])
-                if abs(order_qty - quantity) > quantity * 0.01:
-                    continue
-                
-                if order['orderType'] == 'Limit' and order.get('reduceOnly'):
-                    tp_order_id = order['orderId']
-                elif order['orderType'] == 'Market' and order.get('triggerPrice'):
-                    sl_order_id = order['orderId']
+            logger.warning(f"Kline store yazma/okuma hatası, çekilen veri kullanılıyor: {str(e)}")
+            return raw_data
+
+    def _select_changed_bars(self, raw_data: Dict) -> Tuple[Dict, List[str]]:
+        """
+        CLOSED_BAR_MODE: Bybit listesindeki oluşmakta olan mum atılır ve son kapanmış bar
+        (zaman + OHLCV) parmak iziyle önceki turla karşılaştırılır.
+        Dönüş: (indikatörü hesaplanacak semboller -> kapanmış barlar, değişmeyen semboller)
+        """
+        if not CLOSED_BAR_MODE:
+            return raw_data, []
+        from np_indicators import n_bars, bar_times_ms, head, last_ohlcv
+        
+        now_ms = int(self.clock() * 1000)
+        interval_ms = int(self.interval) * 60_000
+        fresh, unchanged = {}, []
+        for symbol, df in raw_data.items():
+            if not n_bars(df):
+                fresh[symbol] = df
+                continue
+            times = bar_times_ms(df)
+            if times[-1] + interval_ms > now_ms:  # bar henüz kapanmadı
+                df, times = head(df, -1), times[:-1]
+            if not n_bars(df):
+                fresh[symbol] = df
+                continue
             
-            if tp_order_id and sl_order_id:
-                return {
-                    'symbol': symbol,
-                    'tp_order_id': tp_order_id,
-                    'sl_order_id': sl_order_id,
-                    'active': True
-                }
+            fingerprint = (int(times[-1]), *last_ohlcv(df))
+            if self.bar_fingerprints.get(symbol) == fingerprint and symbol in self.last_rows:
+                unchanged.append(symbol)
             else:
-                logger.warning(f"{symbol} TP/SL emirleri eksik - TP: {tp_order_id}, SL: {sl_order_id}")
-                return None
-                
+                self.bar_fingerprints[symbol] = fingerprint
+                fresh[symbol] = df
+        
+        if unchanged:
+            logger.info(f"Yeni kapanmış bar yok, indikatör/sinyal atlandı: {', '.join(unchanged)}")
+        return fresh, unchanged
+
+    def _merge_unchanged(self, raw_data: Dict, all_data: Dict, signals: Dict, unchanged: List[str]):
+        """
+        Değişmeyen semboller için önceki turun satırı kullanılır ve sinyal üretilmez
+        (aynı bar için tekrar giriş / TP-SL güncellemesi yapılmaz); sıra raw_data ile aynıdır
+        """
+        if not CLOSED_BAR_MODE:
+            return all_data, signals
+        
+        self.last_rows.update(all_data)
+        skipped = set(unchanged)
+        return (
+            {symbol: self.last_rows.get(symbol) if symbol in skipped else all_data.get(symbol) for symbol in raw_data},
+            {symbol: None if symbol in skipped else signals.get(symbol) for symbol in raw_data},
+        )
+
+    def _compute_market_data(self, all_data: Dict) -> Dict[str, Optional[Dict]]:
+        """Son satır indikatörleri; önbellekte aynı bar + parametre için kayıt varsa o kullanılır"""
+        if self.indicator_cache is None:
+            return self._calculate_rows(all_data)
+        from np_indicators import n_bars
+        
+        valid = {symbol: df for symbol, df in all_data.items() if n_bars(df)}
+        try:
+            rows = self.indicator_cache.latest_rows(valid, self.feature_columns, self._calculate_rows)
         except Exception as e:
-            logger.error(f"{symbol} TP/SL emirleri aranırken hata: {e}")
-            return None
+            logger.warning(f"İndikatör önbellek hatası, önbelleksiz hesaplanıyor: {str(e)}")
+            return self._calculate_rows(all_data)
+        return {symbol: rows.get(symbol) for symbol in all_data}
 
-    def _get_market_data_batch(self) -> Dict[str, Optional[Dict]]:
-        """Tüm sembollerin verilerini tek seferde al"""
-        all_data = self.api.get_multiple_ohlcv(self.symbols, self.interval)
+    def _calculate_rows(self, all_data: Dict) -> Dict[str, Optional[Dict]]:
+        """Çekilen mum verilerinden her sembol için son satır indikatörlerini hesapla"""
+        if NUMPY_CORE:
+            return self._calculate_rows_numpy(all_data)
+        from indicators import calculate_indicators
         results = {}
         
+        if BATCH_INDICATORS:
+            # Tüm semboller tek (symbols x bars) blokta; hata olursa sembol bazlı hesaplamaya düşer
+            from batch_indicators import latest_rows_batch
+            valid = {symbol: df for symbol, df in all_data.items() if df is not None and not df.empty}
+            try:
+                rows = latest_rows_batch(valid, self.feature_columns)
+                return {symbol: rows.get(symbol) for symbol in all_data}
+            except Exception as e:
+                logger.warning(f"Toplu indikatör hesaplama hatası, sembol bazlı hesaplamaya geçiliyor: {str(e)}")
+        
         for symbol, df in all_data.items():
             if df is not None and not df.empty:
                 try:
-                    df = calculate_indicators(df, symbol)
+                    df = calculate_indicators(df, symbol, self.feature_columns)
                     results[symbol] = df.iloc[-1].to_dict()
                 except Exception as e:
                     logger.error(f"{symbol} indicator hatası: {str(e)}")
@@ -133,6 +388,28 @@ class TradingBot:
                 results[symbol] = None
         return results
 
+    def _calculate_rows_numpy(self, all_data: Dict) -> Dict[str, Optional[Dict]]:
+        """
+        _calculate_rows'un KlineArrays karşılığı (np_indicators, pandas'sız); INDICATOR_WORKERS > 0 ise
+        süreç havuzunda, hata sembol bazlı ele alınır
+        """
+        from np_indicators import latest_rows, n_bars
+        valid = {symbol: data for symbol, data in all_data.items() if n_bars(data)}
+        try:
+            if self.indicator_pool is not None:
+                rows = self.indicator_pool.latest_rows(valid, self.feature_columns)
+            else:
+                rows = latest_rows(valid, self.feature_columns)
+        except Exception as e:
+            logger.warning(f"Toplu indikatör hesaplama hatası, sembol bazlı hesaplamaya geçiliyor: {str(e)}")
+            rows = {}
+            for symbol, data in valid.items():
+                try:
+                    rows.update(latest_rows({symbol: data}, self.feature_columns))
+                except Exception as e:
+                    logger.error(f"{symbol} indicator hatası: {str(e)}")
+        return {symbol: rows.get(symbol) for symbol in all_data}
+
     def _generate_signals(self, all_data: Dict[str, Optional[Dict]]) -> Dict[str, Optional[str]]:
         """Toplu veriden sinyal oluştur"""
         signals = {}
@@ -149,83 +426,457 @@ class TradingBot:
                 signals[symbol] = None
         return signals
 
-    def _execute_trades(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]]):
-        """Sinyallere göre işlem aç"""
+    def _apply_ticker_prices(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]],
+                             tickers: Dict[str, Dict[str, float]]) -> Dict[str, Optional[Dict]]:
+        """
+        Sinyalli semboller için satıra 'entry_price' ekler: LONG -> ask, SHORT -> bid
+        (yoksa last, o da yoksa kline close); boyutlama ve TP/SL bu fiyattan yapılır
+        """
+        priced = dict(all_data)
         for symbol, signal in signals.items():
-            if not signal or not all_data.get(symbol):
+            data = all_data.get(symbol)
+            if not signal or not data:
                 continue
-    
-            data = all_data[symbol]
-            
-            self.position_manager.open_position(
-                symbol=symbol,
-                direction=signal,
-                entry_price=data['close'],
-                atr_value=data['atr'],
-                pct_atr=data['pct_atr']
+            ticker = tickers.get(symbol, {})
+            price = ticker.get('ask' if signal == 'LONG' else 'bid') or ticker.get('last')
+            if price:
+                logger.info(f"{symbol} giriş fiyatı ticker'dan: {price} (kline close: {data['close']})")
+                priced[symbol] = dict(data, entry_price=price)
+        return priced
+
+    def _sync_armed_entries(self, raw_data: Dict, all_data: Dict[str, Optional[Dict]], signals: Dict[str, Optional[str]]):
+        """
+        PREARM_ENTRIES: dolan koşullu girişler pozisyona dönüştürülür (manage_positions'tan önce), sonra
+        sinyalsiz ve pozisyonsuz semboller için oluşan barın kırılım seviyesine emir kurulur / güncellenir.
+        Seviyeler bir kez hesaplanır; her hesap sadece kendi sembollerinde ve pozisyonu olmayanlarda emir kurar
+        """
+        from accounts import fan_out
+        from entry_arming import trigger_levels
+        from np_indicators import n_bars, bar_times_ms
+        try:
+            stats = Counter()
+            for result in fan_out(self.accounts, lambda account: account.armer.reconcile(account.symbols)).values():
+                if not isinstance(result, Exception):
+                    stats.update(result)
+            
+            directions = {}
+            for symbol in self.symbols:
+                if (not all_data.get(symbol) or signals.get(symbol) or n_bars(raw_data.get(symbol)) < 2
+                        or not any(symbol in account.symbols and symbol not in account.position_manager.active_positions
+                                   for account in self.accounts)):
+                    continue
+                sides = [direction for direction, pairs in (('LONG', entry_strategies.LONG_PAIRS_2X),
+                                                            ('SHORT', entry_strategies.SHORT_PAIRS_2X))
+                         if symbol in pairs]
+                if sides:
+                    directions[symbol] = sides
+            
+            now_ms = int(self.clock() * 1000)
+            interval_ms = int(self.interval) * 60_000
+            forming = {symbol: int(bar_times_ms(raw_data[symbol])[-1]) + interval_ms > now_ms for symbol in directions}
+            pivots = {
+                symbol: {'LONG': all_data[symbol].get('high_pivot_filled_2x'),
+                         'SHORT': all_data[symbol].get('low_pivot_filled_2x')}
+                for symbol in directions
+            }
+            levels = trigger_levels(raw_data, directions, forming, pivots)
+            synced = fan_out(self.accounts, lambda account: account.armer.sync(
+                {symbol: level for symbol, level in levels.items() if symbol in account.symbols}, all_data))
+            for result in synced.values():
+                if not isinstance(result, Exception):
+                    stats.update(result)
+            if stats:
+                armed = {account.name: account.armer.snapshot() for account in self.accounts}
+                logger.info(f"Koşullu girişler: {dict(stats)} | Kurulu: {armed if len(armed) > 1 else self.armer.snapshot()}")
+        except Exception as e:
+            logger.warning(f"Koşullu giriş senkronizasyon hatası: {str(e)}")
+
+    def _collect_accounts(self, results: Dict[str, Any], phases: Dict[str, float]) -> Dict[str, Dict]:
+        """
+        Hesap özetleri {hesap: {'success', 'phases', 'positions', 'ledger', 'error'}}; 'manage_positions' /
+        'execute_trades' / 'ledger' fazları hesapların en uzunudur (eşzamanlı). Tüm hesaplar hata verdiyse tur hatalı sayılır
+        """
+        summaries = {
+            name: {'success': False, 'phases': {}, 'error': str(result)} if isinstance(result, Exception) else result
+            for name, result in results.items()
+        }
+        for name in ('manage_positions', 'execute_trades'):
+            phases[name] = max(summary['phases'].get(name, 0.0) for summary in summaries.values())
+        ledger = [summary['phases']['ledger'] for summary in summaries.values() if 'ledger' in summary['phases']]
+        if ledger:
+            phases['ledger'] = max(ledger)
+        if not any(summary['success'] for summary in summaries.values()):
+            raise Exception(summaries[self.account.name]['error'])
+        return summaries
+
+    async def _trade_accounts_async(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]]) -> Dict[str, Any]:
+        """Account.trade_async tüm hesaplarda eşzamanlı (ana hesap turun async oturumunu kullanır)"""
+        results = await asyncio.gather(
+            *(account.trade_async(signals, all_data, self.testnet) for account in self.accounts),
+            return_exceptions=True
+        )
+        return {account.name: result for account, result in zip(self.accounts, results)}
+
+    def _calibrate(self, raw_data: Dict, phases: Dict[str, float]) -> None:
+        """Yeni kapanmış barlar kalibrasyon taslaklarına (CALIBRATION_DIR); hata turu etkilemez"""
+        if self.calibrator is None:
+            return
+        t0 = time.perf_counter()
+        try:
+            self.calibrator.update(raw_data, int(self.clock() * 1000))
+        except Exception as e:
+            logger.warning(f"Kalibrasyon güncellenemedi: {str(e)}")
+        self._mark_phase(phases, 'calibration', t0)
+
+    def _record_cycle(self, start_time: float, phases: Dict[str, float], all_data: Dict, signals: Dict,
+                      unchanged: List[str], error: Optional[str] = None):
+        """Turu günlüğe ekler (JOURNAL_DIR); günlük hatası turu etkilemez, 'journal' fazı olarak süresi yazılır"""
+        if self.journal is None:
+            return
+        t0 = time.perf_counter()
+        try:
+            self.journal.record(
+                cycle_ms=int(self.clock() * 1000),
+                rows=all_data,
+                signals=signals,
+                positions=self.position_manager.active_positions,
+                phases=dict(phases),
+                elapsed=time.time() - start_time,
+                unchanged=unchanged,
+                error=error
             )
-    
+        except Exception as e:
+            logger.warning(f"Tur günlüğü yazılamadı: {str(e)}")
+        self._mark_phase(phases, 'journal', t0)
+
     def run_once(self):
         """Tek seferlik çalıştırma (Cloud Functions için)"""
+        from accounts import fan_out
+        start_time = time.time()
+        phases = {}  # faz süreleri (s): yük testi / profil için
+        all_data, signals, unchanged = {}, {}, []
         try:
-            start_time = time.time()
             
             # Toplu veri çekme ve işleme
-            all_data = self._get_market_data_batch()
+            t0 = time.perf_counter()
+            prewarmed = bool(self.prewarmed)
+            raw_data = self._share_klines(self._fetch_klines())
+            t0 = self._mark_phase(phases, 'fetch', t0)
+            fresh_data, unchanged = self._select_changed_bars(raw_data)
+            all_data = self._compute_market_data(fresh_data)
+            t0 = self._mark_phase(phases, 'indicators', t0)
             signals = self._generate_signals(all_data)
+            all_data, signals = self._merge_unchanged(raw_data, all_data, signals, unchanged)
+            t0 = self._mark_phase(phases, 'signals', t0)
+            
+            # Sinyal varsa tek ticker isteğiyle güncel giriş fiyatları (tur boyunca geçerli)
+            if TICKER_PRICING and any(signals.values()):
+                all_data = self._apply_ticker_prices(signals, all_data, self.api.get_tickers(self.symbols))
+                t0 = self._mark_phase(phases, 'tickers', t0)
+            
+            if self.armer is not None:
+                self._sync_armed_entries(raw_data, all_data, signals)
+                t0 = self._mark_phase(phases, 'prearm', t0)
+            
+            # 1. Pozisyon yönetimi + 2. yeni pozisyonlar veya güncellemeler (hesap başına, birden fazla hesap eşzamanlı)
+            accounts = self._collect_accounts(
+                fan_out(self.accounts, lambda account: account.trade(signals, all_data)), phases
+            )
+            decision_latency = self._since_bar_close()
+            self._calibrate(raw_data, phases)
+            self._record_cycle(start_time, phases, all_data, signals, unchanged)
+            
+            elapsed = time.time() - start_time
+            logger.info(f"✅ İşlem turu tamamlandı | Süre: {elapsed:.2f}s | Fazlar: {phases}")
+            
+            return {
+                'success': True,
+                'elapsed_time': elapsed,
+                'phases': phases,
+                'prewarmed': prewarmed,
+                'bar_close_latency_s': decision_latency,
+                'symbols_processed': len(self.symbols),
+                'unchanged_symbols': unchanged,
+                'signals': {k: v for k, v in signals.items() if v},
+                'api_health': self.resilience.snapshot() if self.resilience else None,
+                'armed_entries': self.armer.snapshot() if self.armer else None,
+                'calibration': self.calibrator.snapshot() if self.calibrator else None,
+                'accounts': accounts
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Hata: {str(e)}", exc_info=True)
+            self._record_cycle(start_time, phases, {symbol: all_data.get(symbol) for symbol in self.symbols},
+                               signals, unchanged, error=str(e))
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        finally:
+            # Pozisyon durumunu kaydet (sonraki çalıştırma borsadan yeniden keşif yapmaz)
+            self._persist_positions()
+
+    async def run_once_async(self):
+        """
+        run_once'ın asyncio versiyonu: semboller arası bağımsız API çağrıları
+        (kline, OCO durum sorguları, TP/SL emirleri) tek bağlantı havuzu üzerinden eşzamanlı yapılır
+        """
+        from async_exchange import AsyncBybitFuturesAPI
+        start_time = time.time()
+        phases = {}
+        all_data, signals, unchanged = {}, {}, []
+        try:
             
-            # 1. Pozisyon yönetimi
-            self.position_manager.manage_positions(signals, all_data)
+            client = self.account.open_async_client(self.testnet)
             
-            # 2. Yeni pozisyonlar veya güncellemeler
-            self._execute_trades(signals, all_data)
+            async with client:
+                self.position_manager.bind_async_client(client)
+                try:
+                    t0 = time.perf_counter()
+                    prewarmed = bool(self.prewarmed)
+                    raw_data = self._share_klines(await self._fetch_klines_async(AsyncBybitFuturesAPI(client)))
+                    t0 = self._mark_phase(phases, 'fetch', t0)
+                    fresh_data, unchanged = self._select_changed_bars(raw_data)
+                    all_data = self._compute_market_data(fresh_data)
+                    t0 = self._mark_phase(phases, 'indicators', t0)
+                    signals = self._generate_signals(all_data)
+                    all_data, signals = self._merge_unchanged(raw_data, all_data, signals, unchanged)
+                    t0 = self._mark_phase(phases, 'signals', t0)
+                    
+                    if TICKER_PRICING and any(signals.values()):
+                        tickers = await AsyncBybitFuturesAPI(client).get_tickers(self.symbols)
+                        all_data = self._apply_ticker_prices(signals, all_data, tickers)
+                        t0 = self._mark_phase(phases, 'tickers', t0)
+                    
+                    if self.armer is not None:  # koşullu emirler senkron oturumla (sıralı, az çağrı)
+                        await asyncio.to_thread(self._sync_armed_entries, raw_data, all_data, signals)
+                        t0 = self._mark_phase(phases, 'prearm', t0)
+                    
+                    accounts = self._collect_accounts(await self._trade_accounts_async(signals, all_data), phases)
+                    decision_latency = self._since_bar_close()
+                finally:
+                    self.position_manager.bind_async_client(None)
+            self._calibrate(raw_data, phases)
+            self._record_cycle(start_time, phases, all_data, signals, unchanged)
             
             elapsed = time.time() - start_time
-            logger.info(f"✅ İşlem turu tamamlandı | Süre: {elapsed:.2f}s")
+            logger.info(f"✅ İşlem turu tamamlandı (async) | Süre: {elapsed:.2f}s | Fazlar: {phases}")
             
             return {
                 'success': True,
                 'elapsed_time': elapsed,
+                'phases': phases,
+                'prewarmed': prewarmed,
+                'bar_close_latency_s': decision_latency,
                 'symbols_processed': len(self.symbols),
-                'signals': {k: v for k, v in signals.items() if v}
+                'unchanged_symbols': unchanged,
+                'signals': {k: v for k, v in signals.items() if v},
+                'api_health': self.resilience.snapshot() if self.resilience else None,
+                'armed_entries': self.armer.snapshot() if self.armer else None,
+                'calibration': self.calibrator.snapshot() if self.calibrator else None,
+                'accounts': accounts
             }
             
         except Exception as e:
             logger.error(f"❌ Hata: {str(e)}", exc_info=True)
+            self._record_cycle(start_time, phases, {symbol: all_data.get(symbol) for symbol in self.symbols},
+                               signals, unchanged, error=str(e))
             return {
                 'success': False,
                 'error': str(e)
             }
+        finally:
+            # Pozisyon durumunu kaydet (sonraki çalıştırma borsadan yeniden keşif yapmaz)
+            self._persist_positions()
+
+
+def get_bot(sync: bool = True) -> TradingBot:
+    """
+    Instance başına tek TradingBot: cold start'ta oturum + kaldıraç ayarı bir kez yapılır,
+    sıcak çağrılarda sadece pozisyonlar borsadan tazelenir (sync=False: tazeleme atlanır)
+    """
+    global _bot
+    if _bot is None:
+        t0 = time.perf_counter()
+        _bot = TradingBot(testnet=False)
+        STARTUP_PROFILE['init'] = dict(_bot.init_profile, total=round(time.perf_counter() - t0, 4))
+        STARTUP_PROFILE['init_api_calls'] = _bot.init_api_calls
+        logger.info(f"🧊 Cold start profili: {STARTUP_PROFILE}")
+    elif sync:
+        _bot.sync_positions()
+    return _bot
+
+
+def run_cycle(bot: TradingBot) -> Dict:
+    """Tek işlem turu (trading_bot_trigger ve daemon aynı yolu kullanır)"""
+    return asyncio.run(bot.run_once_async()) if ASYNC_EXECUTION else bot.run_once()
+
+
+def _wait_for_bar_close(bot: TradingBot) -> Optional[float]:
+    """
+    Ön ısıtılmış bot: kapanıştan en fazla PREWARM_MAX_SLEEP_S önce gelen commit kapanışı bekler. Daha erken
+    (PREWARM_MAX_WAIT_S'ye kadar) gelen commit için beklenmez, kalan süre döndürülür: istek 425 ile reddedilir
+    ve Scheduler yeniden dener (instance ve faturalanan süre HTTP işleyicisinde uyuyarak tutulmaz)
+    """
+    now = bot.clock()
+    wait = next_bar_close(now, int(bot.interval) * 60, PREWARM_COMMIT_DELAY_S) - now
+    if wait > PREWARM_MAX_WAIT_S:  # kapanıştan sonra gelmiş
+        return None
+    if wait > PREWARM_MAX_SLEEP_S:
+        return wait
+    logger.info(f"⏳ Commit bar kapanışından önce geldi, {wait:.2f}s bekleniyor")
+    time.sleep(wait)
+    return None
+
+
+def _check_timeout_budget() -> None:
+    """Fonksiyon zaman aşımı commit beklemesi + tur bütçesini karşılamıyorsa başlangıçta uyarır"""
+    needed = PREWARM_MAX_SLEEP_S + CYCLE_BUDGET_S
+    if FUNCTION_TIMEOUT_S <= needed:
+        logger.warning(f"⚠️ FUNCTION_TIMEOUT_S ({FUNCTION_TIMEOUT_S:.0f}s) commit beklemesi + tur bütçesinden "
+                       f"({PREWARM_MAX_SLEEP_S:.0f}s + {CYCLE_BUDGET_S:.0f}s) kısa: tur zaman aşımına uğrayabilir")
+
+
+def _warm_indicator_path() -> None:
+    """pandas/numpy kod yollarını küçük sentetik bir veriyle bir kez çalıştırır"""
+    import numpy as np
+    if NUMPY_CORE:
+        from np_indicators import latest_rows
+        n = 60
+        close = 100 + np.cumsum(np.sin(np.arange(n)))
+        latest_rows({SYMBOLS[0]: {
+            'time': np.arange(n, dtype=np.int64) * 900_000,
+            'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': np.ones(n)
+        }})
+        return
+    import pandas as pd
+    from indicators import calculate_indicators
+    from batch_indicators import latest_rows_batch
+
+    n = 60
+    close = 100 + np.cumsum(np.sin(np.arange(n)))
+    df = pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': np.ones(n)
+    }, index=pd.date_range('2024-01-01', periods=n, freq='15min'))
+    calculate_indicators(df.copy(), SYMBOLS[0])
+    if BATCH_INDICATORS:
+        latest_rows_batch({SYMBOLS[0]: df})
+
+
+# Cloud Functions entry points
+@functions_framework.http
+def trading_bot_warmup(request):
+    """
+    Hafif ısınma / sağlık kontrolü: ağır modülleri ve bot oturumunu önceden yükler, işlem yapmaz.
+    trading_bot_trigger'a '?mode=warmup' veya '/warmup' yolu ile de ulaşılır.
+    """
+    try:
+        cold = _bot is None
+        _import_heavy_modules()
+        t0 = time.perf_counter()
+        _warm_indicator_path()
+        STARTUP_PROFILE['imports'].setdefault('indicator_warmup', round(time.perf_counter() - t0, 4))
+        get_bot()
+        return {
+            'status': 'ok',
+            'cold_start': cold,
+            'startup_profile': STARTUP_PROFILE
+        }, 200
+    except Exception as e:
+        logger.error(f"❌ Warm-up hatası: {str(e)}", exc_info=True)
+        return {
+            'status': 'error',
+            'message': str(e)
+        }, 500
+
+
+@functions_framework.http
+def trading_bot_prewarm(request):
+    """
+    İki aşamalı tetiklemenin ilk adımı (bar kapanışından birkaç saniye önce, işlem yapmaz): modüller,
+    oturum ve pozisyon uzlaştırması (get_bot) + kline penceresi (TradingBot.prewarm). Kapanıştaki normal
+    tetik (commit) pozisyonları yeniden sorgulamaz ve sadece son barları çeker. Commit'in aynı instance'a
+    düşmesi için fonksiyon max-instances=1 ile dağıtılmalıdır; başka instance'a düşen commit tam turla çalışır.
+    trading_bot_trigger'a '?mode=prewarm' veya '/prewarm' yolu ile de ulaşılır.
+    """
+    try:
+        cold = _bot is None
+        _import_heavy_modules()
+        _warm_indicator_path()
+        t0 = time.perf_counter()
+        bot = get_bot()
+        ready = round(time.perf_counter() - t0, 4)
+        return {
+            'status': 'ok',
+            'cold_start': cold,
+            'bot_ready_s': ready,
+            'prewarm': bot.prewarm()
+        }, 200
+    except Exception as e:
+        logger.error(f"❌ Ön ısıtma hatası: {str(e)}", exc_info=True)
+        return {
+            'status': 'error',
+            'message': str(e)
+        }, 500
 
 
-# Cloud Functions entry point
 @functions_framework.http
 def trading_bot_trigger(request):
     """
     Cloud Functions için HTTP trigger
     Cloud Scheduler tarafından her 15 dakikada bir çağrılır
     """
+    if request.args.get('mode') == 'warmup' or request.path.rstrip('/').endswith('/warmup'):
+        return trading_bot_warmup(request)
+    if request.args.get('mode') == 'prewarm' or request.path.rstrip('/').endswith('/prewarm'):
+        return trading_bot_prewarm(request)
+
     try:
         logger.info("🚀 Trading bot başlatıldı (Cloud Functions)")
         
-        # Bot instance oluştur
-        bot = TradingBot(testnet=False)
+        # Bot instance (sıcak instance'da yeniden kullanılır); ön ısıtılmışsa pozisyonlar prewarm'da uzlaştırıldı
+        prewarmed = _bot is not None and bool(_bot.prewarmed)
+        bot = get_bot(sync=not prewarmed)
+        if prewarmed:
+            early = _wait_for_bar_close(bot)
+            if early is not None:
+                logger.info(f"⏪ Commit kapanıştan {early:.2f}s önce geldi, 425 ile reddedildi (yeniden denenecek)")
+                return {
+                    'status': 'too_early',
+                    'message': f"Bar kapanışına {early:.2f}s var",
+                    'retry_after_s': round(early, 3)
+                }, 425, {'Retry-After': str(math.ceil(early))}
         
         # Tek sefer çalıştır
-        result = bot.run_once()
+        run = lambda: run_cycle(bot)
+        profile_arg = request.args.get('profile') if PROFILING_ENABLED else None
+        profile = None
+        if profile_arg:
+            # '?profile=cpu,alloc&top=20' (sadece PROFILING_ENABLED=true iken)
+            from profiling import parse_modes, profile_call
+            result, profile = profile_call(run, parse_modes(profile_arg), int(request.args.get('top', 20)))
+            logger.info(f"🔬 Tur profili: {profile}")
+        else:
+            result = run()
         
         # Sonucu döndür
         if result['success']:
-            return {
+            response = {
                 'status': 'success',
                 'message': 'Trading bot başarıyla çalıştı',
                 'data': result
-            }, 200
+            }
+            if profile:
+                response['profile'] = profile
+            return response, 200
         else:
-            return {
+            response = {
                 'status': 'error',
                 'message': result.get('error', 'Bilinmeyen hata'),
-            }, 500
+            }
+            if profile:
+                response['profile'] = profile
+            return response, 500
             
     except Exception as e:
         logger.error(f"❌ Critical error: {str(e)}", exc_info=True)
@@ -233,3 +884,7 @@ def trading_bot_trigger(request):
             'status': 'error',
             'message': str(e)
         }, 500
+
+
+_check_timeout_budget()
+STARTUP_PROFILE['module_import'] = round(time.perf_counter() - _MODULE_START, 4)
@@ -0,0 +1,558 @@
+"""
+Canlı sinyal yolunun pandas'sız NumPy çekirdeği.
+
+Girdi: sembol başına KlineArrays sözlüğü {'time': int64 ms, 'open', 'high', 'low', 'close', 'volume'}
+(exchange.klines_to_arrays / KlineRingBuffer.arrays çıktısı). Tüm fonksiyonlar son eksen (bar)
+boyunca çalışır; 1-D (tek sembol) ve 2-D (symbols x bars) diziler kabul edilir.
+
+Sonuçlar indicators.calculate_indicators ile birebir aynıdır (NW dahil: exact=True iken her bar
+için pandas yolundaki np.dot aynı sırayla çağrılır). pandas sadece araştırma adaptörlerinde
+(indicators.py, batch_indicators.py) kullanılır; bu modül pandas import etmez.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import atr_ranges, Z_INDICATOR_PARAMS, Z_RANGES
+
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
+KlineArrays = Dict[str, np.ndarray]
+
+
+# --- KlineArrays / DataFrame ortak yardımcıları (canlı yol her iki biçimle de çalışır) ---
+def n_bars(data) -> int:
+    if data is None:
+        return 0
+    return len(data['time']) if isinstance(data, dict) else len(data)
+
+def bar_times_ms(data) -> np.ndarray:
+    if isinstance(data, dict):
+        return np.asarray(data['time'], dtype=np.int64)
+    return data.index.as_unit('ms').asi8
+
+def head(data, stop: int):
+    """İlk stop bar (negatif: sondan atar); kopyasız dilim"""
+    if isinstance(data, dict):
+        return {name: values[:stop] for name, values in data.items()}
+    return data.iloc[:stop]
+
+def merge_bars(base, recent, limit: int):
+    """
+    base'in recent'ten önceki barları + recent (çakışan barlar recent'ten, örn. kapanan mum), son limit bar.
+    recent base'in son barıyla çakışmıyorsa (arada eksik bar olabilir) None: tam çekim gerekir
+    """
+    if not n_bars(base) or not n_bars(recent):
+        return None
+    recent_times = bar_times_ms(recent)
+    keep = int(np.searchsorted(bar_times_ms(base), recent_times[0], side='left'))
+    if keep == n_bars(base):
+        return None
+    if isinstance(base, dict):
+        return {name: np.concatenate([base[name][:keep], recent[name]])[-limit:] for name in recent}
+    import pandas as pd
+    return pd.concat([base.iloc[:keep], recent]).iloc[-limit:]
+
+def last_ohlcv(data) -> List[float]:
+    if isinstance(data, dict):
+        return [data[col][-1].item() for col in OHLCV]
+    return data.iloc[-1][OHLCV].tolist()
+
+
+# --- Yardımcılar ---
+def _shift(x, n=1):
+    out = np.full_like(x, np.nan, dtype=float)
+    if n < x.shape[-1]:
+        out[..., n:] = x[..., :-n]
+    return out
+
+def _ffill(x):
+    """Son eksen boyunca NaN'ları bir önceki geçerli değerle doldurur (pandas ffill)"""
+    idx = np.where(np.isnan(x), 0, np.arange(x.shape[-1]))
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return np.take_along_axis(x, idx, axis=-1)
+
+def rolling_mean(x, window):
+    """pandas rolling(window).mean() ile birebir aynı (Kahan toplamlı online algoritma)"""
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    out = np.full(x.shape, np.nan)
+    lead = x.shape[:-1]
+    sum_x = np.zeros(lead)
+    comp_add = np.zeros(lead)
+    comp_remove = np.zeros(lead)
+    nobs = np.zeros(lead)
+    neg_ct = np.zeros(lead)
+    same_ct = np.zeros(lead)
+    prev = x[..., 0].copy()
+
+    for i in range(n):
+        if i >= window:
+            val = x[..., i - window]
+            ok = ~np.isnan(val)
+            y = np.where(ok, -val - comp_remove, 0.0)
+            t = sum_x + y
+            comp_remove = np.where(ok, t - sum_x - y, comp_remove)
+            sum_x = np.where(ok, t, sum_x)
+            nobs -= ok
+            neg_ct -= ok & np.signbit(val)
+
+        val = x[..., i]
+        ok = ~np.isnan(val)
+        y = np.where(ok, val - comp_add, 0.0)
+        t = sum_x + y
+        comp_add = np.where(ok, t - sum_x - y, comp_add)
+        sum_x = np.where(ok, t, sum_x)
+        nobs += ok
+        neg_ct += ok & np.signbit(val)
+        same_ct = np.where(ok, np.where(val == prev, same_ct + 1, 1), same_ct)
+        prev = np.where(ok, val, prev)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = sum_x / nobs
+        result = np.where(same_ct >= nobs, prev, result)
+        result = np.where((neg_ct == 0) & (result < 0), 0.0, result)
+        result = np.where((neg_ct == nobs) & (result > 0), 0.0, result)
+        out[..., i] = np.where((nobs >= window) & (nobs > 0), result, np.nan)
+    return out
+
+def rolling_max(x, window):
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(x, window, axis=-1).max(axis=-1)
+    return out
+
+def rolling_min(x, window):
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(x, window, axis=-1).min(axis=-1)
+    return out
+
+def ewm_mean(x, alpha):
+    """pandas ewm(alpha=alpha, adjust=False).mean() ile birebir aynı (NaN içermeyen girdi)"""
+    out = np.empty(x.shape)
+    weighted = x[..., 0].copy()
+    out[..., 0] = weighted
+    old_wt = 1. - alpha
+    for i in range(1, x.shape[-1]):
+        cur = x[..., i]
+        weighted = np.where(weighted != cur, (old_wt * weighted + alpha * cur) / (old_wt + alpha), weighted)
+        out[..., i] = weighted
+    return out
+
+
+# --- RSI ---
+def calculate_rsi(close, window=14):
+    delta = close - _shift(close)
+    gain = np.where(delta > 0, delta, 0)
+    loss = -np.where(delta < 0, delta, 0)
+    avg_gain = rolling_mean(gain, window)
+    avg_loss = rolling_mean(loss, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+# --- ATR ---
+def calculate_atr(high, low, close, window=14):
+    previous_close = _shift(close)
+    true_range = np.fmax(np.fmax(high - low, np.abs(high - previous_close)), np.abs(low - previous_close))
+    return ewm_mean(true_range, 1 / window)
+
+# --- Z ---
+def calculate_z(close, atr, pct_min, pct_max, atr_mult=1):
+    """pct_min/pct_max skaler veya sembol başına vektör (S,) olarak yayınlanır"""
+    pct_min = np.asarray(pct_min, dtype=float)[..., None]
+    pct_max = np.asarray(pct_max, dtype=float)[..., None]
+    return np.minimum(np.maximum(close * pct_min / 100, atr_mult * atr), close * pct_max / 100)
+
+# --- Donchian Channel ---
+def calculate_donchian_channel(high, low, window=20) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    upper = rolling_max(high, window)
+    lower = rolling_min(low, window)
+    return upper, lower, (upper + lower) / 2
+
+# --- SMA ---
+def calculate_sma(close, window=50):
+    return rolling_mean(close, window)
+
+def determine_sma_trend(short_sma, long_sma):
+    return np.where(short_sma > long_sma, 'uptrend', 'downtrend')
+
+# --- Nadaraya-Watson Envelope ---
+def calculate_nw_envelope(source, bandwidth=8.0, multiplier=3.0, window_size=50, exact=True):
+    """
+    exact=True: her bar için indicators.py'deki np.dot(pencere, ters ağırlıklar) (birebir aynı sonuç);
+    exact=False: tek matris çarpımı (çok sembolde hızlı, son basamakta yuvarlama farkı olabilir)
+    """
+    weights = np.array([np.exp(-(i ** 2) / (bandwidth * bandwidth * 2)) for i in range(window_size)])
+    weights_sum = np.sum(weights)
+    nw = np.full(source.shape, np.nan)
+    nw_lower = np.full(source.shape, np.nan)
+    nw_upper = np.full(source.shape, np.nan)
+    if source.shape[-1] < window_size:
+        return nw, nw_upper, nw_lower
+
+    windows = sliding_window_view(source, window_size, axis=-1)
+    if exact:
+        reversed_weights = weights[::-1]
+        rows = windows.reshape(-1, *windows.shape[-2:])
+        out = nw.reshape(-1, nw.shape[-1])
+        for r in range(rows.shape[0]):
+            for i in range(rows.shape[1]):
+                out[r, window_size - 1 + i] = np.dot(rows[r, i], reversed_weights) / weights_sum
+    else:
+        nw[..., window_size - 1:] = (windows @ weights[::-1]) / weights_sum
+    mae = np.mean(np.abs(windows - sliding_window_view(nw, window_size, axis=-1)), axis=-1) * multiplier
+    nw_lower[..., window_size - 1:] = nw[..., window_size - 1:] - mae
+    nw_upper[..., window_size - 1:] = nw[..., window_size - 1:] + mae
+    return nw, nw_upper, nw_lower
+
+# --- ATR ZigZag (semboller arası vektörel, barlar boyunca sıralı) ---
+def atr_zigzag(closes, atrs, atr_mult=1):
+    closes = np.atleast_2d(closes)
+    atrs = np.atleast_2d(atrs)
+    n_sym, n = closes.shape
+    rows = np.arange(n_sym)
+
+    high_pivot = np.full((n_sym, n), np.nan)
+    low_pivot = np.full((n_sym, n), np.nan)
+    high_pivot_atr = np.full((n_sym, n), np.nan)
+    low_pivot_atr = np.full((n_sym, n), np.nan)
+    high_confirmed = np.zeros((n_sym, n), dtype=np.int64)
+    low_confirmed = np.zeros((n_sym, n), dtype=np.int64)
+    bars_ago = np.full((n_sym, n), np.nan)
+
+    last_pivot = closes[:, 0].copy()
+    last_idx = np.zeros(n_sym, dtype=np.int64)
+    direction = np.zeros(n_sym, dtype=np.int8)  # 0: None, 1: up, -1: down
+
+    for i in range(1, n):
+        price = closes[:, i]
+        atr = atrs[:, i] * atr_mult
+
+        # direction None
+        none = direction == 0
+        start_up = none & (price >= last_pivot + atr)
+        start_down = none & ~start_up & (price <= last_pivot - atr)
+        started = start_up | start_down
+        last_pivot = np.where(started, closes[rows, last_idx], last_pivot)
+        r = rows[start_up]
+        high_pivot[r, last_idx[r]] = last_pivot[r]
+        high_pivot_atr[r, last_idx[r]] = atrs[r, last_idx[r]]
+        r = rows[start_down]
+        low_pivot[r, last_idx[r]] = last_pivot[r]
+        low_pivot_atr[r, last_idx[r]] = atrs[r, last_idx[r]]
+
+        # direction up / down
+        up = direction == 1
+        down = direction == -1
+        flip_down = up & (price <= last_pivot - atr)
+        flip_up = down & (price >= last_pivot + atr)
+        extend = (up & ~flip_down & (price > last_pivot)) | (down & ~flip_up & (price < last_pivot))
+
+        r = rows[flip_down]
+        high_pivot[r, last_idx[r]] = last_pivot[r]
+        high_pivot_atr[r, last_idx[r]] = atrs[r, last_idx[r]]
+        high_confirmed[r, i] = 1
+        r = rows[flip_up]
+        low_pivot[r, last_idx[r]] = last_pivot[r]
+        low_pivot_atr[r, last_idx[r]] = atrs[r, last_idx[r]]
+        low_confirmed[r, i] = 1
+        flipped = flip_down | flip_up
+        bars_ago[flipped, i] = i - last_idx[flipped]
+
+        moved = flipped | extend
+        last_pivot = np.where(moved, price, last_pivot)
+        last_idx = np.where(moved, i, last_idx)
+        direction = np.where(start_up | flip_up, 1, np.where(start_down | flip_down, -1, direction)).astype(np.int8)
+
+    # pivot_bars_ago_filled: son geçerli değer + aradan geçen bar sayısı
+    positions = np.arange(n, dtype=float)
+    bars_ago_filled = _ffill(bars_ago - positions) + positions
+
+    return {
+        'high_pivot': high_pivot,
+        'low_pivot': low_pivot,
+        'high_pivot_atr': high_pivot_atr,
+        'low_pivot_atr': low_pivot_atr,
+        'high_pivot_confirmed': high_confirmed,
+        'low_pivot_confirmed': low_confirmed,
+        'pivot_bars_ago': bars_ago,
+        'high_pivot_filled': _ffill(high_pivot),
+        'low_pivot_filled': _ffill(low_pivot),
+        'high_pivot_atr_filled': _ffill(high_pivot_atr),
+        'low_pivot_atr_filled': _ffill(low_pivot_atr),
+        'high_pivot_confirmed_filled': np.maximum.accumulate(high_confirmed, axis=-1),
+        'low_pivot_confirmed_filled': np.maximum.accumulate(low_confirmed, axis=-1),
+        'pivot_bars_ago_filled': bars_ago_filled,
+    }
+
+
+# --- Structure + Entry Signals (fused kernel) ---
+HIGH_HH, HIGH_LH = 1, 0  # high_structure kodları
+LOW_HL, LOW_LL = 1, 0    # low_structure kodları
+
+def _ffill_codes(codes, default):
+    """NaN kodları bir önceki geçerli kodla doldurur, baştaki NaN'lar default olur (son eksen)"""
+    idx = np.where(np.isnan(codes), 0, np.arange(codes.shape[-1]))
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    filled = np.take_along_axis(codes, idx, axis=-1)
+    return np.where(np.isnan(filled), default, filled).astype(np.int8)
+
+def _structure_codes(filled, default):
+    """Pivot seviyesi önceki bara göre yükseldi (1) / düştü (0), değişmediyse önceki kod"""
+    prev = np.full(filled.shape, np.nan)
+    prev[..., 1:] = filled[..., :-1]
+    codes = np.full(filled.shape, np.nan)
+    codes[filled < prev] = 0
+    codes[filled > prev] = 1
+    return _ffill_codes(codes, default)
+
+def _prev_window(values, lookback, reducer):
+    """t anında values[t-lookback .. t-1] üzerinde max/min; ilk lookback bar NaN"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] > lookback:
+        out[..., lookback:] = reducer(sliding_window_view(values[..., :-1], lookback, axis=-1), axis=-1)
+    return out
+
+def pivot_signal_kernel(close, pct_atr, uptrend, nw_upper, nw_lower, pivots, low_atr, high_atr, lookback=10, wanted=None):
+    """
+    HH/LH, HL/LL yapı etiketleri ve tüm pivot_go_* bayraklarını tek geçişte hesaplar.
+    pivots: {suffix: (high_pivot_filled, low_pivot_filled, high_pivot_confirmed, low_pivot_confirmed)}
+    Diziler son eksen boyunca bar; (symbols x bars) bloklarda low_atr/high_atr (S, 1) verilir.
+    wanted verilirse sadece o kolonlar hesaplanır (uptrend / nw_upper / nw_lower gerekmiyorsa None olabilir).
+    """
+    def want(name):
+        return wanted is None or name in wanted
+
+    with np.errstate(invalid='ignore'):
+        in_range = (low_atr < pct_atr) & (pct_atr < high_atr)
+
+        labels = {}
+        flags = {}
+        for suffix, (hpf, lpf, high_conf, low_conf) in pivots.items():
+            high = _structure_codes(hpf, HIGH_HH)
+            low = _structure_codes(lpf, LOW_LL)
+            if want(f'high_structure{suffix}'):
+                labels[f'high_structure{suffix}'] = np.where(high == HIGH_HH, 'HH', 'LH')
+            if want(f'low_structure{suffix}'):
+                labels[f'low_structure{suffix}'] = np.where(low == LOW_HL, 'HL', 'LL')
+
+            high_conf = high_conf == 1
+            low_conf = low_conf == 1
+            higher_low = (low == LOW_HL) & in_range
+            lower_high = (high == HIGH_LH) & in_range
+
+            if want(f'pivot_go_up{suffix}'):
+                trend_up = uptrend if suffix == '_2x' else True
+                flags[f'pivot_go_up{suffix}'] = low_conf & higher_low & (high == HIGH_HH) & trend_up & (close < nw_upper)
+            if want(f'pivot_go_down{suffix}'):
+                trend_down = ~uptrend if suffix == '_2x' else True
+                flags[f'pivot_go_down{suffix}'] = high_conf & lower_high & (low == LOW_LL) & trend_down & (close > nw_lower)
+
+            # close > NaN / close < NaN False olduğundan notna kontrolü karşılaştırmaya dahil
+            if want(f'pivot_go_breakout{suffix}'):
+                breakout = higher_low & (high == HIGH_LH) & (close > hpf)
+                if suffix == '_2x':
+                    # Pivot onayı yoksa son `lookback` kapanışın tamamı pivotun altında kalmış olmalı
+                    breakout &= low_conf | (_prev_window(close, lookback, np.max) < hpf)
+                else:
+                    breakout &= low_conf
+                flags[f'pivot_go_breakout{suffix}'] = breakout
+            if want(f'pivot_go_breakdown{suffix}'):
+                breakdown = lower_high & (low == LOW_HL) & (close < lpf)
+                if suffix == '_2x':
+                    breakdown &= high_conf | (_prev_window(close, lookback, np.min) > lpf)
+                else:
+                    breakdown &= high_conf
+                flags[f'pivot_go_breakdown{suffix}'] = breakdown
+
+    signals = dict(labels)
+    for kinds in (('up', 'down'), ('breakout', 'breakdown')):
+        for suffix in pivots:
+            for kind in kinds:
+                if f'pivot_go_{kind}{suffix}' in flags:
+                    signals[f'pivot_go_{kind}{suffix}'] = flags[f'pivot_go_{kind}{suffix}']
+    return signals
+
+
+# --- Feature Graph ---
+ZIGZAG_COLUMNS = ['high_pivot', 'low_pivot', 'high_pivot_atr', 'low_pivot_atr', 'high_pivot_confirmed',
+                  'low_pivot_confirmed', 'pivot_bars_ago', 'high_pivot_filled', 'low_pivot_filled',
+                  'high_pivot_atr_filled', 'low_pivot_atr_filled', 'high_pivot_confirmed_filled',
+                  'low_pivot_confirmed_filled', 'pivot_bars_ago_filled']
+DONCHIAN_COLUMNS = ['dc_upper', 'dc_lower', 'dc_middle', 'dc_position_ratio', 'dc_breakout', 'dc_breakdown']
+
+# Her kolonun doğrudan girdileri; OHLCV kolonlarının girdisi yoktur
+COLUMN_INPUTS = {
+    'rsi': ('close',),
+    'atr': ('high', 'low', 'close'),
+    'pct_atr': ('atr', 'close'),
+    'z': ('close', 'atr'),
+    'pct_z': ('z', 'close'),
+    'sma_50': ('close',),
+    'sma_200': ('close',),
+    'trend_50_200': ('close',),
+    'nw': ('close',),
+    'nw_upper': ('close',),
+    'nw_lower': ('close',),
+}
+for _w in [20, 50]:
+    for _name in DONCHIAN_COLUMNS:
+        COLUMN_INPUTS[f'{_name}_{_w}'] = ('high', 'low', 'close')
+for _sfx in ['_2x', '_3x']:
+    for _name in ZIGZAG_COLUMNS:
+        COLUMN_INPUTS[f'{_name}{_sfx}'] = ('close', 'z')
+    _structure = (f'high_pivot_filled{_sfx}', f'low_pivot_filled{_sfx}', 'pct_atr', 'close')
+    COLUMN_INPUTS[f'high_structure{_sfx}'] = (f'high_pivot_filled{_sfx}',)
+    COLUMN_INPUTS[f'low_structure{_sfx}'] = (f'low_pivot_filled{_sfx}',)
+    _trend = ('trend_50_200',) if _sfx == '_2x' else ()
+    COLUMN_INPUTS[f'pivot_go_up{_sfx}'] = _structure + (f'low_pivot_confirmed{_sfx}', 'nw_upper') + _trend
+    COLUMN_INPUTS[f'pivot_go_down{_sfx}'] = _structure + (f'high_pivot_confirmed{_sfx}', 'nw_lower') + _trend
+    COLUMN_INPUTS[f'pivot_go_breakout{_sfx}'] = _structure + (f'low_pivot_confirmed{_sfx}',)
+    COLUMN_INPUTS[f'pivot_go_breakdown{_sfx}'] = _structure + (f'high_pivot_confirmed{_sfx}',)
+
+SIGNAL_COLUMNS = [f'{name}{sfx}' for sfx in ('_2x', '_3x') for name in ('high_structure', 'low_structure')]
+SIGNAL_COLUMNS += [f'pivot_go_{kind}{sfx}' for kinds in (('up', 'down'), ('breakout', 'breakdown'))
+                   for sfx in ('_2x', '_3x') for kind in kinds]
+
+# calculate_indicators kolon sırası (indicators.FEATURES hesaplama sırası)
+COLUMN_ORDER = (['rsi', 'atr', 'pct_atr', 'z', 'pct_z']
+                + [f'{name}_{w}' for w in (20, 50) for name in DONCHIAN_COLUMNS]
+                + ['sma_50', 'sma_200', 'trend_50_200', 'nw', 'nw_upper', 'nw_lower']
+                + [f'{name}{sfx}' for sfx in ('_2x', '_3x') for name in ZIGZAG_COLUMNS]
+                + SIGNAL_COLUMNS)
+
+def required_columns(columns):
+    """İstenen kolonlar ve tüm (dolaylı) girdileri"""
+    needed = set()
+    stack = list(columns)
+    while stack:
+        col = stack.pop()
+        if col in needed:
+            continue
+        needed.add(col)
+        stack.extend(COLUMN_INPUTS.get(col, ()))
+    return needed
+
+
+# --- Calculations ---
+def compute_columns(o, h, l, c, symbols: List[str], columns: Optional[List[str]] = None,
+                    exact: bool = True) -> Dict[str, np.ndarray]:
+    """
+    (S x N) OHLC dizilerinden calculate_indicators kolonlarını hesaplar (kolon sırası aynı).
+    columns verilirse sadece bu kolonlar ve bağımlılıkları (COLUMN_INPUTS) hesaplanır.
+    exact=False: NW tek matris çarpımıyla (bkz. calculate_nw_envelope)
+    """
+    needed = None if columns is None else required_columns(columns)
+
+    def need(*names):
+        return needed is None or any(name in needed for name in names)
+
+    low_atr = np.array([atr_ranges[s][0] for s in symbols])[:, None]
+    high_atr = np.array([atr_ranges[s][1] for s in symbols])[:, None]
+    for s in symbols:
+        if s not in Z_RANGES:
+            raise ValueError(f"Z_RANGES'de {s} için değer tanımlanmamış!")
+
+    out = {}
+    if need('rsi'):
+        out['rsi'] = calculate_rsi(c)
+    if need('atr'):
+        out['atr'] = calculate_atr(h, l, c)
+        out['pct_atr'] = (out['atr'] / c) * 100
+    if need('z'):
+        out['z'] = calculate_z(c, out['atr'], [Z_RANGES[s][0] for s in symbols], [Z_RANGES[s][1] for s in symbols],
+                               Z_INDICATOR_PARAMS['atr_multiplier'])
+        out['pct_z'] = (out['z'] / c) * 100
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for w in [20, 50]:
+            if not need(*[f'{name}_{w}' for name in DONCHIAN_COLUMNS]):
+                continue
+            upper, lower, middle = calculate_donchian_channel(h, l, w)
+            out[f'dc_upper_{w}'] = upper
+            out[f'dc_lower_{w}'] = lower
+            out[f'dc_middle_{w}'] = middle
+            out[f'dc_position_ratio_{w}'] = (c - lower) / (upper - lower) * 100
+            out[f'dc_breakout_{w}'] = h > upper
+            out[f'dc_breakdown_{w}'] = l < lower
+
+    if need('sma_50', 'trend_50_200'):
+        sma_50 = calculate_sma(c, 50)
+    if need('sma_200', 'trend_50_200'):
+        sma_200 = calculate_sma(c, 200)
+    if need('sma_50'):
+        out['sma_50'] = sma_50
+    if need('sma_200'):
+        out['sma_200'] = sma_200
+    if need('trend_50_200'):
+        out['trend_50_200'] = determine_sma_trend(sma_50, sma_200)
+
+    if need('nw', 'nw_upper', 'nw_lower'):
+        out['nw'], out['nw_upper'], out['nw_lower'] = calculate_nw_envelope(c, exact=exact)
+
+    for mult, suffix in [(2, '_2x'), (3, '_3x')]:
+        if need(*[f'{name}{suffix}' for name in ZIGZAG_COLUMNS]):
+            for name, arr in atr_zigzag(c, out['z'], atr_mult=mult).items():
+                out[f'{name}{suffix}'] = arr
+
+    signal_columns = [col for col in SIGNAL_COLUMNS if need(col)]
+    if signal_columns:
+        suffixes = [sfx for sfx in ('_2x', '_3x') if any(col.endswith(sfx) for col in signal_columns)]
+        out.update(pivot_signal_kernel(
+            close=c,
+            pct_atr=out['pct_atr'],
+            uptrend=out['trend_50_200'] == 'uptrend' if 'trend_50_200' in out else None,
+            nw_upper=out.get('nw_upper'),
+            nw_lower=out.get('nw_lower'),
+            pivots={suffix: (out[f'high_pivot_filled{suffix}'], out[f'low_pivot_filled{suffix}'],
+                             out[f'high_pivot_confirmed{suffix}'], out[f'low_pivot_confirmed{suffix}'])
+                    for suffix in suffixes},
+            low_atr=low_atr,
+            high_atr=high_atr,
+            wanted=set(signal_columns),
+        ))
+
+    return {name: out[name] for name in COLUMN_ORDER if name in out}
+
+
+def _aligned_groups(arrays: Dict[str, KlineArrays]) -> List[List[str]]:
+    """Aynı bar zamanlarına sahip sembolleri gruplar (her grup tek 2-D blok olarak hesaplanır)"""
+    groups: List[List[str]] = []
+    for symbol, data in arrays.items():
+        for group in groups:
+            if np.array_equal(arrays[group[0]]['time'], data['time']):
+                group.append(symbol)
+                break
+        else:
+            groups.append([symbol])
+    return groups
+
+
+def calculate_indicators(data: KlineArrays, symbol: str, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """indicators.calculate_indicators'ın dizi karşılığı: {kolon: 1-D dizi} (OHLCV + time dahil)"""
+    c = np.asarray(data['close'], dtype=float)[None, :]
+    stacked = {col: np.asarray(data[col], dtype=float)[None, :] for col in ('open', 'high', 'low')}
+    cols = compute_columns(stacked['open'], stacked['high'], stacked['low'], c, [symbol], columns)
+    result = dict(data)
+    result.update((name, arr[0]) for name, arr in cols.items())
+    return result
+
+
+def latest_rows(arrays: Dict[str, KlineArrays], columns: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Her sembol için calculate_indicators(df, symbol, columns).iloc[-1].to_dict() karşılığı;
+    aynı zaman eksenli semboller tek (symbols x bars) blokta hesaplanır
+    """
+    results = {}
+    for symbols in _aligned_groups(arrays):
+        stacked = {col: np.vstack([np.asarray(arrays[s][col], dtype=float) for s in symbols]) for col in OHLCV}
+        cols = compute_columns(stacked['open'], stacked['high'], stacked['low'], stacked['close'], symbols, columns)
+        for row, symbol in enumerate(symbols):
+            record = {col: stacked[col][row, -1].item() for col in OHLCV}
+            for name, arr in cols.items():
+                record[name] = arr[row, -1].item()
+            results[symbol] = record
+    return results
@@ -1,20 +1,184 @@
 
-from typing import Dict, Optional, Any
-from pybit.unified_trading import HTTP
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from exit_strategies import ExitStrategy
+import asyncio
 import logging
 from config import LEVERAGE, RISK_PER_TRADE_USDT, ROUND_NUMBERS, DEFAULT_LEVERAGE, SYMBOL_SETTINGS
 import time
 
+if TYPE_CHECKING:
+    from pybit.unified_trading import HTTP
+
 logger = logging.getLogger(__name__)
 
+# open_position / manage_positions'ın son bar verisinden okuduğu kolonlar
+REQUIRED_COLUMNS = ['close', 'atr', 'pct_atr']
+
 class PositionManager:
-    def __init__(self, client: HTTP):
+    VERIFY_ATTEMPTS = 10  # pozisyon doğrulama deneme sayısı (10 x 0.5 s = 5 s)
+
+    def __init__(self, client: 'HTTP', symbol_settings: Optional[Dict[str, Dict]] = None):
         self.client = client
+        self.symbol_settings = SYMBOL_SETTINGS if symbol_settings is None else symbol_settings  # hesabın risk tablosu
         self.exit_strategy = ExitStrategy(client)
+        self.async_client = None  # AsyncBybitHTTP (sadece run_once_async sırasında)
+        self.ledger = None  # ExecutionLedger (LEDGER_DIR); kapanan pozisyonlar expect() ile bildirilir
         self.active_positions: Dict[str, Dict] = {}  # {symbol: position_data}
+        self.settle_delay = 1.0     # market emri sonrası doğrulama öncesi bekleme (s)
+        self.verify_interval = 0.5  # pozisyon doğrulama denemeleri arası bekleme (s)
         self.logger = logging.getLogger(__name__)
 
+    def bind_async_client(self, async_client) -> None:
+        """run_once_async süresince kullanılacak AsyncBybitHTTP oturumunu bağlar (None ile çözer)"""
+        self.async_client = async_client
+        self.exit_strategy.async_client = async_client
+
+    def _record_exit(self, symbol: str, position: Dict, reason: str, close_order_id: Optional[str] = None) -> None:
+        """Kapanan pozisyonu işlem defterine bildirir (silinmeden önce); defter hatası kapanışı etkilemez"""
+        if self.ledger is None:
+            return
+        try:
+            self.ledger.expect(symbol, position, reason, close_order_id)
+        except Exception as e:
+            logger.warning(f"{symbol} kapanış işlem defterine yazılamadı: {str(e)}")
+
+
+    # --- Ortak yardımcılar: karar ve kayıt mantığı (I/O sonuçlarını alır) ---
+    # Senkron metotlar ve async karşılıkları sadece borsa çağrılarını yapar; geri kalan her şey burada
+
+    @staticmethod
+    def _open_order(symbol: str, direction: str, quantity: str) -> Dict[str, Any]:
+        """Pozisyon açan market emrinin parametreleri"""
+        return dict(
+            category="linear",
+            symbol=symbol,
+            side="Buy" if direction == "LONG" else "Sell",
+            orderType="Market",
+            qty=quantity,
+            reduceOnly=False
+        )
+
+    @staticmethod
+    def _close_order(symbol: str, position: Dict) -> Dict[str, Any]:
+        """Pozisyonu kapatan reduceOnly market emrinin parametreleri"""
+        return dict(
+            category="linear",
+            symbol=symbol,
+            side="Sell" if position['direction'] == "LONG" else "Buy",
+            orderType="Market",
+            qty=position['quantity'],
+            reduceOnly=True
+        )
+
+    @staticmethod
+    def _check_opened(order: Dict, symbol: str, direction: str, quantity: str, entry_price: float) -> None:
+        if order['retCode'] != 0:
+            raise Exception(f"Pozisyon açma hatası: {order['retMsg']}")
+        logger.info(f"{symbol} {direction} pozisyon açıldı | Miktar: {quantity} | Entry: {entry_price}")
+
+    @staticmethod
+    def _oco_leg_ids(position: Dict) -> List[str]:
+        """Pozisyonun iptal edilecek TP/SL emir id'leri (OCO yoksa boş)"""
+        if 'oco_pair' not in position:
+            return []
+        return [position['oco_pair']['tp_order_id'], position['oco_pair']['sl_order_id']]
+
+    def _position_confirmed(self, positions: Dict, symbol: str, direction: str, expected_qty: float, attempt: int) -> bool:
+        """get_positions yanıtında beklenen yön ve miktarda (%5 tolerans) pozisyon var mı"""
+        if positions['retCode'] != 0:
+            return False
+        expected_side = 'Buy' if direction == 'LONG' else 'Sell'
+        for pos in positions['result']['list']:
+            pos_size = float(pos.get('size', 0))
+            if pos_size > 0 and pos.get('side', '') == expected_side and abs(pos_size - expected_qty) < expected_qty * 0.05:
+                logger.info(f"{symbol} pozisyon doğrulandı (deneme {attempt + 1}/{self.VERIFY_ATTEMPTS})")
+                return True
+        return False
+
+    def _register_position(self, symbol: str, direction: str, entry_price: float, quantity: str, tp_price: float,
+                           sl_price: float, pct_atr: float, order_id: str, tp_sl_result: Dict) -> Dict:
+        """TP/SL'si kurulmuş pozisyonu (OCO pair dahil) active_positions'a kaydeder"""
+        position = {
+            'symbol': symbol,
+            'direction': direction,
+            'entry_price': entry_price,
+            'quantity': quantity,
+            'take_profit': tp_price,
+            'stop_loss': sl_price,
+            'current_pct_atr': pct_atr,
+            'order_id': order_id,
+            'oco_pair': tp_sl_result['oco_pair']
+        }
+        self.active_positions[symbol] = position
+        return position
+
+    @staticmethod
+    def _apply_tp_sl(position: Dict, tp_sl_result: Dict, tp_price: float, sl_price: float, **fields) -> bool:
+        """Yeni TP/SL emirleri kurulduysa pozisyonu günceller"""
+        if not tp_sl_result.get('success'):
+            return False
+        position.update(fields, take_profit=tp_price, stop_loss=sl_price, oco_pair=tp_sl_result['oco_pair'])
+        return True
+
+    def _finish_close(self, symbol: str, position: Dict, reason: str, order: Dict) -> bool:
+        """Kapanış emrinin yanıtına göre pozisyonu deftere yazıp siler"""
+        if order['retCode'] != 0:
+            logger.error(f"{symbol} pozisyon kapatma hatası: {order['retMsg']}")
+            return False
+        logger.info(f"{symbol} pozisyon kapatıldı | Sebep: {reason}")
+        self._record_exit(symbol, position, reason, order['result'].get('orderId'))
+        del self.active_positions[symbol]
+        return True
+
+    def _refresh_targets(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]]) -> List[Tuple[str, Dict, Dict]]:
+        """
+        Aynı yönde sinyal + yeni data gelen pozisyonlar (Senaryo 2a - TP/SL güncelleme).
+        Ters sinyalde (Senaryo 2b) pozisyon open_position'da kapatılıp yeniden açılır, burada atlanır
+        """
+        targets = []
+        for symbol, position in list(self.active_positions.items()):
+            current_signal = signals.get(symbol)
+            current_data = all_data.get(symbol)
+            current_direction = position['direction']
+
+            if current_signal and current_signal != current_direction:
+                logger.info(f"{symbol} ters sinyal alındı ({current_direction} → {current_signal})")
+                continue  # open_position çağrılacak main loop'ta
+
+            if current_signal and current_data and current_signal == current_direction:
+                logger.info(f"{symbol} aynı yönde sinyal - TP/SL güncelleniyor")
+                targets.append((symbol, position, current_data))
+        return targets
+
+    def _refresh_levels(self, symbol: str, position: Dict, current_data: Dict) -> Tuple[float, float, float]:
+        """Aynı yönde sinyalde yeni giriş fiyatı ve TP/SL (ticker varsa güncel fiyat, yoksa son kapanış)"""
+        entry_price = current_data.get('entry_price', current_data['close'])
+        new_tp, new_sl = self.exit_strategy.calculate_levels(entry_price, current_data['atr'], position['direction'], symbol)
+        return entry_price, new_tp, new_sl
+
+    def _pending_oco(self) -> List[Tuple[str, Dict]]:
+        """OCO kontrolü bekleyen (aktif oco_pair'li) pozisyonlar"""
+        logger.debug(f"monitor_oco_orders çalışıyor - Pozisyon sayısı: {len(self.active_positions)}")
+        pending = []
+        for symbol, position in self.active_positions.items():
+            if 'oco_pair' not in position:
+                logger.debug(f"{symbol} - oco_pair yok, atlandı")
+            elif not position['oco_pair'].get('active'):
+                logger.debug(f"{symbol} - oco_pair aktif değil, atlandı")
+            else:
+                pending.append((symbol, position['oco_pair']))
+        return pending
+
+    def _settle_oco(self, symbol: str, result: Dict) -> None:
+        """OCO bacaklarından biri tetiklendiyse pozisyonu deftere yazıp siler"""
+        logger.debug(f"{symbol} - OCO sonucu: {result}")
+        if result.get('triggered'):
+            logger.info(f"{symbol} {result['triggered']} tetiklendi - Pozisyon otomatik kapatıldı")
+            self._record_exit(symbol, self.active_positions[symbol], result['triggered'])
+            del self.active_positions[symbol]
+
+    # --- Senkron ---
+
     def open_position(self, symbol: str, direction: str, entry_price: float, atr_value: float, pct_atr: float) -> Optional[Dict]:
         """
         Yeni pozisyon açar ve limit TP/SL emirlerini yerleştirir (OCO mantığıyla)
@@ -30,79 +194,108 @@ class PositionManager:
                     return self._update_tp_sl_only(symbol, direction, entry_price, atr_value, pct_atr)
                 
                 # Ters yönde sinyal (Senaryo 2b)
-                else:
-                    logger.info(f"{symbol} ters sinyal alındı ({existing_direction} → {direction}) - Pozisyon tersine dönüyor")
-                    self.close_position(symbol, "REVERSE_SIGNAL")
-                    # Devam et ve yeni pozisyon aç
+                logger.info(f"{symbol} ters sinyal alındı ({existing_direction} → {direction}) - Pozisyon tersine dönüyor")
+                self.close_position(symbol, "REVERSE_SIGNAL")
+                # Devam et ve yeni pozisyon aç
             
             # Pozisyon büyüklüğünü hesapla
             quantity = self._calculate_position_size(symbol, atr_value, entry_price)
             logger.info(f"{symbol} {direction} pozisyon hesaplandı | Miktar: {quantity}")
             
             # Market emri ile pozisyon aç
-            order = self.client.place_order(
-                category="linear",
-                symbol=symbol,
-                side="Buy" if direction == "LONG" else "Sell",
-                orderType="Market",
-                qty=quantity,
-                reduceOnly=False
-            )
-    
-            if order['retCode'] != 0:
-                raise Exception(f"Pozisyon açma hatası: {order['retMsg']}")
-    
-            logger.info(f"{symbol} {direction} pozisyon açıldı | Miktar: {quantity} | Entry: {entry_price}")
+            order = self.client.place_order(**self._open_order(symbol, direction, quantity))
+            self._check_opened(order, symbol, direction, quantity, entry_price)
 
             # ⭐ POZİSYON DOĞRULAMA ⭐
-            # ============================================
-            time.sleep(1)  # ← YENİ: 1 saniye bekle (Bybit'in execute etmesi için)
+            time.sleep(self.settle_delay)  # Bybit'in execute etmesi için
             
             if not self._verify_position_opened(symbol, direction, float(quantity)):
                 logger.warning(f"{symbol} pozisyon doğrulanamadı, TP/SL ayarlanamayacak")
                 return None
-            # ============================================
             
             # TP/SL seviyelerini hesapla
             tp_price, sl_price = self.exit_strategy.calculate_levels(entry_price, atr_value, direction, symbol)
             logger.info(f"{symbol} TP/SL hesaplandı | TP: {tp_price} | SL: {sl_price}")
             
-            # Limit TP/SL emirlerini gönder (YENİ)
-            tp_sl_result = self.exit_strategy.set_limit_tp_sl(
-                symbol=symbol,
-                direction=direction,
-                tp_price=tp_price,
-                sl_price=sl_price,
-                quantity=quantity
-            )
+            # Limit TP/SL emirlerini gönder
+            tp_sl_result = self.exit_strategy.set_limit_tp_sl(symbol, direction, tp_price, sl_price, quantity)
     
             if tp_sl_result.get('success'):
                 logger.info(f"{symbol} Limit TP/SL başarıyla ayarlandı")
-                
-                # Pozisyon bilgilerini kaydet (OCO pair dahil)
-                position = {
-                    'symbol': symbol,
-                    'direction': direction,
-                    'entry_price': entry_price,
-                    'quantity': quantity,
-                    'take_profit': tp_price,
-                    'stop_loss': sl_price,
-                    'current_pct_atr': pct_atr,
-                    'order_id': order['result']['orderId'],
-                    'oco_pair': tp_sl_result['oco_pair']  # YENİ: OCO tracking
-                }
-                self.active_positions[symbol] = position
-                return position
-            else:
-                logger.warning(f"{symbol} TP/SL ayarlanamadı - Pozisyon kapatılıyor")
-                self.close_position(symbol, "TP_SL_FAILED")
-                return None
+                return self._register_position(symbol, direction, entry_price, quantity, tp_price, sl_price,
+                                               pct_atr, order['result']['orderId'], tp_sl_result)
+
+            logger.warning(f"{symbol} TP/SL ayarlanamadı - Pozisyon kapatılıyor")
+            self.close_position(symbol, "TP_SL_FAILED")
+            return None
     
         except Exception as e:
             logger.error(f"{symbol} pozisyon açma hatası: {str(e)}")
             return None
     
     
+    def adopt_filled_entry(self, symbol: str, direction: str, entry_price: float, quantity: str,
+                           atr_value: float, pct_atr: float, order_id: str) -> Optional[Dict]:
+        """
+        Borsada dolmuş koşullu giriş emrini (entry_arming) pozisyon olarak kaydeder:
+        open_position'daki gibi dolum fiyatından limit TP/SL emirleri yerleştirilir. Koşullu emre eklenen
+        borsa tarafı stopLoss (tetik fiyatından) OCO kurulduktan sonra kaldırılır: önce o tetiklenirse
+        OCO bacaklarının hiçbiri dolmaz ve monitor_oco_orders pozisyonu hiç silmez.
+        Dolum ile reconcile arasında (en fazla bir bar) o stopLoss tetiklenmişse pozisyon borsada yoktur:
+        çıkış deftere SL olarak yazılır, hiçbir şey kaydedilmez
+        """
+        try:
+            entry = {'symbol': symbol, 'direction': direction, 'entry_price': entry_price,
+                     'quantity': quantity, 'order_id': order_id}
+            if not self._position_still_open(symbol, direction):
+                logger.info(f"{symbol} koşullu giriş doldu ama pozisyon borsa tarafı stopLoss ile kapanmış - kaydedilmedi")
+                self._record_exit(symbol, entry, "SL")
+                return None
+
+            tp_price, sl_price = self.exit_strategy.calculate_levels(entry_price, atr_value, direction, symbol)
+            logger.info(f"{symbol} koşullu giriş doldu | Entry: {entry_price} | TP: {tp_price} | SL: {sl_price}")
+            
+            tp_sl_result = self.exit_strategy.set_limit_tp_sl(symbol, direction, tp_price, sl_price, quantity)
+            
+            if tp_sl_result.get('success'):
+                self._clear_attached_stop(symbol)
+                return self._register_position(symbol, direction, entry_price, quantity, tp_price, sl_price,
+                                               pct_atr, order_id, tp_sl_result)
+
+            # close_position başarısız olsa da (örn. pozisyon bu arada kapanmış) oco_pair'siz kayıt bırakılmaz:
+            # yeni girişleri bir sonraki senkrona kadar engellerdi
+            logger.warning(f"{symbol} TP/SL ayarlanamadı - Pozisyon kapatılıyor")
+            self.active_positions[symbol] = entry
+            self.close_position(symbol, "TP_SL_FAILED")
+            self.active_positions.pop(symbol, None)
+            return None
+        
+        except Exception as e:
+            logger.error(f"{symbol} koşullu giriş kaydı hatası: {str(e)}")
+            return None
+
+    def _position_still_open(self, symbol: str, direction: str) -> bool:
+        """Borsada bu yönde açık pozisyon var mı; sorgu başarısızsa açık kabul edilir (eski akış)"""
+        try:
+            positions = self.client.get_positions(category='linear', symbol=symbol)
+            if positions['retCode'] != 0:
+                return True
+            expected_side = 'Buy' if direction == 'LONG' else 'Sell'
+            return any(float(pos.get('size', 0)) > 0 and pos.get('side') == expected_side
+                       for pos in positions['result']['list'])
+        except Exception as e:
+            logger.warning(f"{symbol} koşullu giriş pozisyonu sorgulanamadı: {str(e)}")
+            return True
+
+    def _clear_attached_stop(self, symbol: str) -> None:
+        """Pozisyonun borsa tarafı stopLoss'unu kaldırır (SL artık OCO bacağında)"""
+        try:
+            self.client.set_trading_stop(category="linear", symbol=symbol, stopLoss="0", positionIdx=0)
+        except Exception as e:
+            if "not modified" in str(e):  # stop zaten yok
+                return
+            logger.warning(f"{symbol} koşullu girişin stopLoss'u kaldırılamadı (iki SL var): {str(e)}")
+
     def _update_tp_sl_only(self, symbol: str, direction: str, entry_price: float, atr_value: float, pct_atr: float) -> Optional[Dict]:
         """
         Mevcut pozisyonun sadece TP/SL'sini günceller (Senaryo 2a)
@@ -111,36 +304,19 @@ class PositionManager:
             position = self.active_positions[symbol]
             
             # Eski TP/SL emirlerini iptal et
-            if 'oco_pair' in position:
-                logger.info(f"{symbol} eski TP/SL emirleri iptal ediliyor...")
-                self.exit_strategy.cancel_order(symbol, position['oco_pair']['tp_order_id'])
-                self.exit_strategy.cancel_order(symbol, position['oco_pair']['sl_order_id'])
+            for order_id in self._oco_leg_ids(position):
+                self.exit_strategy.cancel_order(symbol, order_id)
             
-            # Yeni TP/SL seviyelerini hesapla
+            # Yeni TP/SL seviyelerini hesapla ve gönder
             tp_price, sl_price = self.exit_strategy.calculate_levels(entry_price, atr_value, direction, symbol)
             logger.info(f"{symbol} Yeni TP/SL hesaplandı | TP: {tp_price} | SL: {sl_price}")
+            tp_sl_result = self.exit_strategy.set_limit_tp_sl(symbol, direction, tp_price, sl_price, position['quantity'])
             
-            # Yeni limit TP/SL emirlerini gönder
-            tp_sl_result = self.exit_strategy.set_limit_tp_sl(
-                symbol=symbol,
-                direction=direction,
-                tp_price=tp_price,
-                sl_price=sl_price,
-                quantity=position['quantity']
-            )
-            
-            if tp_sl_result.get('success'):
-                # Pozisyon bilgilerini güncelle
-                position['take_profit'] = tp_price
-                position['stop_loss'] = sl_price
-                position['current_pct_atr'] = pct_atr
-                position['oco_pair'] = tp_sl_result['oco_pair']
-                
+            if self._apply_tp_sl(position, tp_sl_result, tp_price, sl_price, current_pct_atr=pct_atr):
                 logger.info(f"{symbol} TP/SL başarıyla güncellendi")
                 return position
-            else:
-                logger.error(f"{symbol} TP/SL güncellenemedi")
-                return None
+            logger.error(f"{symbol} TP/SL güncellenemedi")
+            return None
                 
         except Exception as e:
             logger.error(f"{symbol} TP/SL güncelleme hatası: {str(e)}")
@@ -158,34 +334,13 @@ class PositionManager:
             
             position = self.active_positions[symbol]
             
-            # TP/SL emirlerini iptal et
-            if 'oco_pair' in position:
-                logger.info(f"{symbol} TP/SL emirleri iptal ediliyor...")
-                try:
-                    self.exit_strategy.cancel_order(symbol, position['oco_pair']['tp_order_id'])
-                    self.exit_strategy.cancel_order(symbol, position['oco_pair']['sl_order_id'])
-                except Exception as e:
-                    logger.warning(f"{symbol} TP/SL iptal hatası (zaten tetiklenmiş olabilir): {e}")
+            # TP/SL emirlerini iptal et (cancel_order hatayı kendisi loglar; zaten tetiklenmiş olabilir)
+            for order_id in self._oco_leg_ids(position):
+                self.exit_strategy.cancel_order(symbol, order_id)
             
             # Pozisyonu market ile kapat
-            close_side = "Sell" if position['direction'] == "LONG" else "Buy"
-            
-            order = self.client.place_order(
-                category="linear",
-                symbol=symbol,
-                side=close_side,
-                orderType="Market",
-                qty=position['quantity'],
-                reduceOnly=True
-            )
-            
-            if order['retCode'] == 0:
-                logger.info(f"{symbol} pozisyon kapatıldı | Sebep: {reason}")
-                del self.active_positions[symbol]
-                return True
-            else:
-                logger.error(f"{symbol} pozisyon kapatma hatası: {order['retMsg']}")
-                return False
+            order = self.client.place_order(**self._close_order(symbol, position))
+            return self._finish_close(symbol, position, reason, order)
                 
         except Exception as e:
             logger.error(f"{symbol} pozisyon kapatma hatası: {str(e)}")
@@ -194,34 +349,15 @@ class PositionManager:
     def _verify_position_opened(self, symbol: str, direction: str, expected_qty: float) -> bool:
         """
         Pozisyonun gerçekten açıldığını doğrular (timing sorunu önleme)
-        Maksimum 5 saniye boyunca 0.5 saniye aralıklarla kontrol eder
+        VERIFY_ATTEMPTS kez verify_interval aralıklarla kontrol eder
         """
         try:
-            expected_side = 'Buy' if direction == 'LONG' else 'Sell'
+            for attempt in range(self.VERIFY_ATTEMPTS):
+                positions = self.client.get_positions(category='linear', symbol=symbol)
+                if self._position_confirmed(positions, symbol, direction, expected_qty, attempt):
+                    return True
+                time.sleep(self.verify_interval)
             
-            # Maksimum 10 deneme (10 x 0.5 saniye = 5 saniye)
-            for attempt in range(10):
-                positions = self.client.get_positions(
-                    category='linear',
-                    symbol=symbol
-                )
-                
-                if positions['retCode'] == 0:
-                    for pos in positions['result']['list']:
-                        pos_size = float(pos.get('size', 0))
-                        pos_side = pos.get('side', '')
-                        
-                        # Pozisyon var mı ve doğru yönde mi?
-                        if pos_size > 0 and pos_side == expected_side:
-                            # Miktar uyuşuyor mu? (%5 tolerans)
-                            if abs(pos_size - expected_qty) < expected_qty * 0.05:
-                                logger.info(f"{symbol} pozisyon doğrulandı (deneme {attempt + 1}/10)")
-                                return True
-                
-                # 0.5 saniye bekle ve tekrar dene
-                time.sleep(0.5)
-            
-            # 5 saniye sonunda hala bulunamadı
             logger.error(f"{symbol} pozisyon 5 saniye içinde doğrulanamadı")
             return False
             
@@ -234,7 +370,7 @@ class PositionManager:
         Sembol bazlı risk ve kaldıraç ayarlarına göre pozisyon büyüklüğü hesaplar
         """
         # Sembol ayarlarını al, yoksa default değerleri kullan
-        symbol_config = SYMBOL_SETTINGS.get(symbol, {})
+        symbol_config = self.symbol_settings.get(symbol, {})
         risk_amount = symbol_config.get('risk', RISK_PER_TRADE_USDT)  # Fallback için
         leverage = symbol_config.get('leverage', DEFAULT_LEVERAGE)
         
@@ -263,51 +399,17 @@ class PositionManager:
         self.monitor_oco_orders()
         
         # 2. Sinyal bazlı kontroller
-        for symbol, position in list(self.active_positions.items()):
-            current_signal = signals.get(symbol)
-            current_data = all_data.get(symbol)
-            current_direction = position['direction']
-            
-            # Ters sinyal geldi mi? (Senaryo 2b)
-            if current_signal and current_signal != current_direction:
-                logger.info(f"{symbol} ters sinyal alındı ({current_direction} → {current_signal})")
-                # open_position içinde zaten hallediliyor, buradan sadece kapatıyoruz
-                # Yeni pozisyon open_position'da açılacak
-                continue  # open_position çağrılacak main loop'ta
-            
-            # Aynı yönde sinyal + yeni data var mı? (Senaryo 2a - TP/SL güncelleme)
-            if current_signal and current_data and current_signal == current_direction:
-                logger.info(f"{symbol} aynı yönde sinyal - TP/SL güncelleniyor")
-                
-                # Yeni TP/SL hesapla
-                new_tp, new_sl = self.exit_strategy.calculate_levels(
-                    current_data['close'],
-                    current_data['atr'],
-                    current_direction,
-                    symbol
-                )
-                
-                # Eski TP/SL'yi iptal et
-                if 'oco_pair' in position:
-                    self.exit_strategy.cancel_order(symbol, position['oco_pair']['tp_order_id'])
-                    self.exit_strategy.cancel_order(symbol, position['oco_pair']['sl_order_id'])
-                
-                # Yeni TP/SL koy
-                tp_sl_result = self.exit_strategy.set_limit_tp_sl(
-                    symbol=symbol,
-                    direction=current_direction,
-                    tp_price=new_tp,
-                    sl_price=new_sl,
-                    quantity=position['quantity']
-                )
-                
-                if tp_sl_result.get('success'):
-                    # Pozisyonu güncelle
-                    position['entry_price'] = current_data['close']
-                    position['take_profit'] = new_tp
-                    position['stop_loss'] = new_sl
-                    position['oco_pair'] = tp_sl_result['oco_pair']
-                    logger.info(f"{symbol} TP/SL güncellendi | TP: {new_tp} | SL: {new_sl}")
+        for symbol, position, current_data in self._refresh_targets(signals, all_data):
+            self._refresh_tp_sl(symbol, position, current_data)
+
+    def _refresh_tp_sl(self, symbol: str, position: Dict, current_data: Dict) -> None:
+        """Aynı yönde sinyalde TP/SL'yi son kapanışa göre yeniden kurar"""
+        entry_price, new_tp, new_sl = self._refresh_levels(symbol, position, current_data)
+        for order_id in self._oco_leg_ids(position):
+            self.exit_strategy.cancel_order(symbol, order_id)
+        tp_sl_result = self.exit_strategy.set_limit_tp_sl(symbol, position['direction'], new_tp, new_sl, position['quantity'])
+        if self._apply_tp_sl(position, tp_sl_result, new_tp, new_sl, entry_price=entry_price):
+            logger.info(f"{symbol} TP/SL güncellendi | TP: {new_tp} | SL: {new_sl}")
 
 
     def get_active_position(self, symbol: str) -> Optional[Dict]:
@@ -320,25 +422,131 @@ class PositionManager:
         """
         Tüm aktif pozisyonların OCO emirlerini kontrol eder
         """
-        print(f"[DEBUG] monitor_oco_orders çalışıyor - Pozisyon sayısı: {len(self.active_positions)}")  # ← EKLE
-        
-        for symbol, position in list(self.active_positions.items()):
-            print(f"[DEBUG] {symbol} kontrol ediliyor...")  # ← EKLE
+        for symbol, oco_pair in self._pending_oco():
+            self._settle_oco(symbol, self.exit_strategy.check_and_cancel_oco(oco_pair))
+
+
+    # --- Asyncio karşılıkları (run_once_async): aynı yardımcılar, çağrılar async_client üzerinden ---
+
+    async def open_position_async(self, symbol: str, direction: str, entry_price: float, atr_value: float, pct_atr: float) -> Optional[Dict]:
+        """open_position ile aynı akış"""
+        try:
+            if symbol in self.active_positions:
+                existing_direction = self.active_positions[symbol]['direction']
+                
+                if existing_direction == direction:
+                    logger.info(f"{symbol} zaten {direction} pozisyonda - TP/SL güncelleniyor")
+                    return await self._update_tp_sl_only_async(symbol, direction, entry_price, atr_value, pct_atr)
+                
+                logger.info(f"{symbol} ters sinyal alındı ({existing_direction} → {direction}) - Pozisyon tersine dönüyor")
+                await self.close_position_async(symbol, "REVERSE_SIGNAL")
             
-            if 'oco_pair' not in position:
-                print(f"[DEBUG] {symbol} - oco_pair yok, atlandı")  # ← EKLE
-                continue
+            quantity = self._calculate_position_size(symbol, atr_value, entry_price)
+            logger.info(f"{symbol} {direction} pozisyon hesaplandı | Miktar: {quantity}")
+            
+            order = await self.async_client.place_order(**self._open_order(symbol, direction, quantity))
+            self._check_opened(order, symbol, direction, quantity, entry_price)
+
+            await asyncio.sleep(self.settle_delay)  # diğer semboller bu sırada ilerler
+            
+            if not await self._verify_position_opened_async(symbol, direction, float(quantity)):
+                logger.warning(f"{symbol} pozisyon doğrulanamadı, TP/SL ayarlanamayacak")
+                return None
+            
+            tp_price, sl_price = self.exit_strategy.calculate_levels(entry_price, atr_value, direction, symbol)
+            logger.info(f"{symbol} TP/SL hesaplandı | TP: {tp_price} | SL: {sl_price}")
+            
+            tp_sl_result = await self.exit_strategy.set_limit_tp_sl_async(symbol, direction, tp_price, sl_price, quantity)
+    
+            if tp_sl_result.get('success'):
+                logger.info(f"{symbol} Limit TP/SL başarıyla ayarlandı")
+                return self._register_position(symbol, direction, entry_price, quantity, tp_price, sl_price,
+                                               pct_atr, order['result']['orderId'], tp_sl_result)
+
+            logger.warning(f"{symbol} TP/SL ayarlanamadı - Pozisyon kapatılıyor")
+            await self.close_position_async(symbol, "TP_SL_FAILED")
+            return None
+    
+        except Exception as e:
+            logger.error(f"{symbol} pozisyon açma hatası: {str(e)}")
+            return None
+
+    async def _cancel_legs_async(self, symbol: str, position: Dict) -> None:
+        """Pozisyonun TP/SL emirlerini eşzamanlı iptal eder"""
+        await asyncio.gather(*(self.exit_strategy.cancel_order_async(symbol, order_id)
+                               for order_id in self._oco_leg_ids(position)))
+
+    async def _update_tp_sl_only_async(self, symbol: str, direction: str, entry_price: float, atr_value: float, pct_atr: float) -> Optional[Dict]:
+        """_update_tp_sl_only ile aynı"""
+        try:
+            position = self.active_positions[symbol]
+            await self._cancel_legs_async(symbol, position)
+            
+            tp_price, sl_price = self.exit_strategy.calculate_levels(entry_price, atr_value, direction, symbol)
+            logger.info(f"{symbol} Yeni TP/SL hesaplandı | TP: {tp_price} | SL: {sl_price}")
+            tp_sl_result = await self.exit_strategy.set_limit_tp_sl_async(symbol, direction, tp_price, sl_price, position['quantity'])
+            
+            if self._apply_tp_sl(position, tp_sl_result, tp_price, sl_price, current_pct_atr=pct_atr):
+                logger.info(f"{symbol} TP/SL başarıyla güncellendi")
+                return position
+            logger.error(f"{symbol} TP/SL güncellenemedi")
+            return None
                 
-            oco_pair = position['oco_pair']
+        except Exception as e:
+            logger.error(f"{symbol} TP/SL güncelleme hatası: {str(e)}")
+            return None
+
+    async def close_position_async(self, symbol: str, reason: str = "MANUAL") -> bool:
+        """close_position ile aynı"""
+        try:
+            if symbol not in self.active_positions:
+                logger.warning(f"{symbol} kapatılacak pozisyon bulunamadı")
+                return False
             
-            if not oco_pair.get('active'):
-                print(f"[DEBUG] {symbol} - oco_pair aktif değil, atlandı")  # ← EKLE
-                continue
+            position = self.active_positions[symbol]
+            await self._cancel_legs_async(symbol, position)
+            order = await self.async_client.place_order(**self._close_order(symbol, position))
+            return self._finish_close(symbol, position, reason, order)
+                
+        except Exception as e:
+            logger.error(f"{symbol} pozisyon kapatma hatası: {str(e)}")
+            return False
+
+    async def _verify_position_opened_async(self, symbol: str, direction: str, expected_qty: float) -> bool:
+        """_verify_position_opened ile aynı; bekleme asyncio.sleep ile yapılır"""
+        try:
+            for attempt in range(self.VERIFY_ATTEMPTS):
+                positions = await self.async_client.get_positions(category='linear', symbol=symbol)
+                if self._position_confirmed(positions, symbol, direction, expected_qty, attempt):
+                    return True
+                await asyncio.sleep(self.verify_interval)
             
-            print(f"[DEBUG] {symbol} - check_and_cancel_oco çağrılıyor...")  # ← EKLE
-            result = self.exit_strategy.check_and_cancel_oco(oco_pair)
-            print(f"[DEBUG] {symbol} - Sonuç: {result}")  # ← EKLE
+            logger.error(f"{symbol} pozisyon 5 saniye içinde doğrulanamadı")
+            return False
             
-            if result.get('triggered'):
-                logger.info(f"{symbol} {result['triggered']} tetiklendi - Pozisyon otomatik kapatıldı")
-                del self.active_positions[symbol]
+        except Exception as e:
+            logger.error(f"{symbol} pozisyon doğrulama hatası: {e}")
+            return False
+
+    async def manage_positions_async(self, signals: Dict[str, Optional[str]], all_data: Dict[str, Optional[Dict]]) -> None:
+        """manage_positions ile aynı; semboller arası güncellemeler eşzamanlı çalışır"""
+        await self.monitor_oco_orders_async()
+        await asyncio.gather(*(self._refresh_tp_sl_async(symbol, position, current_data)
+                               for symbol, position, current_data in self._refresh_targets(signals, all_data)))
+
+    async def _refresh_tp_sl_async(self, symbol: str, position: Dict, current_data: Dict) -> None:
+        """_refresh_tp_sl ile aynı"""
+        entry_price, new_tp, new_sl = self._refresh_levels(symbol, position, current_data)
+        await self._cancel_legs_async(symbol, position)
+        tp_sl_result = await self.exit_strategy.set_limit_tp_sl_async(symbol, position['direction'], new_tp, new_sl, position['quantity'])
+        if self._apply_tp_sl(position, tp_sl_result, new_tp, new_sl, entry_price=entry_price):
+            logger.info(f"{symbol} TP/SL güncellendi | TP: {new_tp} | SL: {new_sl}")
+
+    async def monitor_oco_orders_async(self):
+        """Tüm aktif pozisyonların OCO emirlerini eşzamanlı kontrol eder"""
+        pending = self._pending_oco()
+        results = await asyncio.gather(
+            *(self.exit_strategy.check_and_cancel_oco_async(oco_pair) for _, oco_pair in pending)
+        )
+        for (symbol, _), result in zip(pending, results):
+            self._settle_oco(symbol, result)
@@ -0,0 +1,132 @@
+"""
+İsteğe bağlı tur profili (trading_bot_trigger '?profile=...' ile, config.PROFILING_ENABLED gerekir).
+
+Modlar (virgülle birleştirilebilir, örn. 'cpu,alloc'):
+    cpu     cProfile (deterministik): en çok kümülatif süre alan top-N fonksiyon + paket bazında self süre
+    sample  pyinstrument (opsiyonel bağımlılık, örnekleme): düşük ek yük, en yoğun çağrı yolları
+    alloc   tracemalloc: tepe bellek + en çok ayıran top-N satır
+Paket özeti (pandas / numpy / pybit / yerel modüller) yavaşlığın kaynağını tek bakışta gösterir.
+'alloc' açıkken tracemalloc süreleri şişirir; kesin süre için sadece 'cpu' veya 'sample' kullanın.
+"""
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODES = ('cpu', 'sample', 'alloc')
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROFILER_FILES = ('*/cProfile.py', '*/pstats.py', '*/tracemalloc.py', '*/pyinstrument/*', __file__)
+
+
+def parse_modes(value: str) -> List[str]:
+    """'1' / 'true' -> ['cpu', 'alloc']; bilinmeyen modlar atlanır"""
+    if value.lower() in ('1', 'true', 'yes', 'all'):
+        return ['cpu', 'alloc']
+    return [mode for mode in value.lower().split(',') if mode in MODES]
+
+
+def _package(filename: str) -> str:
+    """Dosya yolundan üst paket adı: site-packages altı -> paket, repo -> modül, diğer -> stdlib/builtins"""
+    if filename.startswith('~') or filename.startswith('<'):
+        return 'builtins'
+    if 'site-packages' in filename or 'dist-packages' in filename:
+        rest = filename.split('-packages' + os.sep, 1)[-1]
+        return rest.split(os.sep, 1)[0].split('.', 1)[0]
+    if os.path.abspath(filename).startswith(_REPO_DIR):
+        return os.path.splitext(os.path.basename(filename))[0]
+    return 'stdlib'
+
+
+def _short(filename: str) -> str:
+    if 'site-packages' in filename or 'dist-packages' in filename:
+        return filename.split('-packages' + os.sep, 1)[-1]
+    return os.path.basename(filename)
+
+
+def _cpu_report(profiler, top: int) -> Dict[str, Any]:
+    import pstats
+    stats = pstats.Stats(profiler)
+    rows = []
+    by_package: Dict[str, float] = {}
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        package = _package(filename)
+        by_package[package] = by_package.get(package, 0.0) + tottime
+        rows.append((cumtime, tottime, ncalls, f"{_short(filename)}:{line}({name})"))
+
+    rows.sort(reverse=True)
+    return {
+        'total_s': round(stats.total_tt, 4),
+        'top_cumulative': [
+            {'function': fn, 'calls': calls, 'tottime_s': round(tot, 4), 'cumtime_s': round(cum, 4)}
+            for cum, tot, calls, fn in rows[:top]
+        ],
+        'top_self': [
+            {'function': fn, 'calls': calls, 'tottime_s': round(tot, 4)}
+            for _, tot, calls, fn in sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+        ],
+        'self_time_by_package_s': {
+            package: round(sec, 4)
+            for package, sec in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        },
+    }
+
+
+def _alloc_report(snapshot, peak: int, top: int) -> Dict[str, Any]:
+    stats = snapshot.statistics('lineno')
+    return {
+        'peak_kb': round(peak / 1024, 1),
+        'retained_kb': round(sum(stat.size for stat in stats) / 1024, 1),
+        'top_lines': [
+            {'line': f"{_short(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+             'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in stats[:top]
+        ],
+    }
+
+
+def profile_call(fn: Callable[[], Any], modes: List[str], top: int = 20) -> Tuple[Any, Dict[str, Any]]:
+    """fn()'i istenen profilleyicilerle çalıştırır; (fn sonucu, kompakt rapor)"""
+    report: Dict[str, Any] = {'modes': modes}
+    profiler = sampler = None
+
+    if 'alloc' in modes:
+        import tracemalloc
+        tracemalloc.start()
+    if 'sample' in modes:
+        try:
+            from pyinstrument import Profiler  # opsiyonel bağımlılık
+            sampler = Profiler(interval=0.001)
+            sampler.start()
+        except ImportError:
+            report['sample'] = 'pyinstrument kurulu değil'
+    if 'cpu' in modes:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    t0 = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        report['wall_s'] = round(time.perf_counter() - t0, 4)
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        if 'alloc' in modes:
+            # rapor üretiminden önce; profilleyicilerin kendi ayırmaları hariç tutulur
+            import tracemalloc
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, pattern) for pattern in _PROFILER_FILES]
+            )
+            tracemalloc.stop()
+            report['alloc'] = _alloc_report(snapshot, peak, top)
+        if profiler is not None:
+            report['cpu'] = _cpu_report(profiler, top)
+        if sampler is not None:
+            report['sample'] = sampler.output_text(unicode=False, color=False, show_all=False).splitlines()[:top * 3]
+
+    return result, report
@@ -0,0 +1,450 @@
+"""
+Borsa çağrıları için dayanıklılık katmanı: pybit HTTP / AsyncBybitHTTP önünde şeffaf sarmalayıcı.
+
+Uç nokta başına politika (ENDPOINT_POLICIES):
+- deadline: tüm denemeler dahil toplam süre; aşılırsa DeadlineExceeded (tur en yavaş isteği beklemez)
+- deneme süresi (ATTEMPT_TIMEOUT_S): tek deneme bundan uzun sürerse bırakılır ve deadline içinde tekrarlanır
+- okuma: geçici hatalarda (ağ, 5xx, rate limit, deadline) full-jitter üstel backoff ile yeniden deneme
+- piyasa verisi (get_kline, get_tickers): yanıt son gecikmelerin p95'inden uzun sürerse aynı istek
+  ikinci kez gönderilir (hedge), önce gelen yanıt kullanılır
+- place_order: orderLinkId yoksa üretilir, yeniden deneme aynı id ile yapılır; borsa
+  "duplicate orderLinkId" derse ilk deneme işlenmiştir, emir orderLinkId ile bulunup döndürülür
+- devre kesici (market / trade grubu başına): art arda geçici hatalarda açılır, bekleme süresince
+  çağrılar beklemeden CircuitOpenError ile düşer; süre dolunca tek deneme (half-open) yapılır
+İş kuralı hataları (parametre, bakiye, emir yok vb.) yeniden denenmez ve devreyi açmaz.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from config import (READ_DEADLINE_S, WRITE_DEADLINE_S, ATTEMPT_TIMEOUT_S, RETRY_ATTEMPTS, RETRY_BACKOFF_S,
+                    HEDGE_ENABLED, HEDGE_MIN_DELAY_S, BREAKER_FAILURES, BREAKER_COOLDOWN_S)
+
+logger = logging.getLogger(__name__)
+
+# kind: read (serbest yeniden deneme) | idempotent (aynı sonucu verir) | write (orderLinkId ile)
+ENDPOINT_POLICIES: Dict[str, Dict[str, Any]] = {
+    'get_kline':         {'group': 'market', 'kind': 'read', 'deadline': READ_DEADLINE_S, 'hedge': True},
+    'get_tickers':       {'group': 'market', 'kind': 'read', 'deadline': READ_DEADLINE_S, 'hedge': True},
+    'get_positions':     {'group': 'trade', 'kind': 'read', 'deadline': READ_DEADLINE_S, 'hedge': False},
+    'get_open_orders':   {'group': 'trade', 'kind': 'read', 'deadline': READ_DEADLINE_S, 'hedge': False},
+    'get_order_history': {'group': 'trade', 'kind': 'read', 'deadline': READ_DEADLINE_S, 'hedge': False},
+    'get_executions':    {'group': 'trade', 'kind': 'read', 'deadline': READ_DEADLINE_S, 'hedge': False},
+    'get_closed_pnl':    {'group': 'trade', 'kind': 'read', 'deadline': READ_DEADLINE_S, 'hedge': False},
+    'set_leverage':      {'group': 'trade', 'kind': 'idempotent', 'deadline': WRITE_DEADLINE_S, 'hedge': False},
+    'cancel_order':      {'group': 'trade', 'kind': 'idempotent', 'deadline': WRITE_DEADLINE_S, 'hedge': False},
+    'set_trading_stop':  {'group': 'trade', 'kind': 'idempotent', 'deadline': WRITE_DEADLINE_S, 'hedge': False},
+    'place_order':       {'group': 'trade', 'kind': 'write', 'deadline': WRITE_DEADLINE_S, 'hedge': False},
+}
+
+# Geçici Bybit retCode'ları: sunucu timeout, rate limit, sistem hatası, IP rate limit
+RETRYABLE_CODES = {10000, 10006, 10016, 10018, 10429}
+DUPLICATE_LINK_ID = 110072  # "OrderLinkedID is duplicate"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%H:%M:%S")
+
+
+class DeadlineExceeded(FailedRequestError):
+    """Uç nokta deadline'ı doldu (istek arka planda sürüyor olabilir)"""
+
+    def __init__(self, method: str, deadline: float):
+        super().__init__(request=method, message=f"deadline aşıldı ({deadline:.2f}s)",
+                         status_code=0, time=_now(), resp_headers=None)
+
+
+class CircuitOpenError(FailedRequestError):
+    """Devre açık: istek gönderilmeden reddedildi"""
+
+    def __init__(self, method: str, group: str):
+        super().__init__(request=method, message=f"devre açık ({group}), istek gönderilmedi",
+                         status_code=0, time=_now(), resp_headers=None)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Yeniden denemeye / devre kesiciye sayılan hata mı (ağ, HTTP, timeout, rate limit)"""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, InvalidRequestError):
+        return exc.status_code in RETRYABLE_CODES
+    return isinstance(exc, (FailedRequestError, OSError, TimeoutError, asyncio.TimeoutError))
+
+
+def new_order_link_id() -> str:
+    """Bybit orderLinkId (en fazla 36 karakter)"""
+    return f"bot-{uuid.uuid4().hex[:28]}"
+
+
+class CircuitBreaker:
+    """closed -> (failures art arda geçici hata) -> open -> (cooldown) -> half_open -> closed / open"""
+
+    def __init__(self, group: str, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN_S,
+                 clock: Callable[[], float] = time.monotonic):
+        self.group = group
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and self.clock() - self.opened_at >= self.cooldown:
+                self.state = 'half_open'  # tek deneme isteği geçer
+                logger.info(f"Devre yarı açık ({self.group}): deneme isteği gönderiliyor")
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"Devre kapandı ({self.group}): API tekrar sağlıklı")
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.threshold):
+                self.state = 'open'
+                self.opened_at = self.clock()
+                self.trips += 1
+                logger.warning(f"Devre açıldı ({self.group}): {self.failures} art arda hata, "
+                               f"{self.cooldown:.0f}s boyunca istekler hemen reddedilecek")
+
+
+class LatencyTracker:
+    """Uç nokta başına son başarılı gecikmeler; hedge eşiği = max(HEDGE_MIN_DELAY_S, p95)"""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples: deque = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+    def hedge_delay(self) -> float:
+        if len(self.samples) < self.min_samples:
+            return HEDGE_MIN_DELAY_S
+        return max(HEDGE_MIN_DELAY_S, self.percentile(95))
+
+
+class ResilienceState:
+    """Sync ve async sarmalayıcıların paylaştığı devre kesiciler, gecikme geçmişi ve sayaçlar"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.breakers = {group: CircuitBreaker(group, clock=clock)
+                         for group in {p['group'] for p in ENDPOINT_POLICIES.values()}}
+        self.latency = {method: LatencyTracker() for method in ENDPOINT_POLICIES}
+        self.stats = {name: Counter() for name in
+                      ('calls', 'retries', 'hedges', 'hedge_wins', 'deadlines', 'rejected', 'recovered')}
+        self.rng = random.Random()
+
+    def available(self, group: str) -> bool:
+        return self.breakers[group].state != 'open'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Tur sonucuna eklenen kompakt özet"""
+        return {
+            'circuits': {group: b.state for group, b in self.breakers.items()},
+            'trips': sum(b.trips for b in self.breakers.values()),
+            **{name: sum(counter.values()) for name, counter in self.stats.items()},
+            'p95_ms': {method: round(t.percentile(95) * 1000, 1)
+                       for method, t in self.latency.items() if t.samples},
+        }
+
+
+class _ResilientBase:
+    """Sync/async sarmalayıcıların ortak politika mantığı"""
+
+    def __init__(self, session, state: Optional[ResilienceState] = None):
+        self.session = session
+        self.state = state or ResilienceState()
+
+    def __getattr__(self, name):
+        # Politikası olmayan metotlar doğrudan alttaki oturuma gider
+        if name == 'session':
+            raise AttributeError(name)
+        return getattr(self.session, name)
+
+    def _prepare(self, method: str, kwargs: Dict) -> Dict:
+        self.state.stats['calls'][method] += 1
+        if ENDPOINT_POLICIES[method]['kind'] == 'write' and not kwargs.get('orderLinkId'):
+            kwargs = dict(kwargs, orderLinkId=new_order_link_id())
+        return kwargs
+
+    def _check_circuit(self, method: str) -> None:
+        group = ENDPOINT_POLICIES[method]['group']
+        if not self.state.breakers[group].allow():
+            self.state.stats['rejected'][method] += 1
+            raise CircuitOpenError(method, group)
+
+    def _backoff(self, method: str, attempt: int, exc: BaseException, deadline: float) -> float:
+        """Hata sonrası bekleme süresi; yeniden denenmeyecekse hatayı yükseltir"""
+        policy = ENDPOINT_POLICIES[method]
+        breaker = self.state.breakers[policy['group']]
+        if not is_transient(exc):
+            breaker.record_success()  # borsa yanıt verdi; iş kuralı hatası
+            raise exc
+        breaker.record_failure()
+        if isinstance(exc, DeadlineExceeded):
+            self.state.stats['deadlines'][method] += 1
+
+        delay = self.state.rng.uniform(0, RETRY_BACKOFF_S * 2 ** (attempt - 1))  # full jitter
+        if attempt >= RETRY_ATTEMPTS or time.monotonic() + delay >= deadline:
+            raise exc
+        self.state.stats['retries'][method] += 1
+        logger.warning(f"{method} geçici hata, {delay:.2f}s sonra tekrar denenecek "
+                       f"({attempt}/{RETRY_ATTEMPTS}): {str(exc).splitlines()[0]}")
+        return delay
+
+    def _record(self, method: str, started: float) -> None:
+        self.state.breakers[ENDPOINT_POLICIES[method]['group']].record_success()
+        self.state.latency[method].add(time.monotonic() - started)
+
+    @staticmethod
+    def _is_duplicate(method: str, attempt: int, exc: BaseException) -> bool:
+        """Yeniden denenen emir 'duplicate orderLinkId' aldıysa ilk deneme borsada işlenmiştir"""
+        return (ENDPOINT_POLICIES[method]['kind'] == 'write' and attempt > 1
+                and isinstance(exc, InvalidRequestError) and exc.status_code == DUPLICATE_LINK_ID)
+
+    def _recovered(self, kwargs: Dict, orders: list) -> Optional[Dict]:
+        if not orders:
+            return None
+        self.state.stats['recovered']['place_order'] += 1
+        logger.info(f"{kwargs.get('symbol')} emri ilk denemede işlenmiş, orderLinkId ile bulundu: "
+                    f"{kwargs['orderLinkId']}")
+        order = orders[0]
+        return {'retCode': 0, 'retMsg': 'OK', 'retExtInfo': {}, 'time': int(time.time() * 1000),
+                'result': {'orderId': order['orderId'], 'orderLinkId': order['orderLinkId']}}
+
+
+class ResilientSession(_ResilientBase):
+    """
+    pybit HTTP sarmalayıcısı: her deneme iş parçacığı havuzunda çalışır, böylece deadline
+    ve hedge senkron çağrılarda da uygulanır (deadline aşan istek arka planda biter, sonucu atılır)
+    """
+
+    def __init__(self, session, state: Optional[ResilienceState] = None, max_workers: int = 16):
+        super().__init__(session, state)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bybit')
+
+    def _call(self, method: str, kwargs: Dict) -> Dict:
+        kwargs = self._prepare(method, kwargs)
+        policy = ENDPOINT_POLICIES[method]
+        deadline = time.monotonic() + policy['deadline']
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_circuit(method)
+            try:
+                return self._attempt(method, kwargs, deadline)
+            except Exception as e:
+                if self._is_duplicate(method, attempt, e):
+                    recovered = self._recover_order(kwargs)
+                    if recovered is not None:
+                        return recovered
+                time.sleep(self._backoff(method, attempt, e, deadline))
+
+    def _attempt(self, method: str, kwargs: Dict, deadline: float) -> Dict:
+        fn = getattr(self.session, method)
+        started = time.monotonic()
+        if deadline - started <= 0:
+            raise DeadlineExceeded(method, ENDPOINT_POLICIES[method]['deadline'])
+        deadline = min(deadline, started + ATTEMPT_TIMEOUT_S)
+
+        pending = {self._executor.submit(fn, **kwargs)}
+        primary = next(iter(pending))
+        if HEDGE_ENABLED and ENDPOINT_POLICIES[method]['hedge']:
+            done, _ = wait(pending, timeout=min(self.state.latency[method].hedge_delay(), deadline - started))
+            if not done and time.monotonic() < deadline:
+                self.state.stats['hedges'][method] += 1
+                pending.add(self._executor.submit(fn, **kwargs))
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(method, deadline - started)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self.state.stats['hedge_wins'][method] += 1
+                    self._record(method, started)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _recover_order(self, kwargs: Dict) -> Optional[Dict]:
+        query = {'category': kwargs.get('category', 'linear'), 'symbol': kwargs.get('symbol'),
+                 'orderLinkId': kwargs['orderLinkId']}
+        try:
+            orders = self.get_open_orders(**query)['result']['list']
+            if not orders:
+                orders = self.get_order_history(**query)['result']['list']
+        except Exception as e:
+            logger.error(f"orderLinkId ile emir sorgulanamadı ({kwargs['orderLinkId']}): {e}")
+            return None
+        return self._recovered(kwargs, orders)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    # --- pybit HTTP arayüzü ---
+    def get_kline(self, **kwargs) -> Dict:
+        return self._call('get_kline', kwargs)
+
+    def get_tickers(self, **kwargs) -> Dict:
+        return self._call('get_tickers', kwargs)
+
+    def set_leverage(self, **kwargs) -> Dict:
+        return self._call('set_leverage', kwargs)
+
+    def get_positions(self, **kwargs) -> Dict:
+        return self._call('get_positions', kwargs)
+
+    def place_order(self, **kwargs) -> Dict:
+        return self._call('place_order', kwargs)
+
+    def cancel_order(self, **kwargs) -> Dict:
+        return self._call('cancel_order', kwargs)
+
+    def set_trading_stop(self, **kwargs) -> Dict:
+        return self._call('set_trading_stop', kwargs)
+
+    def get_open_orders(self, **kwargs) -> Dict:
+        return self._call('get_open_orders', kwargs)
+
+    def get_order_history(self, **kwargs) -> Dict:
+        return self._call('get_order_history', kwargs)
+
+    def get_executions(self, **kwargs) -> Dict:
+        return self._call('get_executions', kwargs)
+
+    def get_closed_pnl(self, **kwargs) -> Dict:
+        return self._call('get_closed_pnl', kwargs)
+
+
+class AsyncResilientSession(_ResilientBase):
+    """AsyncBybitHTTP sarmalayıcısı; deadline/hedge asyncio.wait ile, kaybeden istek iptal edilir"""
+
+    async def __aenter__(self):
+        await self.session.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.__aexit__(exc_type, exc, tb)
+
+    async def close(self):
+        await self.session.close()
+
+    async def _call(self, method: str, kwargs: Dict) -> Dict:
+        kwargs = self._prepare(method, kwargs)
+        deadline = time.monotonic() + ENDPOINT_POLICIES[method]['deadline']
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_circuit(method)
+            try:
+                return await self._attempt(method, kwargs, deadline)
+            except Exception as e:
+                if self._is_duplicate(method, attempt, e):
+                    recovered = await self._recover_order(kwargs)
+                    if recovered is not None:
+                        return recovered
+                await asyncio.sleep(self._backoff(method, attempt, e, deadline))
+
+    async def _attempt(self, method: str, kwargs: Dict, deadline: float) -> Dict:
+        fn = getattr(self.session, method)
+        started = time.monotonic()
+        if deadline - started <= 0:
+            raise DeadlineExceeded(method, ENDPOINT_POLICIES[method]['deadline'])
+        deadline = min(deadline, started + ATTEMPT_TIMEOUT_S)
+
+        primary = asyncio.ensure_future(fn(**kwargs))
+        pending = {primary}
+        try:
+            if HEDGE_ENABLED and ENDPOINT_POLICIES[method]['hedge']:
+                done, _ = await asyncio.wait(
+                    pending, timeout=min(self.state.latency[method].hedge_delay(), deadline - started)
+                )
+                if not done and time.monotonic() < deadline:
+                    self.state.stats['hedges'][method] += 1
+                    pending.add(asyncio.ensure_future(fn(**kwargs)))
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(deadline - time.monotonic(), 0), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise DeadlineExceeded(method, deadline - started)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.state.stats['hedge_wins'][method] += 1
+                        self._record(method, started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _recover_order(self, kwargs: Dict) -> Optional[Dict]:
+        query = {'category': kwargs.get('category', 'linear'), 'symbol': kwargs.get('symbol'),
+                 'orderLinkId': kwargs['orderLinkId']}
+        try:
+            orders = (await self.get_open_orders(**query))['result']['list']
+            if not orders:
+                orders = (await self.get_order_history(**query))['result']['list']
+        except Exception as e:
+            logger.error(f"orderLinkId ile emir sorgulanamadı ({kwargs['orderLinkId']}): {e}")
+            return None
+        return self._recovered(kwargs, orders)
+
+    # --- AsyncBybitHTTP arayüzü ---
+    async def get_kline(self, **kwargs) -> Dict:
+        return await self._call('get_kline', kwargs)
+
+    async def get_tickers(self, **kwargs) -> Dict:
+        return await self._call('get_tickers', kwargs)
+
+    async def set_leverage(self, **kwargs) -> Dict:
+        return await self._call('set_leverage', kwargs)
+
+    async def get_positions(self, **kwargs) -> Dict:
+        return await self._call('get_positions', kwargs)
+
+    async def place_order(self, **kwargs) -> Dict:
+        return await self._call('place_order', kwargs)
+
+    async def cancel_order(self, **kwargs) -> Dict:
+        return await self._call('cancel_order', kwargs)
+
+    async def get_open_orders(self, **kwargs) -> Dict:
+        return await self._call('get_open_orders', kwargs)
+
+    async def get_order_history(self, **kwargs) -> Dict:
+        return await self._call('get_order_history', kwargs)
@@ -0,0 +1,760 @@
+"""
+Yerel Bybit borsa simülatörü (paper trading / deterministik çalıştırma).
+
+Botun kullandığı pybit HTTP metotlarını (get_kline, get_tickers, set_leverage, get_positions,
+place_order, get_open_orders, get_order_history, cancel_order, set_trading_stop, get_executions,
+get_closed_pnl) süreç içinde taklit eder:
+- geçmiş mumlar bar bar oynatılır (advance), get_kline o ana kadarki barları döndürür
+- Market emirleri son fiyattan, Limit emirleri bar high/low'a değdiğinde, stop (triggerPrice)
+  emirleri tetik seviyesi geçildiğinde dolar (gap varsa bar açılışından)
+- emre eklenen stopLoss dolumda pozisyon stop'u olur (set_trading_stop ile değişir, '0' kaldırır);
+  tetiklenince pozisyonu market emirle kapatır
+- çağrı başına gecikme (+ olasılıklı gecikme kuyruğu) ve hata enjeksiyonu (ağ hatası, rate limit,
+  işlendikten sonra timeout)
+
+Kullanım:
+    python simulator.py --bars 200                  # sentetik veriyle 200 tur
+    python simulator.py --csv-dir data/ --bars 500  # data/<SYMBOL>.csv (time,open,high,low,close,volume)
+    python simulator.py --latency 0.05 --error-rate 0.02 --async
+    python simulator.py --latency 0.05 --tail-rate 0.02 --tail-latency 3  # %2 çağrı +3s
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from config import SYMBOLS, INTERVAL
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('New', 'PartiallyFilled', 'Untriggered')
+
+# Enjekte edilebilen hata türleri
+#   network    -> istek borsaya ulaşmadan FailedRequestError
+#   rate_limit -> retCode 10006 (InvalidRequestError), durum değişmez
+#   timeout    -> istek işlenir ama yanıt gelmez (FailedRequestError); belirsiz sonuç testi için
+ERROR_KINDS = ('network', 'rate_limit', 'timeout')
+HISTORY_WINDOW_MS = 7 * 86_400_000  # get_executions / get_closed_pnl: endTime - startTime üst sınırı
+
+# Sentetik veride başlangıç fiyatları: config'teki ROUND_NUMBERS / TP_ROUND_NUMBERS / atr_ranges bu
+# fiyat seviyelerine göre ayarlı (listede olmayan sembollerde rastgele 10^U(-1, 4))
+REFERENCE_PRICES = {'BTCUSDT': 60000.0, 'ETHUSDT': 3000.0, 'SOLUSDT': 150.0, 'XRPUSDT': 0.6, 'DOGEUSDT': 0.15}
+
+Latency = Union[float, Tuple[float, float]]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%H:%M:%S")
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value))
+
+
+def synthetic_frames(
+    symbols: Iterable[str] = SYMBOLS,
+    bars: int = 1000,
+    interval: str = INTERVAL,
+    seed: int = 0,
+    start: str = '2024-01-01',
+    bases: Optional[Dict[str, float]] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Sembol başına log-normal rastgele yürüyüş OHLCV (exchange.get_ohlcv ile aynı şekil).
+    bases: başlangıç fiyatları (REFERENCE_PRICES'ın üzerine yazar)
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=bars, freq=f'{int(interval)}min')
+    bases = {**REFERENCE_PRICES, **(bases or {})}
+    frames = {}
+    for symbol in symbols:
+        base = 10.0 ** rng.uniform(-1, 4)
+        if symbol in bases:
+            base = bases[symbol]
+        close = base * np.exp(np.cumsum(rng.normal(0, 0.004, bars)))
+        open_ = np.concatenate([[base], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.003, bars)) * close
+        frames[symbol] = pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) + spread,
+            'low': np.minimum(open_, close) - spread,
+            'close': close,
+            'volume': rng.uniform(100, 1000, bars),
+        }, index=index)
+    return frames
+
+
+def load_csv_frames(directory: str, symbols: Iterable[str] = SYMBOLS) -> Dict[str, pd.DataFrame]:
+    """<directory>/<SYMBOL>.csv dosyalarını (time,open,high,low,close,volume) yükler"""
+    frames = {}
+    for symbol in symbols:
+        df = pd.read_csv(f"{directory.rstrip('/')}/{symbol}.csv", parse_dates=['time'], index_col='time')
+        frames[symbol] = df[['open', 'high', 'low', 'close', 'volume']].astype(float).sort_index()
+    return frames
+
+
+class SimulatedBybitHTTP:
+    """
+    pybit.unified_trading.HTTP yerine geçen süreç içi borsa (linear, one-way net pozisyon).
+    Tüm semboller ortak bir bar imleciyle ilerler; get_kline imlece kadar olan barları
+    (Bybit gibi yeniden eskiye, string) döndürür, son bar anlık fiyattır.
+    """
+
+    def __init__(
+        self,
+        frames: Dict[str, pd.DataFrame],
+        start: int = 250,
+        latency: Latency = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_kinds: Tuple[str, ...] = ('network', 'rate_limit'),
+        error_methods: Optional[Iterable[str]] = None,
+        slippage_bps: float = 0.0,
+        spread_bps: float = 2.0,
+        taker_fee: float = 0.00055,
+        maker_fee: float = 0.0002,
+        stops_first: bool = True,
+        seed: int = 0,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.symbols = list(frames)
+        self.cursor = start - 1
+        self.latency = latency
+        self.tail_rate = tail_rate        # bu olasılıkla çağrıya tail_latency eklenir (gecikme kuyruğu)
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.error_kinds = tuple(error_kinds)
+        self.error_methods = set(error_methods) if error_methods is not None else None
+        self.slippage_bps = slippage_bps
+        self.spread_bps = spread_bps  # get_tickers bid/ask aralığı
+        self.taker_fee = taker_fee
+        self.maker_fee = maker_fee
+        self.stops_first = stops_first  # aynı barda TP ve SL'ye değerse önce SL (kötümser)
+        self.sleep = sleep
+        self.rng = random.Random(seed)
+
+        # Sembol başına kronolojik OHLC dizisi + hazır kline satırları
+        self._ohlc: Dict[str, np.ndarray] = {}
+        self._rows: Dict[str, List[List[str]]] = {}
+        for symbol, df in frames.items():
+            ohlc = df[['open', 'high', 'low', 'close']].to_numpy(dtype=float)
+            volume = df['volume'].to_numpy(dtype=float)
+            ts = df.index.as_unit('ms').asi8 if isinstance(df.index, pd.DatetimeIndex) else np.arange(len(df))
+            self._ohlc[symbol] = ohlc
+            self._rows[symbol] = [
+                [str(int(t)), _fmt(o), _fmt(h), _fmt(l), _fmt(c), _fmt(v), _fmt(v * c)]
+                for t, (o, h, l, c), v in zip(ts, ohlc, volume)
+            ]
+        self.n_bars = min(len(rows) for rows in self._rows.values())
+        if not 0 <= self.cursor < self.n_bars:
+            raise ValueError(f"start={start} veri uzunluğu dışında (bar sayısı: {self.n_bars})")
+
+        self.leverage: Dict[str, str] = {}
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}   # orderId -> order (açık + kapalı)
+        self.fills: List[Dict[str, Any]] = []
+        self.closed_pnl: List[Dict[str, Any]] = []  # kapanış emri başına (Bybit closed-pnl)
+        self.calls: Counter = Counter()
+        self.injected: Counter = Counter()
+        self._forced: List[Tuple[Optional[str], str]] = []  # fail_next kuyruğu
+        self._order_seq = 0
+        self._lock = threading.RLock()  # hedge / deadline sonrası arka planda süren çağrılar için
+
+    # --- Replay ---
+    def advance(self, bars: int = 1) -> bool:
+        """İmleci ilerletir ve her yeni barda bekleyen emirleri eşleştirir; veri biterse False"""
+        with self._lock:
+            for _ in range(bars):
+                if self.cursor + 1 >= self.n_bars:
+                    return False
+                self.cursor += 1
+                for symbol in self.symbols:
+                    self._match_bar(symbol)
+        return True
+
+    @property
+    def bar_time(self) -> int:
+        return int(self._rows[self.symbols[0]][self.cursor][0])
+
+    def now(self) -> float:
+        """Borsa saati (s): imleçteki barın ortası, yani son bar henüz oluşmakta"""
+        rows = self._rows[self.symbols[0]]
+        spacing = int(rows[1][0]) - int(rows[0][0]) if len(rows) > 1 else 0
+        return (self.bar_time + spacing / 2) / 1000
+
+    def last_price(self, symbol: str) -> float:
+        return self._ohlc[symbol][self.cursor, 3]
+
+    # --- Gecikme / hata enjeksiyonu ---
+    def fail_next(self, kind: str = 'network', method: Optional[str] = None) -> None:
+        """Bir sonraki (method verilirse o metoda ait) çağrıda kesin hata üretir"""
+        if kind not in ERROR_KINDS:
+            raise ValueError(f"Bilinmeyen hata türü: {kind} (seçenekler: {', '.join(ERROR_KINDS)})")
+        self._forced.append((method, kind))
+
+    def _delay(self) -> float:
+        delay = self.rng.uniform(*self.latency) if isinstance(self.latency, tuple) else self.latency
+        if self.tail_rate and self.rng.random() < self.tail_rate:
+            delay += self.tail_latency
+        return delay
+
+    def _pick_error(self, method: str) -> Optional[str]:
+        for i, (target, kind) in enumerate(self._forced):
+            if target in (None, method):
+                del self._forced[i]
+                return kind
+        if self.error_rate and (self.error_methods is None or method in self.error_methods):
+            if self.rng.random() < self.error_rate:
+                return self.rng.choice(self.error_kinds)
+        return None
+
+    def _call(self, method: str, handler: Callable[..., Dict], kwargs: Dict, delayed: bool = False) -> Dict:
+        """Tek API çağrısı: sayaç, gecikme, hata enjeksiyonu ve yanıt zarfı (delayed: gecikme çağıranda)"""
+        delay = 0.0 if delayed else self._delay()
+        if delay > 0:
+            self.sleep(delay)
+        request = f"{method}: {kwargs}"
+        with self._lock:
+            self.calls[method] += 1
+            kind = self._pick_error(method)
+            if kind:
+                self.injected[kind] += 1
+            if kind == 'network':
+                raise FailedRequestError(request=request, message='Simüle ağ hatası', status_code=0,
+                                         time=_now(), resp_headers=None)
+            if kind == 'rate_limit':
+                self._reject(request, 10006, 'Too many visits!')
+
+            result = handler(request, **kwargs)
+
+        if kind == 'timeout':
+            raise FailedRequestError(request=request, message='Simüle timeout (istek işlendi)',
+                                     status_code=0, time=_now(), resp_headers=None)
+        return {'retCode': 0, 'retMsg': 'OK', 'result': result, 'retExtInfo': {}, 'time': self.bar_time}
+
+    @staticmethod
+    def _reject(request: str, code: int, message: str):
+        # pybit davranışı: retCode != 0 -> InvalidRequestError
+        raise InvalidRequestError(request=request, message=message, status_code=code,
+                                  time=_now(), resp_headers=None)
+
+    def _check_symbol(self, request: str, symbol: Optional[str]) -> None:
+        if symbol not in self._ohlc:
+            self._reject(request, 10001, f'params error: symbol invalid ({symbol})')
+
+    # --- pybit HTTP arayüzü ---
+    def get_kline(self, **kwargs) -> Dict:
+        return self._call('get_kline', self._get_kline, kwargs)
+
+    def get_tickers(self, **kwargs) -> Dict:
+        return self._call('get_tickers', self._get_tickers, kwargs)
+
+    def set_leverage(self, **kwargs) -> Dict:
+        return self._call('set_leverage', self._set_leverage, kwargs)
+
+    def get_positions(self, **kwargs) -> Dict:
+        return self._call('get_positions', self._get_positions, kwargs)
+
+    def place_order(self, **kwargs) -> Dict:
+        return self._call('place_order', self._place_order, kwargs)
+
+    def cancel_order(self, **kwargs) -> Dict:
+        return self._call('cancel_order', self._cancel_order, kwargs)
+
+    def set_trading_stop(self, **kwargs) -> Dict:
+        return self._call('set_trading_stop', self._set_trading_stop, kwargs)
+
+    def get_open_orders(self, **kwargs) -> Dict:
+        return self._call('get_open_orders', self._get_open_orders, kwargs)
+
+    def get_order_history(self, **kwargs) -> Dict:
+        return self._call('get_order_history', self._get_order_history, kwargs)
+
+    def get_executions(self, **kwargs) -> Dict:
+        return self._call('get_executions', self._get_executions, kwargs)
+
+    def get_closed_pnl(self, **kwargs) -> Dict:
+        return self._call('get_closed_pnl', self._get_closed_pnl, kwargs)
+
+    # --- Uç nokta gerçeklemeleri ---
+    def _get_kline(self, request, symbol=None, limit=200, category='linear', interval=None, **_) -> Dict:
+        self._check_symbol(request, symbol)
+        limit = min(int(limit), 1000)
+        rows = self._rows[symbol][max(0, self.cursor - limit + 1):self.cursor + 1]
+        return {'category': category, 'symbol': symbol, 'list': rows[::-1]}
+
+    def _get_tickers(self, request, symbol=None, category='linear', **_) -> Dict:
+        symbols = [symbol] if symbol else self.symbols
+        if symbol:
+            self._check_symbol(request, symbol)
+        half_spread = self.spread_bps / 2e4
+        items = []
+        for s in symbols:
+            last = self.last_price(s)
+            items.append({
+                'symbol': s, 'lastPrice': _fmt(last), 'markPrice': _fmt(last), 'indexPrice': _fmt(last),
+                'bid1Price': _fmt(last * (1 - half_spread)), 'ask1Price': _fmt(last * (1 + half_spread)),
+            })
+        return {'category': category, 'list': items}
+
+    def _set_leverage(self, request, symbol=None, buyLeverage=None, sellLeverage=None, **_) -> Dict:
+        self._check_symbol(request, symbol)
+        if self.leverage.get(symbol) == str(buyLeverage):
+            self._reject(request, 110043, 'leverage not modified')
+        self.leverage[symbol] = str(buyLeverage)
+        return {}
+
+    def _position_view(self, symbol: str) -> Dict[str, Any]:
+        pos = self.positions.get(symbol, {'side': '', 'size': 0.0, 'avgPrice': 0.0, 'realised': 0.0})
+        mark = self.last_price(symbol)
+        sign = 1 if pos['side'] == 'Buy' else -1
+        return {
+            'symbol': symbol,
+            'side': pos['side'],
+            'size': _fmt(pos['size']),
+            'avgPrice': _fmt(pos['avgPrice']),
+            'markPrice': _fmt(mark),
+            'positionIdx': 0,
+            'leverage': self.leverage.get(symbol, '10'),
+            'takeProfit': '',
+            'stopLoss': _fmt(pos['stopLoss']) if pos.get('stopLoss') else '',
+            'unrealisedPnl': _fmt(sign * (mark - pos['avgPrice']) * pos['size'] if pos['size'] else 0.0),
+            'cumRealisedPnl': _fmt(pos['realised']),
+            'updatedTime': str(self.bar_time),
+        }
+
+    def _get_positions(self, request, symbol=None, settleCoin=None, **_) -> Dict:
+        if symbol is not None:
+            self._check_symbol(request, symbol)
+            return {'category': 'linear', 'list': [self._position_view(symbol)]}
+        if settleCoin is None:
+            self._reject(request, 10001, 'params error: symbol or settleCoin required')
+        return {'category': 'linear', 'list': [
+            self._position_view(s) for s, pos in self.positions.items() if pos['size'] > 0
+        ]}
+
+    def _place_order(self, request, symbol=None, side=None, orderType=None, qty=None, price=None,
+                     triggerPrice=None, triggerDirection=None, reduceOnly=False, orderLinkId=None,
+                     timeInForce='GTC', stopLoss=None, **_) -> Dict:
+        self._check_symbol(request, symbol)
+        if side not in ('Buy', 'Sell') or orderType not in ('Market', 'Limit'):
+            self._reject(request, 10001, 'params error: side/orderType')
+        qty = float(qty or 0)
+        if qty <= 0:
+            self._reject(request, 10001, 'params error: qty')
+        if orderType == 'Limit' and price is None:
+            self._reject(request, 10001, 'params error: price required for Limit')
+        if orderLinkId and any(o['orderLinkId'] == orderLinkId for o in self.orders.values()):
+            self._reject(request, 110072, 'OrderLinkedID is duplicate')
+
+        last = self.last_price(symbol)
+        if triggerPrice is not None:
+            triggerPrice = float(triggerPrice)
+            triggerDirection = int(triggerDirection or (1 if triggerPrice > last else 2))
+            # Bybit: tetik seviyesi anlık fiyatın yanlış tarafındaysa reddedilir
+            if (triggerDirection == 1 and triggerPrice <= last) or (triggerDirection == 2 and triggerPrice >= last):
+                self._reject(request, 110093, f'expect {"Rising" if triggerDirection == 1 else "Falling"}, '
+                                              f'but trigger_price[{triggerPrice}] vs current[{last}]')
+
+        self._order_seq += 1
+        order = {
+            'orderId': f"sim-{self._order_seq:08d}",
+            'orderLinkId': orderLinkId or '',
+            'symbol': symbol,
+            'side': side,
+            'orderType': orderType,
+            'price': float(price) if price is not None else 0.0,
+            'qty': qty,
+            'triggerPrice': triggerPrice or 0.0,
+            'triggerDirection': triggerDirection or 0,
+            'reduceOnly': bool(reduceOnly),
+            'timeInForce': timeInForce,
+            'stopLoss': float(stopLoss) if stopLoss else 0.0,
+            'orderStatus': 'Untriggered' if triggerPrice is not None else 'New',
+            'avgPrice': 0.0,
+            'cumExecQty': 0.0,
+            'createdTime': self.bar_time,
+            'updatedTime': self.bar_time,
+        }
+        self.orders[order['orderId']] = order
+
+        if triggerPrice is None:
+            if orderType == 'Market':
+                slip = 1 + self.slippage_bps / 1e4 * (1 if side == 'Buy' else -1)
+                self._fill(order, last * slip, self.taker_fee)
+            elif (side == 'Buy' and order['price'] >= last) or (side == 'Sell' and order['price'] <= last):
+                if timeInForce == 'PostOnly':
+                    order['orderStatus'] = 'Cancelled'
+                else:
+                    self._fill(order, last, self.taker_fee)
+
+        return {'orderId': order['orderId'], 'orderLinkId': order['orderLinkId']}
+
+    def _cancel_order(self, request, symbol=None, orderId=None, orderLinkId=None, **_) -> Dict:
+        order = self._find(orderId, orderLinkId)
+        if order is None or order['symbol'] != symbol or order['orderStatus'] not in OPEN_STATUSES:
+            self._reject(request, 110001, 'order not exists or too late to cancel')
+        order['orderStatus'] = 'Deactivated' if order['orderStatus'] == 'Untriggered' else 'Cancelled'
+        order['updatedTime'] = self.bar_time
+        return {'orderId': order['orderId'], 'orderLinkId': order['orderLinkId']}
+
+    def _set_trading_stop(self, request, symbol=None, stopLoss=None, positionIdx=0, category='linear', **_) -> Dict:
+        self._check_symbol(request, symbol)
+        pos = self.positions.get(symbol)
+        if not pos or pos['size'] <= 0:
+            self._reject(request, 10001, 'can not set tp/sl/ts for zero position')
+        if stopLoss is not None:
+            stop = float(stopLoss)
+            if stop == pos.get('stopLoss', 0.0):
+                self._reject(request, 34040, 'not modified')
+            pos['stopLoss'] = stop
+        return {}
+
+    def _get_open_orders(self, request, **kwargs) -> Dict:
+        return {'category': 'linear', 'list': self._query(kwargs, open_orders=True)}
+
+    def _get_order_history(self, request, **kwargs) -> Dict:
+        return {'category': 'linear', 'list': self._query(kwargs, open_orders=False)}
+
+    def _get_executions(self, request, **kwargs) -> Dict:
+        return self._history(request, self.fills, self._execution_view, **kwargs)
+
+    def _get_closed_pnl(self, request, **kwargs) -> Dict:
+        return self._history(request, self.closed_pnl, self._closed_pnl_view, **kwargs)
+
+    def _history(self, request, records: List[Dict], view: Callable[[Dict], Dict], symbol=None, startTime=None,
+                 endTime=None, limit=50, cursor=None, category='linear', **_) -> Dict:
+        """
+        Bybit geçmiş uç noktaları: [startTime, endTime] en fazla 7 gün (verilmeyen uç diğerinden 7 gün),
+        yeniden eskiye, sayfa başına limit (<= 100) kayıt, nextPageCursor ile devam
+        """
+        if symbol is not None:
+            self._check_symbol(request, symbol)
+        end = int(endTime) if endTime is not None else (
+            int(startTime) + HISTORY_WINDOW_MS if startTime is not None else int(self.now() * 1000))
+        start = int(startTime) if startTime is not None else end - HISTORY_WINDOW_MS
+        if end < start or end - start > HISTORY_WINDOW_MS:
+            self._reject(request, 10001, 'params error: time range must be within 7 days')
+        matches = [r for r in reversed(records)
+                   if start <= r['time'] <= end and (symbol is None or r['symbol'] == symbol)]
+        offset, limit = int(cursor or 0), min(int(limit), 100)
+        page = matches[offset:offset + limit]
+        return {
+            'category': category,
+            'list': [view(r) for r in page],
+            'nextPageCursor': str(offset + limit) if offset + limit < len(matches) else '',
+        }
+
+    @staticmethod
+    def _execution_view(fill: Dict) -> Dict:
+        return {
+            'symbol': fill['symbol'], 'orderId': fill['orderId'], 'orderLinkId': fill['orderLinkId'],
+            'side': fill['side'], 'orderType': fill['orderType'], 'execId': fill['execId'],
+            'execPrice': _fmt(fill['price']), 'execQty': _fmt(fill['qty']), 'execValue': _fmt(fill['price'] * fill['qty']),
+            'execFee': _fmt(fill['fee']), 'execType': 'Trade', 'execTime': str(fill['time']),
+            'isMaker': fill['isMaker'], 'closedSize': _fmt(fill['closedSize']),
+        }
+
+    @staticmethod
+    def _closed_pnl_view(record: Dict) -> Dict:
+        return dict(record, **{key: _fmt(record[key]) for key in
+                               ('qty', 'closedSize', 'avgEntryPrice', 'avgExitPrice', 'closedPnl',
+                                'cumEntryValue', 'cumExitValue')},
+                    createdTime=str(record['time']), updatedTime=str(record['time']))
+
+    def _find(self, order_id: Optional[str], link_id: Optional[str]) -> Optional[Dict]:
+        if order_id:
+            return self.orders.get(order_id)
+        if link_id:
+            return next((o for o in self.orders.values() if o['orderLinkId'] == link_id), None)
+        return None
+
+    def _query(self, filters: Dict, open_orders: bool) -> List[Dict]:
+        symbol = filters.get('symbol')
+        if filters.get('orderId') or filters.get('orderLinkId'):
+            order = self._find(filters.get('orderId'), filters.get('orderLinkId'))
+            candidates = [order] if order else []
+        else:
+            candidates = reversed(list(self.orders.values()))  # yeniden eskiye
+        return [
+            self._order_view(o) for o in candidates
+            if (symbol is None or o['symbol'] == symbol) and (o['orderStatus'] in OPEN_STATUSES) == open_orders
+        ]
+
+    @staticmethod
+    def _order_view(order: Dict) -> Dict:
+        view = dict(order)
+        for key in ('price', 'qty', 'triggerPrice', 'avgPrice', 'cumExecQty', 'stopLoss'):
+            view[key] = _fmt(order[key])
+        view['triggerDirection'] = order['triggerDirection']
+        view['createdTime'] = str(order['createdTime'])
+        view['updatedTime'] = str(order['updatedTime'])
+        return view
+
+    # --- Eşleştirme ---
+    def _match_bar(self, symbol: str) -> None:
+        """Bekleyen emirleri imleçteki barın open/high/low değerlerine göre doldurur"""
+        open_, high, low, _ = self._ohlc[symbol][self.cursor]
+        if self.stops_first:
+            self._match_position_stop(symbol, open_, high, low)
+        pending = [o for o in self.orders.values() if o['symbol'] == symbol and o['orderStatus'] in OPEN_STATUSES]
+        stops = [o for o in pending if o['orderStatus'] == 'Untriggered']
+        limits = [o for o in pending if o['orderStatus'] != 'Untriggered']
+
+        for group in ((stops, limits) if self.stops_first else (limits, stops)):
+            for order in group:
+                if order['orderStatus'] not in OPEN_STATUSES:
+                    continue
+                if order['orderStatus'] == 'Untriggered':
+                    trigger = order['triggerPrice']
+                    if order['triggerDirection'] == 1 and high >= trigger:
+                        self._fill(order, max(open_, trigger), self.taker_fee)
+                    elif order['triggerDirection'] == 2 and low <= trigger:
+                        self._fill(order, min(open_, trigger), self.taker_fee)
+                else:
+                    price = order['price']
+                    if order['side'] == 'Buy' and low <= price:
+                        self._fill(order, min(open_, price), self.maker_fee)
+                    elif order['side'] == 'Sell' and high >= price:
+                        self._fill(order, max(open_, price), self.maker_fee)
+        if not self.stops_first:
+            self._match_position_stop(symbol, open_, high, low)
+
+    def _match_position_stop(self, symbol: str, open_: float, high: float, low: float) -> None:
+        """Pozisyon stop'u (stopLoss) bar aralığına girdiyse pozisyon market emirle kapanır"""
+        pos = self.positions.get(symbol)
+        if not pos or pos['size'] <= 0 or not pos.get('stopLoss'):
+            return
+        stop = pos['stopLoss']
+        if pos['side'] == 'Buy' and low <= stop:
+            price = min(open_, stop)
+        elif pos['side'] == 'Sell' and high >= stop:
+            price = max(open_, stop)
+        else:
+            return
+        self._order_seq += 1
+        order = {
+            'orderId': f"sim-{self._order_seq:08d}", 'orderLinkId': '', 'symbol': symbol,
+            'side': 'Sell' if pos['side'] == 'Buy' else 'Buy', 'orderType': 'Market', 'price': 0.0,
+            'qty': pos['size'], 'triggerPrice': stop, 'triggerDirection': 2 if pos['side'] == 'Buy' else 1,
+            'reduceOnly': True, 'timeInForce': 'IOC', 'stopLoss': 0.0, 'stopOrderType': 'StopLoss',
+            'orderStatus': 'Untriggered', 'avgPrice': 0.0, 'cumExecQty': 0.0,
+            'createdTime': self.bar_time, 'updatedTime': self.bar_time,
+        }
+        self.orders[order['orderId']] = order
+        self._fill(order, price, self.taker_fee)
+
+    def _fill(self, order: Dict, price: float, fee_rate: float) -> None:
+        """Emri price'tan doldurur ve net pozisyonu günceller (reduceOnly pozisyonu aşamaz)"""
+        symbol = order['symbol']
+        pos = self.positions.setdefault(symbol, {'side': '', 'size': 0.0, 'avgPrice': 0.0, 'realised': 0.0,
+                                                 'entryFees': 0.0})
+        qty = order['qty']
+
+        if order['reduceOnly']:
+            if pos['size'] <= 0 or pos['side'] == order['side']:
+                order['orderStatus'] = 'Deactivated' if order['triggerPrice'] else 'Cancelled'
+                order['updatedTime'] = self.bar_time
+                return
+            qty = min(qty, pos['size'])
+
+        fee = qty * price * fee_rate
+        closed = 0.0
+        if pos['size'] == 0 or pos['side'] == order['side']:
+            total = pos['size'] + qty
+            pos['avgPrice'] = (pos['avgPrice'] * pos['size'] + price * qty) / total
+            pos['size'] = total
+            pos['side'] = order['side']
+            pos['entryFees'] += fee
+            if order['stopLoss']:
+                pos['stopLoss'] = order['stopLoss']
+        else:
+            closed = min(qty, pos['size'])
+            sign = 1 if pos['side'] == 'Buy' else -1
+            entry_price = pos['avgPrice']
+            entry_fee = pos['entryFees'] * closed / pos['size']  # kapanan kısmın açılış komisyonu
+            pos['realised'] += sign * (price - entry_price) * closed
+            pos['size'] -= closed
+            pos['entryFees'] -= entry_fee
+            if qty > closed:  # ters pozisyona geçiş
+                pos.update(side=order['side'], size=qty - closed, avgPrice=price, entryFees=fee * (qty - closed) / qty,
+                           stopLoss=order['stopLoss'])
+            elif pos['size'] <= 1e-12:
+                pos.update(side='', size=0.0, avgPrice=0.0, entryFees=0.0, stopLoss=0.0)
+            exit_fee = fee * closed / qty
+            self.closed_pnl.append({
+                'time': self.bar_time, 'symbol': symbol, 'orderId': order['orderId'], 'side': order['side'],
+                'orderType': order['orderType'], 'qty': qty, 'closedSize': closed,
+                'avgEntryPrice': entry_price, 'avgExitPrice': price,
+                'closedPnl': sign * (price - entry_price) * closed - entry_fee - exit_fee,
+                'cumEntryValue': entry_price * closed, 'cumExitValue': price * closed,
+                'fillCount': '1', 'leverage': self.leverage.get(symbol, '10'), 'execType': 'Trade',
+            })
+        pos['realised'] -= fee
+
+        order.update(orderStatus='Filled', avgPrice=price, cumExecQty=qty, updatedTime=self.bar_time)
+        self.fills.append({
+            'time': self.bar_time, 'symbol': symbol, 'orderId': order['orderId'], 'orderLinkId': order['orderLinkId'],
+            'execId': f"sim-exec-{len(self.fills) + 1:08d}", 'side': order['side'], 'orderType': order['orderType'],
+            'qty': qty, 'price': price, 'fee': fee, 'isMaker': fee_rate == self.maker_fee,
+            'closedSize': closed, 'reduceOnly': order['reduceOnly'],
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'bar': self.cursor,
+            'fills': len(self.fills),
+            'realised_pnl': round(float(sum(p['realised'] for p in self.positions.values())), 4),
+            'open_positions': {s: p['side'] for s, p in self.positions.items() if p['size'] > 0},
+            'api_calls': dict(self.calls),
+            'injected_errors': dict(self.injected),
+        }
+
+
+class AsyncSimulatedBybitHTTP:
+    """AsyncBybitHTTP yerine geçer; aynı simülatör durumunu paylaşır, gecikme asyncio.sleep ile"""
+
+    def __init__(self, exchange: SimulatedBybitHTTP):
+        self.exchange = exchange
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        pass
+
+    async def _call(self, method: str, kwargs: Dict) -> Dict:
+        delay = self.exchange._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.exchange._call(method, getattr(self.exchange, f'_{method}'), kwargs, delayed=True)
+
+    async def get_kline(self, **kwargs) -> Dict:
+        return await self._call('get_kline', kwargs)
+
+    async def get_tickers(self, **kwargs) -> Dict:
+        return await self._call('get_tickers', kwargs)
+
+    async def set_leverage(self, **kwargs) -> Dict:
+        return await self._call('set_leverage', kwargs)
+
+    async def get_positions(self, **kwargs) -> Dict:
+        return await self._call('get_positions', kwargs)
+
+    async def place_order(self, **kwargs) -> Dict:
+        return await self._call('place_order', kwargs)
+
+    async def cancel_order(self, **kwargs) -> Dict:
+        return await self._call('cancel_order', kwargs)
+
+    async def set_trading_stop(self, **kwargs) -> Dict:
+        return await self._call('set_trading_stop', kwargs)
+
+    async def get_open_orders(self, **kwargs) -> Dict:
+        return await self._call('get_open_orders', kwargs)
+
+    async def get_order_history(self, **kwargs) -> Dict:
+        return await self._call('get_order_history', kwargs)
+
+
+def create_simulated_bot(exchange: SimulatedBybitHTTP, use_async: bool = False,
+                         accounts: Optional[Dict[str, Dict[str, Any]]] = None):
+    """
+    Simülatöre bağlı TradingBot (durum deposu kapalı, emir sonrası bekleme yok).
+    accounts: {hesap: {'exchange': SimulatedBybitHTTP, 'settings', 'symbols'}}; alt hesap borsaları
+    ana borsayla birlikte ilerletilmelidir (verilmezse alt hesap yok)
+    """
+    from main import TradingBot
+    from state_store import NullStateStore
+
+    sub_accounts = {}
+    for name, entry in (accounts or {}).items():
+        entry = dict(entry)
+        sub_exchange = entry.pop('exchange')
+        sub_accounts[name] = dict(
+            entry,
+            session=sub_exchange,
+            async_session=AsyncSimulatedBybitHTTP(sub_exchange) if use_async else None,
+            state_store=NullStateStore()
+        )
+
+    bot = TradingBot(
+        session=exchange,
+        async_session=AsyncSimulatedBybitHTTP(exchange) if use_async else None,
+        state_store=NullStateStore(),
+        symbols=exchange.symbols,
+        accounts=sub_accounts
+    )
+    bot.clock = exchange.now
+    for account in bot.accounts:
+        account.position_manager.settle_delay = 0.0
+        account.position_manager.verify_interval = 0.0
+        if account.ledger is not None:
+            account.ledger.clock = exchange.now
+    return bot
+
+
+def replay(bot, exchange: SimulatedBybitHTTP, cycles: int, use_async: bool = False) -> Dict[str, Any]:
+    """Her turda bir bar ilerletip run_once (veya run_once_async) çalıştırır"""
+    durations = []
+    failures = 0
+    for _ in range(cycles):
+        if not exchange.advance():
+            break
+        t0 = time.perf_counter()
+        result = asyncio.run(bot.run_once_async()) if use_async else bot.run_once()
+        durations.append(time.perf_counter() - t0)
+        failures += not result['success']
+
+    return dict(
+        exchange.summary(),
+        cycles=len(durations),
+        failed_cycles=failures,
+        cycle_mean_s=round(float(np.mean(durations)), 4) if durations else None,
+        cycle_max_s=round(float(np.max(durations)), 4) if durations else None,
+    )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv-dir', help='Geçmiş veri klasörü (yoksa sentetik veri)')
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--bars', type=int, default=200, help='Oynatılacak tur (bar) sayısı')
+    parser.add_argument('--warmup', type=int, default=250, help='İlk turdan önce görünen bar sayısı')
+    parser.add_argument('--latency', type=float, default=0.0, help='Çağrı başına gecikme (s)')
+    parser.add_argument('--tail-rate', type=float, default=0.0, help='Gecikme kuyruğu olasılığı')
+    parser.add_argument('--tail-latency', type=float, default=0.0, help='Kuyruktaki çağrıya eklenen gecikme (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--async', dest='use_async', action='store_true', help='run_once_async kullan')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.csv_dir:
+        frames = load_csv_frames(args.csv_dir, args.symbols)
+    else:
+        frames = synthetic_frames(args.symbols, args.warmup + args.bars, seed=args.seed)
+
+    exchange = SimulatedBybitHTTP(frames, start=args.warmup, latency=args.latency,
+                                  tail_rate=args.tail_rate, tail_latency=args.tail_latency,
+                                  error_rate=args.error_rate, seed=args.seed)
+    bot = create_simulated_bot(exchange, args.use_async)
+    print(json.dumps(replay(bot, exchange, args.bars, args.use_async), indent=2))
+
+
+if __name__ == '__main__':
+    main_cli()
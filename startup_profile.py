@@ -0,0 +1,79 @@
+"""
+Cold start profili: temiz bir yorumlayıcıda modül import süreleri ve TradingBot.__init__ API maliyeti.
+
+Kullanım:
+    python startup_profile.py              # sadece import süreleri
+    python startup_profile.py --init       # + TradingBot.__init__ (API anahtarları gerekir)
+    python startup_profile.py --init --testnet
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Kendi modüllerimiz + bilinen ağır bağımlılıklar ayrı satırda gösterilir
+LOCAL_MODULES = {'main', 'config', 'exchange', 'indicators', 'entry_strategies',
+                 'position_manager', 'exit_strategies', 'async_exchange'}
+
+
+def profile_imports(target: str = 'main') -> List[Tuple[str, float]]:
+    """'python -X importtime' çıktısını üst seviye pakete göre toplar (saniye, self süre)"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        capture_output=True, text=True
+    )
+    totals: Dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # "import time:   self |  cumulative |   paket.modül"
+        self_us, _, name = line[len('import time:'):].split('|')
+        top = name.strip().split('.')[0]
+        totals[top] += int(self_us) / 1e6
+
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def profile_init(testnet: bool = False) -> Dict:
+    """TradingBot.__init__ adım süreleri ve API çağrı sayısı"""
+    import time
+    t0 = time.perf_counter()
+    import main
+    import_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    bot = main.TradingBot(testnet=testnet)
+    return {
+        'main_import': round(import_s, 4),
+        'heavy_imports': main.STARTUP_PROFILE['imports'],
+        'init_steps': bot.init_profile,
+        'init_total': round(time.perf_counter() - t0, 4),
+        'init_api_calls': bot.init_api_calls,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', default='main', help='Import edilecek modül (varsayılan: main)')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--init', action='store_true', help='TradingBot.__init__ ölçümü (API çağrısı yapar)')
+    parser.add_argument('--testnet', action='store_true')
+    args = parser.parse_args()
+
+    rows = profile_imports(args.target)
+    total = sum(sec for _, sec in rows)
+    print(f"Import süresi ({args.target}): toplam {total:.3f}s")
+    for name, sec in rows[:args.top]:
+        tag = ' (yerel)' if name in LOCAL_MODULES else ''
+        print(f"  {name:<24}{sec:8.3f}s  {sec / total * 100:5.1f}%{tag}")
+
+    if args.init:
+        print(json.dumps(profile_init(args.testnet), indent=2))
+
+
+if __name__ == '__main__':
+    main_cli()
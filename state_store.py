@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from config import (STATE_STORE, STATE_STORE_PATH, STATE_BUCKET, STATE_BLOB,
+                    STATE_FIRESTORE_COLLECTION, STATE_FIRESTORE_DOCUMENT)
+
+logger = logging.getLogger(__name__)
+
+# {symbol: position_data}  (position_data oco_pair'i de içerir)
+Positions = Dict[str, Dict[str, Any]]
+
+
+class StateConflictError(Exception):
+    """Kayıt sırasında versiyon uyuşmazlığı (başka bir instance araya yazmış)"""
+
+
+def _json_default(value):
+    # numpy skalerleri (np.float64, np.bool_ ...) -> python tipi
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(value)}")
+
+
+def dumps(positions: Positions) -> str:
+    return json.dumps(positions, default=_json_default, sort_keys=True)
+
+
+class StateStore(ABC):
+    """
+    Pozisyon durumu deposu arayüzü.
+    load() -> (positions, version); save(positions, expected_version) -> yeni version.
+    expected_version depodaki güncel versiyonla uyuşmazsa StateConflictError.
+    """
+
+    @abstractmethod
+    def load(self) -> Tuple[Positions, int]:
+        ...
+
+    @abstractmethod
+    def save(self, positions: Positions, expected_version: int) -> int:
+        ...
+
+
+class NullStateStore(StateStore):
+    """Kalıcılık kapalı (STATE_STORE=none): her çalıştırmada borsadan yeniden keşif"""
+
+    def load(self) -> Tuple[Positions, int]:
+        return {}, 0
+
+    def save(self, positions: Positions, expected_version: int) -> int:
+        return expected_version
+
+
+class JsonStateStore(StateStore):
+    """Tek JSON dosyası; yazma geçici dosya + os.replace ile atomik"""
+
+    def __init__(self, path: str = STATE_STORE_PATH):
+        self.path = path
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'version': 0, 'positions': {}}
+
+    def load(self) -> Tuple[Positions, int]:
+        doc = self._read()
+        return doc.get('positions', {}), int(doc.get('version', 0))
+
+    def save(self, positions: Positions, expected_version: int) -> int:
+        current = int(self._read().get('version', 0))
+        if current != expected_version:
+            raise StateConflictError(f"{self.path}: beklenen v{expected_version}, mevcut v{current}")
+
+        new_version = current + 1
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('{"version": %d, "updated_at": %.3f, "positions": %s}' % (new_version, time.time(), dumps(positions)))
+        os.replace(tmp_path, self.path)
+        return new_version
+
+
+class SqliteStateStore(StateStore):
+    """Yerel SQLite; versiyon kontrolü ve yazma tek transaction içinde"""
+
+    def __init__(self, path: str = STATE_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS positions (symbol TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (id, version) VALUES (1, 0)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level='IMMEDIATE')
+
+    def load(self) -> Tuple[Positions, int]:
+        with self._connect() as conn:
+            version = conn.execute("SELECT version FROM meta WHERE id = 1").fetchone()[0]
+            rows = conn.execute("SELECT symbol, data FROM positions").fetchall()
+        return {symbol: json.loads(data) for symbol, data in rows}, int(version)
+
+    def save(self, positions: Positions, expected_version: int) -> int:
+        with self._connect() as conn:
+            current = conn.execute("SELECT version FROM meta WHERE id = 1").fetchone()[0]
+            if current != expected_version:
+                raise StateConflictError(f"{self.path}: beklenen v{expected_version}, mevcut v{current}")
+            conn.execute("DELETE FROM positions")
+            conn.executemany(
+                "INSERT INTO positions (symbol, data) VALUES (?, ?)",
+                [(symbol, json.dumps(data, default=_json_default)) for symbol, data in positions.items()]
+            )
+            conn.execute("UPDATE meta SET version = ? WHERE id = 1", (current + 1,))
+        return current + 1
+
+
+class GcsStateStore(StateStore):
+    """Cloud Storage nesnesi; versiyon = object generation (if_generation_match ile koşullu yazma)"""
+
+    def __init__(self, bucket: str = STATE_BUCKET, blob: str = STATE_BLOB):
+        from google.cloud import storage  # opsiyonel bağımlılık
+        self.blob = storage.Client().bucket(bucket).blob(blob)
+
+    def load(self) -> Tuple[Positions, int]:
+        from google.api_core.exceptions import NotFound
+        try:
+            self.blob.reload()
+            return json.loads(self.blob.download_as_bytes(if_generation_match=self.blob.generation)), int(self.blob.generation)
+        except NotFound:
+            return {}, 0
+
+    def save(self, positions: Positions, expected_version: int) -> int:
+        from google.api_core.exceptions import PreconditionFailed
+        try:
+            # generation 0 = "nesne henüz yok" koşulu
+            self.blob.upload_from_string(dumps(positions), content_type='application/json',
+                                         if_generation_match=expected_version)
+        except PreconditionFailed as e:
+            raise StateConflictError(str(e))
+        return int(self.blob.generation)
+
+
+class FirestoreStateStore(StateStore):
+    """Firestore dokümanı {'version': int, 'positions': {...}}; yazma transaction ile"""
+
+    def __init__(self, collection: str = STATE_FIRESTORE_COLLECTION, document: str = STATE_FIRESTORE_DOCUMENT):
+        from google.cloud import firestore  # opsiyonel bağımlılık
+        self._firestore = firestore
+        self.client = firestore.Client()
+        self.doc_ref = self.client.collection(collection).document(document)
+
+    def load(self) -> Tuple[Positions, int]:
+        snapshot = self.doc_ref.get()
+        if not snapshot.exists:
+            return {}, 0
+        doc = snapshot.to_dict()
+        return doc.get('positions', {}), int(doc.get('version', 0))
+
+    def save(self, positions: Positions, expected_version: int) -> int:
+        payload = json.loads(dumps(positions))
+
+        @self._firestore.transactional
+        def _write(transaction):
+            snapshot = self.doc_ref.get(transaction=transaction)
+            current = int(snapshot.to_dict().get('version', 0)) if snapshot.exists else 0
+            if current != expected_version:
+                raise StateConflictError(f"Firestore: beklenen v{expected_version}, mevcut v{current}")
+            transaction.set(self.doc_ref, {'version': current + 1, 'positions': payload})
+            return current + 1
+
+        return _write(self.client.transaction())
+
+
+STORES = {
+    'none': NullStateStore,
+    'json': JsonStateStore,
+    'sqlite': SqliteStateStore,
+    'gcs': GcsStateStore,
+    'firestore': FirestoreStateStore,
+}
+
+
+def _account_location(kind: str, account: str) -> Dict[str, str]:
+    """Alt hesabın depo konumu: positions.json -> positions.<hesap>.json, Firestore dokümanı <doküman>-<hesap>"""
+    def suffixed(path: str) -> str:
+        root, ext = os.path.splitext(path)
+        return f"{root}.{account}{ext}"
+
+    if kind in ('json', 'sqlite'):
+        return {'path': suffixed(STATE_STORE_PATH)}
+    if kind == 'gcs':
+        return {'blob': suffixed(STATE_BLOB)}
+    if kind == 'firestore':
+        return {'document': f"{STATE_FIRESTORE_DOCUMENT}-{account}"}
+    return {}
+
+
+def create_state_store(kind: Optional[str] = None, account: Optional[str] = None) -> StateStore:
+    """config.STATE_STORE'a göre depo oluşturur (account: alt hesabın ayrı konumu); hata olursa kalıcılık kapatılır"""
+    kind = (kind or STATE_STORE).lower()
+    if kind not in STORES:
+        raise ValueError(f"Bilinmeyen STATE_STORE: {kind} (seçenekler: {', '.join(STORES)})")
+    try:
+        return STORES[kind](**(_account_location(kind, account) if account else {}))
+    except Exception as e:
+        logger.error(f"{kind} durum deposu açılamadı, kalıcılık kapalı: {e}")
+        return NullStateStore()
@@ -0,0 +1,38 @@
+"""Daemon turları: pozisyonlar bellekte kalır, borsadan senkron sadece hatalı turdan sonra"""
+from daemon import TradingDaemon
+
+
+class _Bot:
+    def checkpoint(self):
+        pass
+
+
+def test_resyncs_only_after_failed_cycle():
+    calls = []
+    results = iter([{'success': True}, {'success': False}, {'success': True}, {'success': True}])
+
+    def get_bot(sync=True):
+        calls.append(sync)
+        return _Bot()
+
+    daemon = TradingDaemon(get_bot=get_bot, run_cycle=lambda bot: next(results), clock=lambda: 0.0)
+    for _ in range(4):
+        daemon._cycle()
+
+    assert calls == [False, False, True, False]
+    assert daemon.stats['failed_cycles'] == 1
+
+
+def test_resyncs_after_cycle_exception():
+    calls = []
+
+    def run_cycle(bot):
+        if len(calls) == 1:
+            raise RuntimeError('borsa hatası')
+        return {'success': True}
+
+    daemon = TradingDaemon(get_bot=lambda sync=True: calls.append(sync) or _Bot(), run_cycle=run_cycle)
+    daemon._cycle()
+    daemon._cycle()
+
+    assert calls == [False, True]
@@ -0,0 +1,110 @@
+"""Koşullu giriş: dolum -> pozisyon kaydı (adopt) -> çıkış akışı, simülatör üzerinde"""
+import numpy as np
+import pandas as pd
+
+from entry_arming import EntryArmer
+from position_manager import PositionManager
+from simulator import SimulatedBybitHTTP
+
+SYMBOL = 'BTCUSDT'
+ATR = 300.0
+TRIGGER = 60300.0
+
+
+def _frames(bars):
+    """(open, high, low, close) listesinden 15 dk'lık kline DataFrame'i"""
+    ohlc = np.array(bars, dtype=float)
+    index = pd.date_range('2024-01-01', periods=len(ohlc), freq='15min', tz='UTC')
+    frame = pd.DataFrame(ohlc, columns=['open', 'high', 'low', 'close'], index=index)
+    frame['volume'] = 1.0
+    return {SYMBOL: frame}
+
+
+def _setup(exit_bar):
+    """
+    Fiyat 60000 civarında; 3. barda 60500'den gap ile açılır (tetik 60300, dolum 60500), sonra exit_bar.
+    Emre eklenen stopLoss tetik fiyatından (59400), OCO SL dolum fiyatından (59600) hesaplanır
+    """
+    flat = (60000, 60050, 59950, 60000)
+    bars = [flat] * 3 + [(60500, 60550, 60450, 60500), (60500, 60550, 60450, 60500), exit_bar, flat]
+    exchange = SimulatedBybitHTTP(_frames(bars), start=3, seed=0)
+    manager = PositionManager(exchange)
+    armer = EntryArmer(exchange, manager)
+    armer._recovered = True
+    armer._arm(SYMBOL, 'LONG', TRIGGER, {'atr': ATR, 'pct_atr': 0.5})
+    return exchange, manager, armer
+
+
+def _fill_and_adopt(exchange, manager, armer):
+    exchange.advance()
+    assert exchange.positions[SYMBOL]['stopLoss'] == TRIGGER - 3 * ATR  # dolumla gelen borsa tarafı SL
+    armer.reconcile([SYMBOL])
+    position = manager.active_positions[SYMBOL]
+    assert position['entry_price'] == 60500.0
+    assert position['stop_loss'] == 60500.0 - 3 * ATR
+    return position
+
+
+def test_adopt_leaves_single_stop_loss():
+    exchange, manager, armer = _setup((60500, 60550, 60450, 60500))
+    _fill_and_adopt(exchange, manager, armer)
+
+    view = exchange.get_positions(category='linear', symbol=SYMBOL)['result']['list'][0]
+    assert view['stopLoss'] == ''
+    open_orders = exchange.get_open_orders(category='linear', symbol=SYMBOL)['result']['list']
+    assert sorted(o['orderType'] for o in open_orders) == ['Limit', 'Market']  # sadece OCO bacakları
+
+
+def test_gap_through_both_stops_closes_via_oco():
+    # Bar iki SL seviyesinin de altında açılır: tek SL olarak OCO bacağı dolar, TP iptal edilir
+    exchange, manager, armer = _setup((59000, 59100, 58900, 59000))
+    position = _fill_and_adopt(exchange, manager, armer)
+
+    exchange.advance()
+    exchange.advance()
+    manager.monitor_oco_orders()
+
+    assert SYMBOL not in manager.active_positions
+    assert exchange.positions[SYMBOL]['size'] == 0
+    assert exchange.get_open_orders(category='linear', symbol=SYMBOL)['result']['list'] == []
+    sl_order = exchange.orders[position['oco_pair']['sl_order_id']]
+    assert sl_order['orderStatus'] == 'Filled'
+
+
+def test_take_profit_exit():
+    exchange, manager, armer = _setup((60500, 61500, 60450, 61400))
+    position = _fill_and_adopt(exchange, manager, armer)
+
+    exchange.advance()
+    exchange.advance()
+    manager.monitor_oco_orders()
+
+    assert SYMBOL not in manager.active_positions
+    assert exchange.positions[SYMBOL]['size'] == 0
+    assert exchange.orders[position['oco_pair']['tp_order_id']]['orderStatus'] == 'Filled'
+    assert exchange.get_open_orders(category='linear', symbol=SYMBOL)['result']['list'] == []
+
+
+def test_attached_stop_fired_before_reconcile_registers_nothing():
+    # Dolumdan sonraki bar, reconcile'dan önce emre eklenen stopLoss'u (59400) tetikler
+    exchange, manager, armer = _setup((59000, 59100, 58900, 59000))
+    exchange.advance()
+    exchange.advance()
+    exchange.advance()
+    assert exchange.positions[SYMBOL]['size'] == 0
+
+    armer.reconcile([SYMBOL])
+
+    assert SYMBOL not in manager.active_positions
+    assert exchange.get_open_orders(category='linear', symbol=SYMBOL)['result']['list'] == []
+
+
+def test_failed_tp_sl_leaves_no_stub(monkeypatch):
+    exchange, manager, armer = _setup((60500, 60550, 60450, 60500))
+    exchange.advance()
+    monkeypatch.setattr(manager.exit_strategy, 'set_limit_tp_sl', lambda *a, **k: {'success': False})
+    monkeypatch.setattr(manager, 'close_position', lambda *a, **k: False)
+
+    armer.reconcile([SYMBOL])
+
+    assert SYMBOL not in manager.active_positions
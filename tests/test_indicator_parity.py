@@ -0,0 +1,85 @@
+"""
+NumPy çekirdeği (np_indicators), toplu motor (batch_indicators) ve budanmış kolonlar pandas referansı
+indicators.calculate_indicators ile birebir aynı olmalı (NaN konumları dahil). Tek istisna batch yolunun
+nw/nw_upper/nw_lower kolonları (tek matris çarpımı: son basamakta yuvarlama farkı)
+"""
+import numpy as np
+import pytest
+
+import entry_strategies
+import indicators
+import np_indicators
+import position_manager
+from batch_indicators import calculate_indicators_batch, latest_rows_batch
+from config import SYMBOLS
+from simulator import synthetic_frames
+
+SEEDS = [0, 1, 2]
+BARS = 600
+LIVE_COLUMNS = entry_strategies.REQUIRED_COLUMNS + position_manager.REQUIRED_COLUMNS  # PRUNE_INDICATORS
+NW_COLUMNS = {'nw', 'nw_upper', 'nw_lower'}
+
+
+def _arrays(df):
+    data = {col: df[col].to_numpy(dtype=float) for col in np_indicators.OHLCV}
+    data['time'] = np_indicators.bar_times_ms(df)
+    return data
+
+
+def _assert_same(expected, actual, column, exact=True):
+    expected = np.asarray(expected)
+    actual = np.asarray(actual)
+    if expected.dtype.kind in 'fiub' and actual.dtype.kind in 'fiub':
+        expected, actual = expected.astype(float), actual.astype(float)
+        if exact:
+            np.testing.assert_array_equal(actual, expected, err_msg=column)
+        else:
+            np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=0, equal_nan=True, err_msg=column)
+    else:
+        assert actual.tolist() == expected.tolist(), column
+
+
+@pytest.fixture(scope='module', params=SEEDS)
+def case(request):
+    frames = synthetic_frames(SYMBOLS, bars=BARS, seed=request.param)
+    reference = {s: indicators.calculate_indicators(df.copy(), s) for s, df in frames.items()}
+    return frames, reference
+
+
+@pytest.mark.parametrize('symbol', SYMBOLS)
+def test_numpy_core_matches_pandas(case, symbol):
+    frames, reference = case
+    result = np_indicators.calculate_indicators(_arrays(frames[symbol]), symbol)
+    for column in np_indicators.COLUMN_ORDER:
+        _assert_same(reference[symbol][column].to_numpy(), result[column], column)
+
+
+@pytest.mark.parametrize('symbol', SYMBOLS)
+def test_pruned_columns_match_pandas(case, symbol):
+    frames, reference = case
+    df = frames[symbol]
+    o, h, l, c = (df[col].to_numpy(dtype=float)[None, :] for col in ('open', 'high', 'low', 'close'))
+    pruned = np_indicators.compute_columns(o, h, l, c, [symbol], LIVE_COLUMNS)
+    assert set(LIVE_COLUMNS) - set(np_indicators.OHLCV) <= set(pruned)
+    for column, values in pruned.items():
+        _assert_same(reference[symbol][column].to_numpy(), values[0], column)
+
+
+def test_latest_rows_match_pandas(case):
+    frames, reference = case
+    rows = np_indicators.latest_rows({s: _arrays(df) for s, df in frames.items()}, LIVE_COLUMNS)
+    for symbol in SYMBOLS:
+        for column in LIVE_COLUMNS:
+            _assert_same([reference[symbol][column].iloc[-1]], [rows[symbol][column]], column)
+
+
+def test_batch_matches_pandas(case):
+    frames, reference = case
+    batch = calculate_indicators_batch(frames)
+    latest = latest_rows_batch(frames, LIVE_COLUMNS)
+    for symbol in SYMBOLS:
+        for column in np_indicators.COLUMN_ORDER:
+            _assert_same(reference[symbol][column].to_numpy(), batch[symbol][column].to_numpy(), column,
+                         exact=column not in NW_COLUMNS)
+        for column in LIVE_COLUMNS:
+            _assert_same([reference[symbol][column].iloc[-1]], [latest[symbol][column]], column)
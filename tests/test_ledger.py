@@ -0,0 +1,84 @@
+"""İşlem defteri: artımlı imleç + örtüşme penceresinde kimlikle tekilleştirme, simülatörün geçmiş uç noktaları"""
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from ledger import ExecutionLedger, read_ledger  # noqa: E402
+from position_manager import PositionManager  # noqa: E402
+from simulator import SimulatedBybitHTTP  # noqa: E402
+
+FLAT = {'BTCUSDT': 60000.0, 'ETHUSDT': 3000.0}
+
+
+def _frames(spikes):
+    """Sembol başına yatay barlar; spikes: {(sembol, bar): (high, low)}"""
+    index = pd.date_range('2024-01-01', periods=8, freq='15min', tz='UTC')
+    frames = {}
+    for symbol, price in FLAT.items():
+        ohlc = np.array([[price, price * 1.0005, price * 0.9995, price]] * len(index))
+        for (target, bar), (high, low) in spikes.items():
+            if target == symbol:
+                ohlc[bar, 1:3] = high, low
+        frame = pd.DataFrame(ohlc, columns=['open', 'high', 'low', 'close'], index=index)
+        frame['volume'] = 1.0
+        frames[symbol] = frame
+    return frames
+
+
+def _by(records, key):
+    totals = defaultdict(float)
+    for record in records:
+        totals[key(record)] += record['closedPnl']
+    return totals
+
+
+def test_two_syncs_with_new_fills_in_between(tmp_path):
+    # BTC barda 4 TP'ye (60900), ETH bar 5'te SL'ye (3060) değer; bar 5'te BTC yeniden açılıp elle kapatılır
+    exchange = SimulatedBybitHTTP(_frames({('BTCUSDT', 4): (61000, 59990), ('ETHUSDT', 5): (3100, 2999)}),
+                                  start=4, seed=0)
+    # örtüşme iki bar: ikinci senkron ilkinin kayıtlarını yeniden çeker, kimlikle elenmeleri gerekir
+    ledger = ExecutionLedger(exchange, 'main', str(tmp_path), overlap_s=1800, compact_files=0, clock=exchange.now)
+    manager = PositionManager(exchange, symbol_settings={})
+    manager.settle_delay = manager.verify_interval = 0.0
+    manager.ledger = ledger
+
+    manager.open_position('BTCUSDT', 'LONG', 60000.0, 300.0, 0.5)
+    manager.open_position('ETHUSDT', 'SHORT', 3000.0, 20.0, 0.6)
+    exchange.advance()
+    manager.monitor_oco_orders()
+    first = ledger.sync(manager.active_positions)
+
+    exchange.advance()
+    manager.monitor_oco_orders()
+    manager.open_position('BTCUSDT', 'LONG', 60000.0, 300.0, 0.5)
+    manager.close_position('BTCUSDT', 'MANUAL')
+    second = ledger.sync(manager.active_positions)
+
+    assert first['trades'] == 1 and second['trades'] == 2
+    assert first['executions'] + second['executions'] == len(exchange.fills)
+
+    trades = read_ledger(str(tmp_path), 'main', 'trades').to_pylist()
+    executions = read_ledger(str(tmp_path), 'main', 'executions').to_pylist()
+    assert sorted(t['trade_id'] for t in trades) == sorted(r['orderId'] for r in exchange.closed_pnl)
+    assert sorted(e['exec_id'] for e in executions) == sorted(f['execId'] for f in exchange.fills)
+
+    reasons = {t['trade_id']: t['exit_reason'] for t in trades}
+    assert Counter(reasons.values()) == {'TP': 1, 'SL': 1, 'MANUAL': 1}
+    assert {t['symbol']: t['exit_reason'] for t in trades if t['exit_reason'] != 'MANUAL'} == {'BTCUSDT': 'TP', 'ETHUSDT': 'SL'}
+
+    by_symbol = ledger.summary('symbol')
+    assert {s: row['trades'] for s, row in by_symbol.items()} == {'BTCUSDT': 2, 'ETHUSDT': 1}
+    for symbol, pnl in _by(exchange.closed_pnl, lambda r: r['symbol']).items():
+        assert by_symbol[symbol]['realised_pnl'] == pytest.approx(pnl, abs=1e-6)
+
+    by_reason = ledger.summary('exit_reason')
+    for reason, pnl in _by(exchange.closed_pnl, lambda r: reasons[r['orderId']]).items():
+        assert by_reason[reason]['trades'] == 1
+        assert by_reason[reason]['realised_pnl'] == pytest.approx(pnl, abs=1e-6)
+
+    # yeni dolum yokken senkron hiçbir şey eklemez
+    assert ledger.sync(manager.active_positions) == {'executions': 0, 'trades': 0}
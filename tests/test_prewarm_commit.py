@@ -0,0 +1,49 @@
+"""İki aşamalı tetikleme: erken gelen commit HTTP işleyicisinde uyumaz, 425 ile reddedilir"""
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from config import PREWARM_COMMIT_DELAY_S
+
+BAR = 15 * 60
+CLOSE = 1_700_000_100.0 - 1_700_000_100.0 % BAR + BAR  # bir bar kapanışı (epoch s)
+
+
+def _bot(seconds_before_commit):
+    return SimpleNamespace(interval='15', prewarmed=True,
+                           clock=lambda: CLOSE + PREWARM_COMMIT_DELAY_S - seconds_before_commit)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main.time, 'sleep', calls.append)
+    return calls
+
+
+def test_commit_shortly_before_close_sleeps(sleeps):
+    assert main._wait_for_bar_close(_bot(1.0)) is None
+    assert sleeps == [pytest.approx(1.0)]
+
+
+def test_early_commit_is_not_slept(sleeps):
+    assert main._wait_for_bar_close(_bot(10.0)) == pytest.approx(10.0)
+    assert sleeps == []
+
+
+def test_commit_after_close_runs_immediately(sleeps):
+    assert main._wait_for_bar_close(_bot(-5.0)) is None
+    assert sleeps == []
+
+
+def test_trigger_rejects_early_commit_with_425(monkeypatch, sleeps):
+    monkeypatch.setattr(main, '_bot', _bot(9.5))
+    monkeypatch.setattr(main, 'run_cycle', lambda bot: pytest.fail('erken commit tur çalıştırmamalı'))
+
+    body, status, headers = main.trading_bot_trigger(SimpleNamespace(args={}, path='/'))
+
+    assert status == 425
+    assert headers == {'Retry-After': '10'}
+    assert body['status'] == 'too_early'
+    assert sleeps == []
@@ -0,0 +1,120 @@
+"""Dayanıklılık katmanı (ResilientSession) simülatör üzerinde: emir tekrarı, 110072 kurtarma, devre, hedge"""
+import threading
+import time
+
+import pytest
+
+import resilience
+from config import BREAKER_FAILURES
+from resilience import CircuitOpenError, ResilienceState, ResilientSession
+from simulator import SimulatedBybitHTTP, synthetic_frames
+
+SYMBOL = 'BTCUSDT'
+ORDER = dict(category='linear', symbol=SYMBOL, side='Buy', orderType='Market', qty='0.01')
+
+
+@pytest.fixture(autouse=True)
+def _fast_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, 'RETRY_BACKOFF_S', 0.0)
+
+
+@pytest.fixture
+def exchange():
+    return SimulatedBybitHTTP(synthetic_frames([SYMBOL], bars=300), start=250, seed=0)
+
+
+def _orders(exchange, link_id):
+    return [o for o in exchange.orders.values() if o['orderLinkId'] == link_id]
+
+
+def test_write_retried_after_timeout_creates_one_order(exchange):
+    # İlk deneme borsada işlenir ama yanıt kaybolur; yeniden deneme aynı orderLinkId ile gider
+    exchange.fail_next('timeout', 'place_order')
+    session = ResilientSession(exchange)
+
+    result = session.place_order(**ORDER)
+
+    link_id = result['result']['orderLinkId']
+    assert link_id.startswith('bot-')
+    assert exchange.calls['place_order'] == 2
+    assert len(_orders(exchange, link_id)) == 1
+    assert exchange.positions[SYMBOL]['size'] == pytest.approx(0.01)
+    session.close()
+
+
+def test_duplicate_link_id_recovery_returns_existing_order(exchange):
+    existing = exchange.place_order(**ORDER, orderLinkId='bot-existing')['result']['orderId']
+    exchange.fail_next('network', 'place_order')  # ilk denemenin yanıtı alınamadı
+    state = ResilienceState()
+    session = ResilientSession(exchange, state)
+
+    result = session.place_order(**ORDER, orderLinkId='bot-existing')
+
+    assert result['retCode'] == 0
+    assert result['result'] == {'orderId': existing, 'orderLinkId': 'bot-existing'}
+    assert state.stats['recovered']['place_order'] == 1
+    assert len(_orders(exchange, 'bot-existing')) == 1
+    session.close()
+
+
+def test_open_breaker_fails_fast_without_calling_exchange(exchange):
+    now = [0.0]
+    exchange.error_rate, exchange.error_methods = 1.0, {'get_positions'}
+    state = ResilienceState(clock=lambda: now[0])
+    session = ResilientSession(exchange, state)
+
+    while state.breakers['trade'].state != 'open':
+        with pytest.raises(Exception):
+            session.get_positions(category='linear', symbol=SYMBOL)
+    assert exchange.calls['get_positions'] >= BREAKER_FAILURES
+
+    sent = exchange.calls['get_positions']
+    started = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        session.get_positions(category='linear', symbol=SYMBOL)
+    assert time.monotonic() - started < 0.1
+    assert exchange.calls['get_positions'] == sent
+    assert session.get_kline(category='linear', symbol=SYMBOL, interval='15', limit=5)['retCode'] == 0  # ayrı grup
+
+    # cooldown sonrası tek deneme (half-open) geçer, başarıyla devre kapanır
+    exchange.error_rate = 0.0
+    now[0] += state.breakers['trade'].cooldown
+    assert session.get_positions(category='linear', symbol=SYMBOL)['retCode'] == 0
+    assert state.breakers['trade'].state == 'closed'
+    session.close()
+
+
+class _SlowFirstKline:
+    """İlk get_kline isteği takılır (release'e kadar), sonrakiler simülatörden hemen döner"""
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.release = threading.Event()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def get_kline(self, **kwargs):
+        with self._lock:
+            self.requests += 1
+            first = self.requests == 1
+        if first:
+            self.release.wait(5)
+            return {'retCode': 0, 'retMsg': 'OK', 'result': {'list': 'slow'}}
+        return self.exchange.get_kline(**kwargs)
+
+
+def test_hedged_get_kline_returns_first_result(exchange, monkeypatch):
+    monkeypatch.setattr(resilience, 'HEDGE_ENABLED', True)
+    monkeypatch.setattr(resilience, 'HEDGE_MIN_DELAY_S', 0.05)
+    slow = _SlowFirstKline(exchange)
+    state = ResilienceState()
+    session = ResilientSession(slow, state)
+
+    result = session.get_kline(category='linear', symbol=SYMBOL, interval='15', limit=5)
+    slow.release.set()
+
+    assert result == exchange.get_kline(category='linear', symbol=SYMBOL, interval='15', limit=5)
+    assert slow.requests == 2
+    assert state.stats['hedges']['get_kline'] == 1
+    assert state.stats['hedge_wins']['get_kline'] == 1
+    session.close()